@@ -0,0 +1,72 @@
+"""
+Benchmark subnet and exact address filters on mgmt_ip: a filter_func parsing
+the address of every host with the ipaddress module, versus an IPFilter
+answered from the IPIndex of an IndexedInventory.
+
+Usage:
+    python benchmarks/bench_address.py --hosts 10000 80000
+"""
+
+# Import modules
+import argparse
+import ipaddress
+import time
+from common import best_of, synthetic_inventory
+from nornir_perf import IndexedInventory, IPFilter, IPIndex, longest_prefix
+
+SUBNETS = ["10.0.4.0/22", "10.0.0.0/16", "10.0.0.23/32"]
+
+
+def subnet_filter(subnet):
+    """
+    Build a filter function matching the hosts in a subnet, host by host.
+
+    :param subnet: The subnet, i.e. 10.0.4.0/22.
+    :type subnet: string
+
+    :return func: The filter function.
+    """
+    network = ipaddress.ip_network(subnet)
+    return lambda host: ipaddress.ip_address(host["mgmt_ip"]) in network
+
+
+def bench(count):
+    """
+    Run the address filter benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    """
+    stock = synthetic_inventory(count)
+    indexed = IndexedInventory(stock.hosts, stock.groups, stock.defaults)
+    # The first IPFilter parses the address of every host
+    start = time.perf_counter()
+    indexed.engine.auxiliary(IPIndex, "mgmt_ip")
+    print(f"{count:>8} hosts | IP index built in {time.perf_counter() - start:.4f}s")
+    for subnet in SUBNETS:
+        func = subnet_filter(subnet)
+        stock_time, expected = best_of(lambda: stock.filter(filter_func=func))
+        ip_filter = IPFilter(mgmt_ip__subnet=subnet)
+        index_time, result = best_of(lambda: list(indexed.filter(ip_filter).hosts))
+        # Same hosts, in the same order, or the numbers mean nothing
+        assert result == list(expected.hosts)
+        print(
+            f"{subnet:>16} | {len(result):>6} matched | "
+            f"stock: {stock_time:8.4f}s | indexed: {index_time:8.4f}s | "
+            f"speedup: {stock_time / index_time:6.1f}x"
+        )
+    stock_time, expected = best_of(lambda: longest_prefix(stock, "10.2.0.1"))
+    index_time, result = best_of(lambda: longest_prefix(indexed, "10.2.0.1"))
+    assert result == expected
+    print(
+        f"{'longest prefix':>16} | {str(result):>18} | "
+        f"stock: {stock_time:8.4f}s | indexed: {index_time:8.4f}s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count)
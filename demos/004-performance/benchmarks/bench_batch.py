@@ -0,0 +1,101 @@
+"""
+Benchmark the nightly report, the advanced filters of the demo run against
+one inventory: one filter() call per filter, each scanning every host,
+versus a FilterBatch evaluating all of them in a single pass.
+
+Usage:
+    python benchmarks/bench_batch.py --hosts 10000 80000
+"""
+
+# Import modules
+import argparse
+from common import (
+    CERTIFIED,
+    best_of,
+    device_name_convention,
+    even_device_naming_convention,
+    non_device_name_convention,
+    odd_device_naming_convention,
+    synthetic_inventory,
+    test_domain_name_convention,
+)
+from nornir.core.filter import F
+from nornir_perf import FilterBatch, IndexedInventory
+
+
+def report():
+    """
+    Build the filters of the report, the advanced filters of the demo.
+
+    :return filters: A dict of filter name to filter.
+    """
+    return {
+        "hemisphere": F(hemisphere__eq="northern"),
+        "eq_site_code": F(site_code__eq="mtl"),
+        "neq_site_code": ~F(site_code__eq="mel"),
+        "or_site_code": F(site_code__eq="ptl") | F(site_code__eq="chc"),
+        "not_and_dev_type": ~F(device_type__eq="switch") & ~F(device_type__eq="router"),
+        "ge_sla": F(sla__ge=80),
+        "certified_os_version": F(os_version__any=CERTIFIED),
+        "non_certified_os_version": ~F(os_version__any=CERTIFIED),
+        "production_hosts": F(production__eq=True),
+        "region": F(region__eq="apac"),
+        "odd_devices": odd_device_naming_convention,
+        "even_devices": even_device_naming_convention,
+        "test_domain_devices": test_domain_name_convention,
+        "device_name_convention": device_name_convention,
+        "device_name_non_convention": non_device_name_convention,
+        "site_type": F(site_type__eq="primary"),
+        "non_primary_site_type": F(site_type__any=["tertiary", "secondary"]),
+        "production_non_certified": F(production__eq=True)
+        & ~F(os_version__any=CERTIFIED),
+    }
+
+
+def one_by_one(inventory, filters):
+    """
+    Run every filter of the report with its own filter() call.
+
+    :return results: A dict of filter name to the matching host names.
+    """
+    return {n: list(inventory.filter(f).hosts) for n, f in filters.items()}
+
+
+def batched(inventory, batch):
+    """
+    Run every filter of the report in a single batch.
+
+    :return results: A dict of filter name to the matching host names.
+    """
+    return {n: list(r.hosts) for n, r in batch.run(inventory).items()}
+
+
+def bench(count):
+    """
+    Run the report benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    """
+    stock = synthetic_inventory(count)
+    indexed = IndexedInventory(stock.hosts, stock.groups, stock.defaults)
+    filters = report()
+    batch = FilterBatch(filters)
+    for label, inventory in (("stock", stock), ("indexed", indexed)):
+        serial_time, expected = best_of(lambda: one_by_one(inventory, filters))
+        batch_time, result = best_of(lambda: batched(inventory, batch))
+        # Same hosts, in the same order, or the numbers mean nothing
+        assert result == expected
+        print(
+            f"{count:>8} hosts | {len(filters)} filters | {label:>7} | "
+            f"one by one: {serial_time:8.4f}s | batch: {batch_time:8.4f}s | "
+            f"speedup: {serial_time / batch_time:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count)
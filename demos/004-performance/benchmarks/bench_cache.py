@@ -0,0 +1,91 @@
+"""
+Benchmark repeated filters, the same few queries run over and over by
+tooling: stock nornir and the attribute index, which evaluate every call,
+versus the result cache, which evaluates each distinct filter once.
+
+Usage:
+    python benchmarks/bench_cache.py --hosts 10000 80000 --repeat 20
+"""
+
+# Import modules
+import argparse
+from common import CERTIFIED, best_of, synthetic_inventory
+from nornir.core.filter import F
+from nornir_perf import CachedInventory, IndexedInventory
+
+
+def queries():
+    """
+    Build the repeated queries, some written in a different order, which
+    the cache keys on the same canonical form.
+
+    :return filters: A list of F filters.
+    """
+    return [
+        F(site_code__eq="mel"),
+        F(production__eq=True),
+        F(os_version__any=CERTIFIED),
+        F(site_code__eq="mel", production__eq=True),
+        F(production__eq=True) & F(site_code__eq="mel"),
+        ~F(os_version__any=CERTIFIED) & F(sla__ge=80),
+        F(sla__ge=80) & ~F(os_version__any=CERTIFIED),
+    ]
+
+
+def run(inventory, filters, repeat):
+    """
+    Run every query, a number of times.
+
+    :return results: A list of the results of the last run of every query.
+    """
+    results = []
+    for _ in range(repeat):
+        results = [inventory.filter(f) for f in filters]
+    return results
+
+
+def names(results):
+    """
+    List the matching host names of every query.
+
+    :return names: A list of lists of host names.
+    """
+    return [list(result.hosts) for result in results]
+
+
+def bench(count, repeat):
+    """
+    Run the repeated filters benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    :param repeat: The number of times every query is run.
+    :type repeat: integer
+    """
+    stock = synthetic_inventory(count)
+    indexed = IndexedInventory(stock.hosts, stock.groups, stock.defaults)
+    cached = CachedInventory(
+        IndexedInventory(stock.hosts, stock.groups, stock.defaults)
+    )
+    filters = queries()
+    stock_time, expected = best_of(lambda: run(stock, filters, repeat), 1)
+    index_time, index_result = best_of(lambda: run(indexed, filters, repeat), 1)
+    # A single run, so the first call of every distinct query is a miss
+    cache_time, result = best_of(lambda: run(cached, filters, repeat), 1)
+    # Same hosts, in the same order, or the numbers mean nothing
+    assert names(result) == names(expected) == names(index_result)
+    calls = repeat * len(filters)
+    print(
+        f"{count:>8} hosts | {calls} calls | stock: {stock_time:8.4f}s | "
+        f"index: {index_time:8.4f}s | cache: {cache_time:8.4f}s | "
+        f"speedup: {stock_time / cache_time:6.1f}x | {cached.cache}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count, args.repeat)
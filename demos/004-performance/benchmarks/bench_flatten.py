@@ -0,0 +1,71 @@
+"""
+Benchmark a hot loop reading inherited keys of every host, i.e. to build a
+report: stock nornir hosts, which walk their groups on every lookup, versus
+the FlatHost of a flattened inventory. The flattened hosts are timed cold
+(resolving the lookup tables on the first loop) and warm.
+
+Usage:
+    python benchmarks/bench_flatten.py --hosts 10000 80000
+"""
+
+# Import modules
+import argparse
+import os
+import time
+from common import best_of, inventory_dir, synthetic_hosts
+from nornir_perf.plugin import build_inventory, read_yaml
+
+# Inherited data keys, from the site, environment and platform groups
+KEYS = ["full_name", "region", "hemisphere", "sla", "production", "vendor"]
+
+
+def report(inventory):
+    """
+    Read every inherited key, plus the platform, of every host.
+
+    :param inventory: The inventory to read.
+    :type inventory: nornir.core.inventory.Inventory
+
+    :return rows: A list of rows, one per host.
+    """
+    return [
+        [host.platform] + [host[key] for key in KEYS]
+        for host in inventory.hosts.values()
+    ]
+
+
+def bench(count):
+    """
+    Run the flatten benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    """
+    groups = read_yaml(os.path.join(inventory_dir, "groups.yaml"))
+    stock = build_inventory(synthetic_hosts(count), groups)
+    flat = build_inventory(synthetic_hosts(count), groups, flatten=True)
+    stock_time, expected = best_of(lambda: report(stock))
+    # The first loop resolves the lookup tables
+    start = time.perf_counter()
+    report(flat)
+    cold_time = time.perf_counter() - start
+    warm_time, result = best_of(lambda: report(flat))
+    # Same values, or the numbers mean nothing
+    assert result == expected
+    print(
+        f"{count:>8} hosts | stock: {stock_time:8.4f}s | cold: {cold_time:8.4f}s | "
+        f"warm: {warm_time:8.4f}s | speedup: {stock_time / warm_time:6.1f}x"
+    )
+    # Changing group data must be seen by the flattened hosts straight away
+    for inventory in (stock, flat):
+        inventory.groups["mel"].data["region"] = "oceania"
+        inventory.groups["ios"].platform = "iosxe"
+    assert report(flat) == report(stock)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count)
@@ -0,0 +1,49 @@
+"""
+Benchmark children_of_group for environment, site and platform groups:
+stock nornir, which walks the group ancestry of every host, versus the
+GroupIndex of an IndexedInventory.
+
+Usage:
+    python benchmarks/bench_groups.py --hosts 10000 80000
+"""
+
+# Import modules
+import argparse
+import time
+from common import best_of, synthetic_inventory
+from nornir_perf import GroupIndex, IndexedInventory
+
+# An environment, a site and a platform group of the synthetic inventory
+GROUPS = ["test", "mel", "ios"]
+
+
+def bench(count):
+    """
+    Run the children_of_group benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    """
+    stock = synthetic_inventory(count)
+    indexed = IndexedInventory(stock.hosts, stock.groups, stock.defaults)
+    start = time.perf_counter()
+    GroupIndex(stock.hosts)
+    print(f"{count:>8} hosts | group index built in {time.perf_counter() - start:.4f}s")
+    for group in GROUPS:
+        stock_time, expected = best_of(lambda: stock.children_of_group(group))
+        index_time, result = best_of(lambda: indexed.children_of_group(group))
+        # Same hosts, or the numbers mean nothing
+        assert result == expected
+        print(
+            f"{group:>16} | {len(result):>6} hosts | "
+            f"stock: {stock_time:8.4f}s | indexed: {index_time:8.4f}s | "
+            f"speedup: {stock_time / index_time:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count)
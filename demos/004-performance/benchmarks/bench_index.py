@@ -0,0 +1,67 @@
+"""
+Benchmark the equality, __any, range and compound filters used by the demo:
+stock nornir scans versus bitmap evaluation over the AttributeIndex.
+
+Usage:
+    python benchmarks/bench_index.py --hosts 10000 80000
+"""
+
+# Import modules
+import argparse
+from common import best_of, synthetic_inventory
+from nornir.core.filter import F
+from nornir_perf import IndexedInventory
+
+# The filters from filter_host_vendor, filter_host_platform,
+# filter_eq_site_code, filter_region, filter_site_type,
+# filter_non_primary_site_type, filter_ge_sla, filter_neq_site_code,
+# filter_or_site_code and filter_not_and_dev_type
+FILTERS = [
+    ("vendor=arista", (), {"vendor": "arista"}),
+    ("platform=ios", (), {"platform": "ios"}),
+    ("site_code__eq=mtl", (F(site_code__eq="mtl"),), {}),
+    ("region__eq=apac", (F(region__eq="apac"),), {}),
+    ("site_type__eq=primary", (F(site_type__eq="primary"),), {}),
+    ("site_type__any", (F(site_type__any=["tertiary", "secondary"]),), {}),
+    ("sla__ge=80", (F(sla__ge=80),), {}),
+    ("sla__lt=80", (F(sla__lt=80),), {}),
+    ("~site_code__eq=mel", (~F(site_code__eq="mel"),), {}),
+    ("ptl | chc", (F(site_code__eq="ptl") | F(site_code__eq="chc"),), {}),
+    (
+        "~switch & ~router",
+        (~F(device_type__eq="switch") & ~F(device_type__eq="router"),),
+        {},
+    ),
+]
+
+
+def bench(count):
+    """
+    Run the filter benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    """
+    stock = synthetic_inventory(count)
+    build_time, indexed = best_of(
+        lambda: IndexedInventory(stock.hosts, stock.groups, stock.defaults), 1
+    )
+    print(f"{count} hosts, index built in {build_time:.3f}s")
+    for label, args, kwargs in FILTERS:
+        stock_time, expected = best_of(lambda: stock.filter(*args, **kwargs))
+        index_time, result = best_of(lambda: indexed.filter(*args, **kwargs))
+        # Same hosts, in the same order, or the numbers mean nothing
+        assert list(result.hosts) == list(expected.hosts), label
+        print(
+            f"  {label:<24} {len(result.hosts):>7} hosts | "
+            f"stock: {stock_time:8.4f}s | index: {index_time:8.4f}s | "
+            f"speedup: {stock_time / index_time:7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count)
@@ -0,0 +1,122 @@
+"""
+Benchmark building the inventory from the motherstarter JSON inputs: the
+render-then-parse path, which renders inventory.json and groups.json through
+the templates/nornir Jinja templates and parses the YAML back, versus
+JSONInventory, which builds the hosts straight from the JSON files.
+
+Usage:
+    python benchmarks/bench_inputs.py --hosts 10000 80000
+"""
+
+# Import modules
+import argparse
+import json
+import os
+import tempfile
+import jinja2
+from common import best_of, dirname, synthetic_hosts
+from nornir_perf import JSONInventory, PerfInventory
+
+# Path to the JSON inputs and the Jinja templates of the demo
+inputs_dir = os.path.join(dirname, "../inputs")
+templates_dir = os.path.join(dirname, "../templates/nornir")
+
+
+def write_inputs(directory, count):
+    """
+    Write a synthetic inventory.json, plus a copy of the demo groups.json.
+
+    :param directory: The directory to write the JSON files to.
+    :type directory: string
+    :param count: The number of devices to generate.
+    :type count: integer
+
+    :return files: A tuple of (inventory_file, groups_file).
+    """
+    devices = []
+    for name, host in synthetic_hosts(count).items():
+        os_group, environment, site_code = host["groups"]
+        devices.append(
+            {
+                "name": name,
+                "mgmt_ip": host["data"]["mgmt_ip"],
+                "vendor": host["data"]["vendor"].title(),
+                "operating_system": os_group,
+                "environment": environment,
+                "device_type": host["data"]["device_type"],
+                "site_code": site_code,
+                "os_version": host["data"]["os_version"],
+            }
+        )
+    inventory_file = os.path.join(directory, "inventory.json")
+    groups_file = os.path.join(directory, "groups.json")
+    with open(inventory_file, "w", encoding="utf-8") as f:
+        json.dump(devices, f, indent=4)
+    with open(os.path.join(inputs_dir, "groups.json"), encoding="utf-8") as f:
+        groups = json.load(f)
+    with open(groups_file, "w", encoding="utf-8") as f:
+        json.dump(groups, f, indent=4)
+    return inventory_file, groups_file
+
+
+def render_then_parse(inventory_file, groups_file, directory):
+    """
+    Render the JSON inputs into hosts.yaml and groups.yaml, the way
+    motherstarter does, then load them with PerfInventory.
+
+    :return inventory: An initialised nornir Inventory.
+    """
+    environment = jinja2.Environment(loader=jinja2.FileSystemLoader(templates_dir))
+    files = []
+    for template, source, variable in (
+        ("hosts.j2", inventory_file, "inventory"),
+        ("groups.j2", groups_file, "groups"),
+    ):
+        with open(source, encoding="utf-8") as f:
+            rendered = environment.get_template(template).render(
+                **{variable: json.load(f)}
+            )
+        path = os.path.join(directory, template.replace(".j2", ".yaml"))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(rendered)
+        files.append(path)
+    return PerfInventory(host_file=files[0], group_file=files[1], snapshot=False).load()
+
+
+def bench(count):
+    """
+    Run the JSON inputs benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        inventory_file, groups_file = write_inputs(directory, count)
+        yaml_time, expected = best_of(
+            lambda: render_then_parse(inventory_file, groups_file, directory), 1
+        )
+        json_time, inventory = best_of(
+            lambda: JSONInventory(
+                host_file=inventory_file, group_file=groups_file, snapshot=False
+            ).load()
+        )
+    # Same hosts and groups, with the same data, or the numbers mean nothing
+    assert list(inventory.hosts) == list(expected.hosts)
+    assert [h.dict() for h in inventory.hosts.values()] == [
+        h.dict() for h in expected.hosts.values()
+    ]
+    assert [g.dict() for g in inventory.groups.values()] == [
+        g.dict() for g in expected.groups.values()
+    ]
+    print(
+        f"{count:>8} hosts | render then parse: {yaml_time:8.4f}s | "
+        f"JSONInventory: {json_time:8.4f}s | speedup: {yaml_time / json_time:6.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count)
@@ -0,0 +1,98 @@
+"""
+Benchmark the memory held by a loaded inventory: the stock SimpleInventory
+plugin versus PerfInventory with columnar hosts. Both inventories are loaded
+from the same synthetic YAML files, and the size of every object reachable
+from the loaded inventory is added up, counting shared objects once.
+
+Usage:
+    python benchmarks/bench_memory.py --hosts 10000 100000
+"""
+
+# Import modules
+import argparse
+import gc
+import sys
+import tempfile
+import time
+import types
+from common import write_inventory
+from nornir.plugins.inventory.simple import SimpleInventory
+from nornir_perf import PerfInventory
+
+
+# Classes, modules and functions are shared by every inventory, not held by it
+SHARED = (type, types.ModuleType, types.FunctionType)
+
+
+def deep_size(root):
+    """
+    Add up the size of every object reachable from an object.
+
+    :param root: The object.
+
+    :return size: The size in bytes.
+    """
+    seen = set()
+    size = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, SHARED) or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return size
+
+
+def measure(plugin):
+    """
+    Load an inventory, measuring the memory it holds and the load time.
+
+    :param plugin: The inventory plugin to load the inventory with.
+
+    :return result: A tuple of (bytes, seconds, inventory).
+    """
+    start = time.perf_counter()
+    inventory = plugin.load()
+    elapsed = time.perf_counter() - start
+    return deep_size(inventory), elapsed, inventory
+
+
+def bench(count):
+    """
+    Run the memory benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        host_file, group_file = write_inventory(directory, count)
+        stock_size, stock_time, stock = measure(
+            SimpleInventory(host_file=host_file, group_file=group_file)
+        )
+        columnar_size, columnar_time, columnar = measure(
+            PerfInventory(
+                host_file=host_file,
+                group_file=group_file,
+                snapshot=False,
+                columnar=True,
+            )
+        )
+    # Same hosts and data, or the numbers mean nothing
+    assert list(columnar.hosts) == list(stock.hosts)
+    for name, host in stock.hosts.items():
+        assert columnar.hosts[name].dict() == host.dict()
+    print(
+        f"{count:>8} hosts | stock: {stock_size / 2 ** 20:8.1f}MB "
+        f"({stock_time:6.2f}s) | columnar: {columnar_size / 2 ** 20:8.1f}MB "
+        f"({columnar_time:6.2f}s) | {stock_size / columnar_size:5.1f}x less memory"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count)
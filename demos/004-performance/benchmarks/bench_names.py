@@ -0,0 +1,64 @@
+"""
+Benchmark name field filters: the demo's odd naming convention regex and a
+NameFilter evaluated host by host by stock nornir, versus the same
+NameFilter answered from the NameIndex of an IndexedInventory.
+
+Usage:
+    python benchmarks/bench_names.py --hosts 10000 80000
+"""
+
+# Import modules
+import argparse
+import time
+from common import best_of, odd_device_naming_convention, synthetic_inventory
+from nornir_perf import IndexedInventory, NameFilter, NameIndex
+
+FILTERS = [
+    ("ordinal odd", NameFilter(ordinal__odd=True)),
+    ("ordinal 10-20", NameFilter(ordinal__between=(10, 20))),
+    ("tst ordinal <10", NameFilter(env="tst", ordinal__lt=10)),
+    ("~ordinal odd", ~NameFilter(ordinal__odd=True)),
+]
+
+
+def bench(count):
+    """
+    Run the name filter benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    """
+    stock = synthetic_inventory(count)
+    indexed = IndexedInventory(stock.hosts, stock.groups, stock.defaults)
+    # The first name filter tokenizes every host name
+    start = time.perf_counter()
+    indexed.engine.auxiliary(NameIndex)
+    print(f"{count:>8} hosts | name index built in {time.perf_counter() - start:.4f}s")
+    regex_time, regex = best_of(
+        lambda: stock.filter(filter_func=odd_device_naming_convention)
+    )
+    for label, name_filter in FILTERS:
+        stock_time, expected = best_of(lambda: stock.filter(name_filter))
+        index_time, result = best_of(lambda: list(indexed.filter(name_filter).hosts))
+        # Same hosts, in the same order, or the numbers mean nothing
+        assert result == list(expected.hosts)
+        print(
+            f"{label:>16} | {len(result):>6} matched | "
+            f"stock: {stock_time:8.4f}s | indexed: {index_time:8.4f}s | "
+            f"speedup: {stock_time / index_time:6.1f}x"
+        )
+        if label == "ordinal odd":
+            # The odd ordinals are the hosts the demo's regex matches
+            assert result == list(regex.hosts)
+            print(
+                f"{'odd regex':>16} | {len(regex.hosts):>6} matched | "
+                f"stock: {regex_time:8.4f}s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count)
@@ -0,0 +1,82 @@
+"""
+Benchmark the naming convention filters of the demo: a re.match per filter
+and host, versus tag lookups from a HostnameClassifier. The classifier is
+timed cold (classifying every host name on the first filter) and warm.
+
+Usage:
+    python benchmarks/bench_naming.py --hosts 10000 80000
+"""
+
+# Import modules
+import argparse
+import time
+from common import (
+    best_of,
+    device_name_convention,
+    even_device_naming_convention,
+    non_device_name_convention,
+    odd_device_naming_convention,
+    synthetic_inventory,
+    test_domain_name_convention,
+)
+from nornir_perf import HostnameClassifier
+
+# The demo filter functions, with the tag and polarity which replace them
+FILTERS = [
+    ("odd", odd_device_naming_convention, "odd", True),
+    ("even", even_device_naming_convention, "even", True),
+    ("test domain", test_domain_name_convention, "test_domain", True),
+    ("convention", device_name_convention, "convention", True),
+    ("non convention", non_device_name_convention, "convention", False),
+]
+
+
+def tag_filter(classifier, tag, expected):
+    """
+    Build a filter function which looks up a tag, as the demo does.
+
+    :param classifier: The classifier to look the tags up in.
+    :type classifier: nornir_perf.naming.HostnameClassifier
+    :param tag: The tag to look up.
+    :type tag: string
+    :param expected: Whether hosts with the tag match.
+    :type expected: bool
+
+    :return func: The filter function.
+    """
+    return lambda host: classifier.has_tag(host, tag) is expected
+
+
+def bench(count):
+    """
+    Run the naming filter benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    """
+    inventory = synthetic_inventory(count)
+    classifier = HostnameClassifier()
+    print(f"{count:>8} hosts")
+    for label, func, tag, expected in FILTERS:
+        regex_time, regex_result = best_of(lambda: inventory.filter(filter_func=func))
+        lookup = tag_filter(classifier, tag, expected)
+        # The first filter classifies every host name
+        start = time.perf_counter()
+        inventory.filter(filter_func=lookup)
+        cold_time = time.perf_counter() - start
+        warm_time, result = best_of(lambda: inventory.filter(filter_func=lookup))
+        # Same hosts, in the same order, or the numbers mean nothing
+        assert list(result.hosts) == list(regex_result.hosts)
+        print(
+            f"{label:>16} | {len(result.hosts):>6} matched | "
+            f"re.match: {regex_time:8.4f}s | cold: {cold_time:8.4f}s | "
+            f"warm: {warm_time:8.4f}s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count)
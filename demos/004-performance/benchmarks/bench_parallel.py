@@ -0,0 +1,74 @@
+"""
+Benchmark a CPU heavy filter function (a checksum of every host name, plus
+the naming convention regex): nornir's serial filter_func evaluation versus
+parallel_filter across a process pool.
+
+Usage:
+    python benchmarks/bench_parallel.py --hosts 10000 80000 --processes 4 8
+"""
+
+# Import modules
+import argparse
+import hashlib
+import os
+from common import best_of, device_name_convention, synthetic_inventory
+from nornir_perf import parallel_filter
+
+# Rounds of hashing per host, to make the predicate CPU heavy
+ROUNDS = 200
+
+
+def checksum_convention(host):
+    """
+    Check a host follows the naming convention, and the checksum of its
+    name is even. It's defined at the top level, so it can be pickled.
+
+    :param host: The host you want to check.
+    :type host: nornir.core.inventory.Host
+
+    :return bool: True if it matches, False if it doesn't match
+    """
+    digest = host.name.encode()
+    for _ in range(ROUNDS):
+        digest = hashlib.sha256(digest).digest()
+    return device_name_convention(host) and digest[0] % 2 == 0
+
+
+def bench(count, processes):
+    """
+    Run the parallel filter benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    :param processes: The numbers of worker processes to try.
+    :type processes: list
+    """
+    inventory = synthetic_inventory(count)
+    serial_time, expected = best_of(
+        lambda: inventory.filter(filter_func=checksum_convention), 1
+    )
+    print(f"{count:>8} hosts | serial: {serial_time:8.4f}s")
+    for n in processes:
+        parallel_time, result = best_of(
+            lambda: parallel_filter(
+                inventory, checksum_convention, processes=n, threshold=0
+            ),
+            1,
+        )
+        # Same hosts, in the same order, or the numbers mean nothing
+        assert list(result.hosts) == list(expected.hosts)
+        print(
+            f"{n:>10} processes | parallel: {parallel_time:8.4f}s | "
+            f"speedup: {serial_time / parallel_time:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    parser.add_argument(
+        "--processes", type=int, nargs="+", default=[os.cpu_count() or 1]
+    )
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count, args.processes)
@@ -0,0 +1,64 @@
+"""
+Benchmark the YAML parser backends on a large hosts.yaml: ruamel.yaml's
+safe loader, as SimpleInventory uses it, PyYAML's libyaml loader, and the
+fast parser for the autogenerated motherstarter format.
+
+ruamel.yaml is pure python without ruamel.yaml.clib, so parsing 100000
+hosts with it takes minutes. Leave it out with --parsers fast libyaml.
+
+Usage:
+    python benchmarks/bench_parsers.py --hosts 1000 10000 100000
+"""
+
+# Import modules
+import argparse
+import tempfile
+from common import best_of, write_inventory
+from nornir_perf.loader import PARSERS, load_yaml, parse_fast, parse_libyaml
+from nornir_perf.loader import parse_ruamel
+
+# Backend -> parse function of the file contents
+BACKENDS = {"fast": parse_fast, "libyaml": parse_libyaml, "ruamel": parse_ruamel}
+
+
+def bench(count, parsers, repeat):
+    """
+    Run the parser benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    :param parsers: The backends to time.
+    :type parsers: list
+    :param repeat: The number of runs of every backend.
+    :type repeat: integer
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        host_file, _ = write_inventory(directory, count)
+        with open(host_file, "r", encoding="utf-8") as f:
+            text = f.read()
+        results = {}
+        expected = None
+        for parser in parsers:
+            try:
+                seconds, data = best_of(lambda: BACKENDS[parser](text), repeat)
+            except ImportError:
+                print(f"{count:>8} hosts | {parser}: not available")
+                continue
+            # Same data from every backend, or the numbers mean nothing
+            assert expected is None or data == expected
+            expected = data
+            results[parser] = seconds
+        auto_time, data = best_of(lambda: load_yaml(host_file), repeat)
+        assert expected is None or data == expected
+    timings = " | ".join(f"{p}: {s:8.3f}s" for p, s in results.items())
+    print(f"{count:>8} hosts | {timings} | auto: {auto_time:8.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--parsers", nargs="+", choices=PARSERS, default=list(PARSERS))
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count, args.parsers, args.repeat)
@@ -0,0 +1,88 @@
+"""
+Benchmark compound filters written in an unfortunate order, i.e. the least
+selective clause or a filter function first: stock nornir, which evaluates
+the clauses in the order they were written, versus the cost based planner.
+
+Usage:
+    python benchmarks/bench_planner.py --hosts 10000 80000
+"""
+
+# Import modules
+import argparse
+from common import (
+    CERTIFIED,
+    best_of,
+    device_name_convention,
+    odd_device_naming_convention,
+    synthetic_inventory,
+)
+from nornir.core.filter import AND, F
+from nornir_perf import PlannedInventory
+
+
+def compounds(inventory):
+    """
+    Build the compound filters, in the order a caller might write them.
+
+    :param inventory: The inventory, to pick an existing mgmt_ip from.
+
+    :return filters: A list of filters.
+    """
+    hosts = list(inventory.hosts.values())
+    mgmt_ip = hosts[len(hosts) // 2]["mgmt_ip"]
+    return [
+        # filter_host_dev_type_vendor_mgmt_ip of the demo
+        F(device_type__eq="switch", vendor__eq="juniper", mgmt_ip__eq=mgmt_ip),
+        F(production__eq=True) & F(sla__ge=80) & F(site_code__eq="mel"),
+        F(region__eq="apac")
+        & F(os_version__any=CERTIFIED)
+        & F(site_type__eq="primary"),
+        # The naming convention filter functions, before a cheap F
+        AND(
+            AND(odd_device_naming_convention, device_name_convention),
+            F(site_code__eq="ptl"),
+        ),
+        ~F(device_type__eq="switch")
+        & ~F(device_type__eq="router")
+        & F(vendor__eq="arista"),
+    ]
+
+
+def run(inventory, filters):
+    """
+    Run every compound filter against an inventory.
+
+    :return results: A list of the matching host names of every filter.
+    """
+    return [list(inventory.filter(f).hosts) for f in filters]
+
+
+def bench(count):
+    """
+    Run the planner benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    """
+    stock = synthetic_inventory(count)
+    filters = compounds(stock)
+    analyze_time, planned = best_of(lambda: PlannedInventory(stock), 1)
+    stock_time, expected = best_of(lambda: run(stock, filters))
+    planned_time, result = best_of(lambda: run(planned, filters))
+    # Same hosts, in the same order, or the numbers mean nothing
+    assert result == expected
+    print(
+        f"{count:>8} hosts | {len(filters)} filters | stock: {stock_time:8.4f}s | "
+        f"planned: {planned_time:8.4f}s (analyzed in {analyze_time:.3f}s) | "
+        f"speedup: {stock_time / planned_time:6.1f}x"
+    )
+    # The plan of the first filter, with the estimated and actual rows
+    print(planned.explain(filters[0]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count)
@@ -0,0 +1,59 @@
+"""
+Profile the chained filters of the "Chaining filters together" block of the
+demo, against a stock, an indexed and a cached inventory, and measure what
+profiling costs.
+
+Usage:
+    python benchmarks/bench_profile.py --hosts 10000 80000
+"""
+
+# Import modules
+import argparse
+from common import best_of, chain, synthetic_inventory
+from nornir_perf import CachedInventory, FilterProfile, IndexedInventory
+
+
+def profiled(inventory, allocations=False):
+    """
+    Run the chained filters within a FilterProfile.
+
+    :return profile: The FilterProfile.
+    """
+    with FilterProfile(allocations=allocations) as profile:
+        chain(inventory)
+    return profile
+
+
+def bench(count):
+    """
+    Run the profiling benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    """
+    stock = synthetic_inventory(count)
+    indexed = IndexedInventory(stock.hosts, stock.groups, stock.defaults)
+    cached = CachedInventory(
+        IndexedInventory(stock.hosts, stock.groups, stock.defaults)
+    )
+    # Fill the cache, so the profile shows the filters answered by it
+    chain(cached)
+    for name, inventory in [("stock", stock), ("indexed", indexed), ("cached", cached)]:
+        plain_time, _ = best_of(lambda: chain(inventory))
+        profiled_time, profile = best_of(lambda: profiled(inventory))
+        # The same chain, tracing allocations, which is much slower
+        traced_time, traced = best_of(lambda: profiled(inventory, True), 1)
+        print(
+            f"{count:>8} hosts | {name:<7} | plain: {plain_time:8.4f}s | "
+            f"profiled: {profiled_time:8.4f}s | allocations: {traced_time:8.4f}s | "
+            f"overhead: {profiled_time / plain_time:5.2f}x"
+        )
+        print(traced)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count)
@@ -0,0 +1,90 @@
+"""
+Benchmark picking up an edit of a few hosts: loading the whole inventory
+again, with its index, versus an InventoryWatcher applying the changed
+hosts in place.
+
+A poll still parses the whole hosts file which changed, so the apply time,
+of the changes of already parsed data, is shown on its own as well.
+
+Usage:
+    python benchmarks/bench_reload.py --hosts 10000 50000 --changes 1 100
+"""
+
+# Import modules
+import argparse
+import os
+import tempfile
+import time
+from common import best_of, render_hosts_yaml, synthetic_hosts, write_inventory
+from nornir.core import Nornir
+from nornir.core.filter import F
+from nornir_perf import InventoryWatcher, PerfInventory
+
+# The filters run before every reload, so the cache holds their results
+FILTERS = [
+    F(site_code="mel"),
+    F(vendor="cisco"),
+    F(device_type="switch"),
+    F(groups__contains="prod"),
+    F(sla__ge=80),
+]
+
+
+def bench(count, changes):
+    """
+    Run the reload benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    :param changes: The numbers of changed hosts to time.
+    :type changes: list
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        host_file, group_file = write_inventory(directory, count)
+        plugin = PerfInventory(
+            host_file=host_file,
+            group_file=group_file,
+            snapshot=False,
+            index=True,
+            cache=True,
+        )
+        load_time, inventory = best_of(plugin.load, 1)
+        nr = Nornir(inventory=inventory)
+        watcher = InventoryWatcher(nr, plugin)
+        hosts = synthetic_hosts(count)
+        names = list(hosts)
+        timings = []
+        for n, changed in enumerate(changes):
+            for name in names[:changed]:
+                hosts[name]["data"]["os_version"] = f"99.{n}.0"
+            for filter_obj in FILTERS:
+                nr.filter(filter_obj)
+            with open(host_file, "w", encoding="utf-8") as f:
+                f.write(render_hosts_yaml(hosts))
+            # Don't rely on the resolution of the file system clock
+            stat = os.stat(host_file)
+            os.utime(host_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            start = time.perf_counter()
+            result = watcher.poll()
+            poll_time = time.perf_counter() - start
+            assert len(result.updated_hosts) == changed
+            # The same changes again, from already parsed data
+            data = dict(watcher.data, hosts=plugin.parse_hosts())
+            for name in names[:changed]:
+                data["hosts"][name]["data"]["os_version"] = f"98.{n}.0"
+            apply_time, _ = best_of(lambda: watcher.apply(data), 1)
+            watcher.data = data
+            timings.append(
+                f"{changed} changed: poll {poll_time:8.3f}s, apply {apply_time:8.3f}s, "
+                f"{len(nr.inventory.cache)} cached"
+            )
+    print(f"{count:>8} hosts | full load: {load_time:8.3f}s | " + " | ".join(timings))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--changes", type=int, nargs="+", default=[1, 100])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count, args.changes)
@@ -0,0 +1,90 @@
+"""
+Benchmark loading an inventory split into one hosts file per site: a single
+hosts.yaml versus the shards parsed serially and across a process pool.
+
+The shards are parsed in parallel, but merged and built into hosts in the
+main process, so the speedup is bounded by the share of the load time spent
+parsing, and by the number of CPUs.
+
+Usage:
+    python benchmarks/bench_shards.py --hosts 10000 50000 --processes 1 2 4
+"""
+
+# Import modules
+import argparse
+import os
+import tempfile
+from common import best_of, render_hosts_yaml, synthetic_hosts, write_shards
+from nornir_perf import PerfInventory, ShardedInventory
+from nornir_perf.loader import PARSERS
+
+
+def bench(count, processes, parser):
+    """
+    Run the sharded load benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    :param processes: The numbers of worker processes to time.
+    :type processes: list
+    :param parser: The YAML parser backend.
+    :type parser: string
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        shards, group_file = write_shards(os.path.join(directory, "hosts"), count)
+        # The same hosts, in shard order, as a single file
+        host_file = os.path.join(directory, "hosts.yaml")
+        hosts = synthetic_hosts(count)
+        sites = sorted({host["data"]["site_code"] for host in hosts.values()})
+        with open(host_file, "w", encoding="utf-8") as f:
+            f.write(
+                render_hosts_yaml(
+                    {
+                        name: host
+                        for site in sites
+                        for name, host in hosts.items()
+                        if host["data"]["site_code"] == site
+                    }
+                )
+            )
+        single_time, expected = best_of(
+            lambda: PerfInventory(
+                host_file=host_file,
+                group_file=group_file,
+                snapshot=False,
+                parser=parser,
+            ).load(),
+            1,
+        )
+        timings = []
+        for n in processes:
+            seconds, inventory = best_of(
+                lambda: ShardedInventory(
+                    host_file=shards,
+                    group_file=group_file,
+                    snapshot=False,
+                    parser=parser,
+                    processes=n,
+                ).load(),
+                1,
+            )
+            # Same hosts, in the same order, or the numbers mean nothing
+            assert list(inventory.hosts) == list(expected.hosts)
+            timings.append(f"{n} processes: {seconds:8.3f}s")
+    print(
+        f"{count:>8} hosts, {len(sites)} shards | single file: {single_time:8.3f}s | "
+        + " | ".join(timings)
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    parser.add_argument(
+        "--processes", type=int, nargs="+", default=[1, os.cpu_count() or 1]
+    )
+    parser.add_argument("--parser", choices=("auto",) + PARSERS, default="auto")
+    args = parser.parse_args()
+    print(f"{os.cpu_count()} CPUs")
+    for count in args.hosts:
+        bench(count, args.processes, args.parser)
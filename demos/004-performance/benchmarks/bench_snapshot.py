@@ -0,0 +1,54 @@
+"""
+Benchmark inventory startup time: stock SimpleInventory versus the
+PerfInventory snapshot cache, on a cold start and on a warm start.
+
+Usage:
+    python benchmarks/bench_snapshot.py --hosts 1000 10000 80000
+"""
+
+# Import modules
+import argparse
+import os
+import tempfile
+from common import best_of, write_inventory
+from nornir.plugins.inventory.simple import SimpleInventory
+from nornir_perf import PerfInventory
+
+
+def bench(count):
+    """
+    Run the startup benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        host_file, group_file = write_inventory(tmp, count)
+        plugin = PerfInventory(host_file=host_file, group_file=group_file)
+
+        def cold():
+            # Remove the snapshot, so every run parses YAML and writes it again
+            if os.path.exists(plugin.snapshot_file):
+                os.remove(plugin.snapshot_file)
+            return plugin.load()
+
+        stock_time, stock = best_of(
+            SimpleInventory(host_file=host_file, group_file=group_file).load, 1
+        )
+        cold_time, _ = best_of(cold, 1)
+        warm_time, warm = best_of(plugin.load)
+        # Both inventories must be identical, or the numbers mean nothing
+        assert warm.dict() == stock.dict()
+        print(
+            f"{count:>8} hosts | stock: {stock_time:8.3f}s | "
+            f"cold: {cold_time:8.3f}s | warm: {warm_time:8.3f}s | "
+            f"speedup: {stock_time / warm_time:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count)
@@ -0,0 +1,95 @@
+"""
+Benchmark loading a large hosts.yaml: parsing the whole file before building
+the hosts, versus the streaming loader, which builds every host as soon as
+it is parsed, with and without a filter applied during the load.
+
+Usage:
+    python benchmarks/bench_stream.py --hosts 10000 50000
+"""
+
+# Import modules
+import argparse
+import tempfile
+import time
+import tracemalloc
+from common import best_of, write_inventory
+from nornir.core.filter import F
+from nornir_perf import PerfInventory
+from nornir_perf.loader import iter_entries
+from nornir_perf.plugin import read_yaml
+
+# The filter applied during the load
+SITE_FILTER = F(site_code__eq="mel") & F(production__eq=True)
+
+
+def allocated(func):
+    """
+    Measure the peak memory allocated while running a function.
+
+    :param func: The function to measure, called without arguments.
+    :type func: callable
+
+    :return result: A tuple of (peak bytes allocated, return value).
+    """
+    tracemalloc.start()
+    value = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, value
+
+
+def first_host(host_file):
+    """
+    Time how long the streaming loader takes to parse the first host.
+
+    :return seconds: The time to the first host.
+    """
+    start = time.perf_counter()
+    next(iter_entries(host_file))
+    return time.perf_counter() - start
+
+
+def bench(count):
+    """
+    Run the streaming loader benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        host_file, group_file = write_inventory(directory, count)
+
+        def load(**options):
+            return PerfInventory(
+                host_file=host_file, group_file=group_file, snapshot=False, **options
+            ).load()
+
+        whole_time, expected = best_of(load, 1)
+        stream_time, inventory = best_of(lambda: load(stream=True), 1)
+        filter_time, filtered = best_of(
+            lambda: load(stream=True, filter=SITE_FILTER), 1
+        )
+        parse_time, _ = best_of(lambda: read_yaml(host_file), 1)
+        first_time = first_host(host_file)
+        whole_peak, _ = allocated(load)
+        stream_peak, _ = allocated(lambda: load(stream=True))
+        filter_peak, _ = allocated(lambda: load(stream=True, filter=SITE_FILTER))
+    # Same hosts, in the same order, or the numbers mean nothing
+    assert list(inventory.hosts) == list(expected.hosts)
+    assert list(filtered.hosts) == list(expected.filter(SITE_FILTER).hosts)
+    mib = 1024 * 1024
+    print(
+        f"{count:>8} hosts | whole file: {whole_time:8.3f}s {whole_peak / mib:7.1f}MiB | "
+        f"streamed: {stream_time:8.3f}s {stream_peak / mib:7.1f}MiB | "
+        f"streamed with a filter: {filter_time:8.3f}s {filter_peak / mib:7.1f}MiB "
+        f"({len(filtered.hosts)} hosts) | first host: {parse_time:.3f}s whole, "
+        f"{first_time * 1000:.2f}ms streamed"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count)
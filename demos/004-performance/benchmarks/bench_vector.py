@@ -0,0 +1,82 @@
+"""
+Benchmark a compliance sweep, dozens of F filters like the ones of the
+003-advanced demo, over one inventory: stock nornir, which calls the filter
+for every host, versus bitmap evaluation over the AttributeIndex and NumPy
+masks over the VectorIndex.
+
+Usage:
+    python benchmarks/bench_vector.py --hosts 10000 80000
+"""
+
+# Import modules
+import argparse
+from common import CERTIFIED, PLATFORMS, SITES, best_of, synthetic_inventory
+from nornir.core.filter import F
+from nornir_perf import IndexedInventory, VectorInventory
+
+
+def sweep():
+    """
+    Build the filters of the compliance sweep.
+
+    :return filters: A list of F filters.
+    """
+    filters = [F(site_code__eq=site) for site in SITES]
+    filters += [F(platform__eq=p) & F(os_version__any=CERTIFIED) for p, *_ in PLATFORMS]
+    filters += [~F(platform__eq=p) & F(sla__ge=80) for p, *_ in PLATFORMS]
+    filters += [F(sla__lt=sla) | F(region__eq="emea") for sla in (70, 80, 90)]
+    filters += [
+        F(region__eq="apac"),
+        F(hemisphere__eq="southern") & ~F(production__eq=True),
+        F(site_type__any=["tertiary", "secondary"]),
+        ~F(os_version__any=CERTIFIED),
+        ~F(device_type__eq="switch") & ~F(device_type__eq="router"),
+        F(vendor__eq="cisco", device_type__eq="switch"),
+        F(site_code__eq="ptl") | F(site_code__eq="chc"),
+    ]
+    return filters
+
+
+def run(inventory, filters):
+    """
+    Run every filter of the sweep against an inventory.
+
+    :return results: A list of the matching host names of every filter.
+    """
+    return [list(inventory.filter(f).hosts) for f in filters]
+
+
+def bench(count):
+    """
+    Run the sweep benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    """
+    stock = synthetic_inventory(count)
+    filters = sweep()
+    index_build, indexed = best_of(
+        lambda: IndexedInventory(stock.hosts, stock.groups, stock.defaults), 1
+    )
+    vector_build, vectorized = best_of(
+        lambda: VectorInventory(stock.hosts, stock.groups, stock.defaults), 1
+    )
+    stock_time, expected = best_of(lambda: run(stock, filters))
+    index_time, index_result = best_of(lambda: run(indexed, filters))
+    vector_time, result = best_of(lambda: run(vectorized, filters))
+    # Same hosts, in the same order, or the numbers mean nothing
+    assert result == expected and index_result == expected
+    print(
+        f"{count:>8} hosts | {len(filters)} filters | stock: {stock_time:8.4f}s | "
+        f"bitmap: {index_time:8.4f}s (built in {index_build:.3f}s) | "
+        f"numpy: {vector_time:8.4f}s (built in {vector_build:.3f}s) | "
+        f"speedup: {stock_time / vector_time:6.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count)
@@ -0,0 +1,90 @@
+"""
+Benchmark version range filters on os_version: a filter_func parsing the
+version of every host, versus a VersionFilter evaluated host by host with
+cached parsing, and answered from the VersionIndex of an IndexedInventory.
+
+Usage:
+    python benchmarks/bench_version.py --hosts 10000 80000
+"""
+
+# Import modules
+import argparse
+import time
+from common import best_of, synthetic_inventory
+from nornir_perf import IndexedInventory, VersionFilter, VersionIndex, version_key
+
+# Certified OS version of each platform of the synthetic inventory
+BASELINE = {
+    "ios": "16.6.4",
+    "nxos": "9.3(6)",
+    "junos": "18.4R2-S5",
+    "eos": "4.23.2F",
+    "paloalto_panos": "10.0.3",
+}
+
+FILTERS = [
+    ("below baseline", "lt", BASELINE),
+    ("at least baseline", "ge", BASELINE),
+    ("older than 16.6.4", "lt", {"ios": "16.6.4"}),
+]
+
+
+def parsing_filter(operator, baseline):
+    """
+    Build a filter function which parses the version of every host it
+    evaluates, without any caching.
+
+    :param operator: lt or ge.
+    :type operator: string
+    :param baseline: A dict of platform to version.
+    :type baseline: dict
+
+    :return func: The filter function.
+    """
+    parse = version_key.__wrapped__
+
+    def func(host):
+        if host.platform not in baseline:
+            return False
+        key, target = parse(host["os_version"]), parse(baseline[host.platform])
+        return key < target if operator == "lt" else key >= target
+
+    return func
+
+
+def bench(count):
+    """
+    Run the version filter benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    """
+    stock = synthetic_inventory(count)
+    indexed = IndexedInventory(stock.hosts, stock.groups, stock.defaults)
+    # The first VersionFilter parses the version of every host
+    start = time.perf_counter()
+    indexed.engine.auxiliary(VersionIndex, "os_version")
+    print(
+        f"{count:>8} hosts | version index built in {time.perf_counter() - start:.4f}s"
+    )
+    for label, operator, baseline in FILTERS:
+        func = parsing_filter(operator, baseline)
+        parse_time, expected = best_of(lambda: stock.filter(filter_func=func))
+        version_filter = VersionFilter(**{f"os_version__{operator}": baseline})
+        cached_time, cached = best_of(lambda: stock.filter(version_filter))
+        index_time, result = best_of(lambda: list(indexed.filter(version_filter).hosts))
+        # Same hosts, in the same order, or the numbers mean nothing
+        assert result == list(expected.hosts) == list(cached.hosts)
+        print(
+            f"{label:>18} | {len(result):>6} matched | "
+            f"parsing: {parse_time:8.4f}s | cached: {cached_time:8.4f}s | "
+            f"indexed: {index_time:8.4f}s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count)
@@ -0,0 +1,59 @@
+"""
+Benchmark the "Chaining filters together" block of the demo: stock nornir,
+which builds a new Inventory per filter, versus zero-copy InventoryViews.
+
+Usage:
+    python benchmarks/bench_views.py --hosts 10000 80000
+"""
+
+# Import modules
+import argparse
+import tracemalloc
+from common import best_of, chain, synthetic_inventory
+from nornir_perf import IndexedInventory
+
+
+def allocated(func):
+    """
+    Measure the peak memory allocated while running a function.
+
+    :param func: The function to measure, called without arguments.
+    :type func: callable
+
+    :return size: The peak number of bytes allocated.
+    """
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def bench(count):
+    """
+    Run the chained filter benchmark for an inventory of a given size.
+
+    :param count: The number of hosts in the synthetic inventory.
+    :type count: integer
+    """
+    stock = synthetic_inventory(count)
+    indexed = IndexedInventory(stock.hosts, stock.groups, stock.defaults)
+    stock_time, expected = best_of(lambda: chain(stock))
+    view_time, result = best_of(lambda: chain(indexed))
+    # Same hosts, in the same order, or the numbers mean nothing
+    assert list(result.hosts) == list(expected.hosts)
+    stock_bytes = allocated(lambda: chain(stock))
+    view_bytes = allocated(lambda: chain(indexed))
+    print(
+        f"{count:>8} hosts | {len(result.hosts):>6} matched | "
+        f"stock: {stock_time:8.4f}s {stock_bytes / 1024:10.1f}KiB | "
+        f"views: {view_time:8.4f}s {view_bytes / 1024:10.1f}KiB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000])
+    args = parser.parse_args()
+    for count in args.hosts:
+        bench(count)
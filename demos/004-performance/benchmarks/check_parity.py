@@ -0,0 +1,887 @@
+"""
+Equivalence checks: every filter is evaluated by stock nornir and by the
+nornir_perf engine against the 003-advanced inventory, and both must return
+exactly the same hosts, in the same order.
+
+Usage:
+    python benchmarks/check_parity.py
+"""
+
+# Import modules
+import glob
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import warnings
+from common import dirname, device_name_convention, odd_device_naming_convention
+from common import render_hosts_yaml
+from nornir.core import Nornir
+from nornir.core.filter import AND, F
+from nornir.core.inventory import Host, Hosts, Inventory
+from nornir_perf.flat import BASE_ATTRIBUTES
+from nornir_perf.loader import PARSERS, load_yaml, parse_ruamel
+from nornir_perf.vector import numpy
+from nornir_perf import (
+    FilterProfile,
+    IndexedFilter,
+    IndexedInventory,
+    InventoryView,
+    InventoryWatcher,
+    IPFilter,
+    JSONInventory,
+    NameFilter,
+    PerfInventory,
+    Query,
+    ShardedInventory,
+    VectorInventory,
+    VersionFilter,
+    batch_filter,
+    compile_filter,
+    longest_prefix,
+    parallel_filter,
+)
+
+# Certified OS version of each platform of the 003-advanced inventory
+BASELINE = {
+    "paloalto_panos": "10.0.3",
+    "ios": "16.6.4",
+    "eos": "4.23.2F",
+    "nxos": "9.3(6)",
+    "nxos_ssh": "9.3(6)",
+    "junos": "18.4R2-S5",
+}
+
+# Path to the 003-advanced inventory, which the checks run against
+advanced_dir = os.path.join(
+    dirname, "../../003-advanced/motherstarter/outputs/nr/inventory"
+)
+# Path to the JSON inputs the 003-advanced inventory is rendered from
+inputs_dir = os.path.join(dirname, "../../003-advanced/inputs")
+
+
+def leaves():
+    """
+    Build the single F filters which the compound filters are made of.
+
+    :return leaves: A list of F objects and filter functions.
+    """
+    return [
+        F(site_code__eq="mel"),
+        F(site_code__eq="ptl"),
+        F(device_type__eq="switch"),
+        F(device_type__eq="router"),
+        F(hemisphere__eq="southern"),
+        F(region__eq="apac"),
+        F(platform__eq="ios"),
+        F(sla__ge=80),
+        F(sla__lt=90),
+        F(production__eq=True),
+        F(site_type__any=["tertiary", "secondary"]),
+        F(os_version__any=["10.0.3", "16.6.4", "4.23.2F", "9.3(6)", "18.4R2-S5"]),
+        F(groups__contains="lab"),
+        F(name__contains="arista"),
+        F(vendor="cisco"),
+        F(missing__eq="value"),
+        F(vendor__eq="cisco", device_type__eq="switch"),
+        NameFilter(ordinal__odd=True),
+        NameFilter(ordinal__between=(10, 20)),
+        NameFilter(env="tst", family__any=["arista", "csr"]),
+        NameFilter(prefix__eq="lab", ordinal__lt=3),
+        IPFilter(mgmt_ip="10.0.0.23"),
+        IPFilter(mgmt_ip__subnet="10.0.0.16/28"),
+        IPFilter(mgmt_ip__subnet="::/0"),
+        VersionFilter(os_version__lt="16.6.4"),
+        VersionFilter(os_version__lt=BASELINE),
+        VersionFilter(os_version__ge={"junos": "15.1R7", "eos": "4.22"}),
+        VersionFilter(os_version="9.3(6)"),
+    ]
+
+
+def expressions():
+    """
+    Build every filter to check: the demo filters, plus NOT, AND and OR
+    combinations of the leaves.
+
+    :return expressions: A list of (args, kwargs) as passed to filter().
+    """
+    single = leaves()
+    checks = [((), {"vendor": "arista"}), ((), {"platform": "ios"})]
+    checks += [((), {"device_type": "switch", "vendor": "juniper"})]
+    checks += [((), {"filter_func": odd_device_naming_convention})]
+    checks += [((leaf,), {}) for leaf in single]
+    negatable = [leaf for leaf in single if isinstance(leaf, (F, IndexedFilter))]
+    checks += [((~leaf,), {}) for leaf in negatable]
+    for a, b in itertools.combinations(negatable, 2):
+        checks += [((a & b,), {}), ((a | b,), {}), ((~a & ~b,), {})]
+        checks += [((~a | b,), {}), (((a | b) & ~a,), {})]
+        checks += [((a & odd_device_naming_convention,), {})]
+        checks += [((a | odd_device_naming_convention,), {})]
+    return checks
+
+
+def check(nr_inventory):
+    """
+    Compare stock nornir filtering with the indexed inventory.
+
+    :param nr_inventory: An IndexedInventory over the 003-advanced inventory.
+    :type nr_inventory: nornir_perf.inventory.IndexedInventory
+
+    :return failures: The number of filters with a different result.
+    """
+    stock = Inventory(nr_inventory.hosts, nr_inventory.groups, nr_inventory.defaults)
+    failures = 0
+    checks = expressions()
+    for args, kwargs in checks:
+        expected = list(stock.filter(*args, **kwargs).hosts)
+        result = list(nr_inventory.filter(*args, **kwargs).hosts)
+        # Chained filters must agree as well
+        chained = list(nr_inventory.filter(F(sla__ge=80)).filter(*args, **kwargs).hosts)
+        expected_chain = list(stock.filter(F(sla__ge=80)).filter(*args, **kwargs).hosts)
+        # And so must fused queries, with and without the index
+        queried = [
+            list(Query(inv).filter(*args, **kwargs).filter(F(sla__ge=80)).hosts)
+            for inv in (nr_inventory, stock)
+        ]
+        if (
+            result != expected
+            or chained != expected_chain
+            or queried != [expected_chain, expected_chain]
+        ):
+            failures += 1
+            print(f"MISMATCH: {args} {kwargs}")
+    # The longest prefix must be the same, with and without the index
+    scopes = [nr_inventory, nr_inventory.filter(F(sla__ge=80))]
+    addresses = ["10.0.0.23", "10.0.0.100", "10.0.1.1", "192.168.1.1", "::1"]
+    for address, scoped in itertools.product(addresses, scopes):
+        stock_scoped = Inventory(scoped.hosts, stock.groups, stock.defaults)
+        if longest_prefix(scoped, address) != longest_prefix(stock_scoped, address):
+            failures += 1
+            print(f"MISMATCH: longest_prefix {address}")
+    # And so must the hosts of every group
+    for group, scoped in itertools.product(stock.groups, scopes):
+        stock_scoped = Inventory(scoped.hosts, stock.groups, stock.defaults)
+        for g in (group, stock.groups[group]):
+            if scoped.children_of_group(g) != stock_scoped.children_of_group(g):
+                failures += 1
+                print(f"MISMATCH: children_of_group {g}")
+    total = len(checks) + len(addresses) * len(scopes)
+    total += len(stock.groups) * len(scopes) * 2
+    print(f"{total - failures}/{total} checks returned the same results")
+    return failures
+
+
+def check_hosts(nr_inventory, other_inventory, label):
+    """
+    Compare filtering and inherited lookups of the same inventory, built
+    with other host types, with stock nornir.
+
+    :param nr_inventory: The 003-advanced inventory.
+    :type nr_inventory: nornir.core.inventory.Inventory
+    :param other_inventory: The same inventory, i.e. flattened.
+    :type other_inventory: nornir.core.inventory.Inventory
+    :param label: The name of the host type, for the report.
+    :type label: string
+
+    :return failures: The number of checks with a different result.
+    """
+    failures = 0
+    checks = expressions()
+    for args, kwargs in checks:
+        expected = list(nr_inventory.filter(*args, **kwargs).hosts)
+        result = list(other_inventory.filter(*args, **kwargs).hosts)
+        # Chained filters must agree as well
+        expected_chain = nr_inventory.filter(F(sla__ge=80)).filter(*args, **kwargs)
+        chained = other_inventory.filter(F(sla__ge=80)).filter(*args, **kwargs)
+        if result != expected or list(chained.hosts) != list(expected_chain.hosts):
+            failures += 1
+            print(f"MISMATCH: {label} {args} {kwargs}")
+    for name, host in nr_inventory.hosts.items():
+        other = other_inventory.hosts[name]
+        if (
+            host.dict() != other.dict()
+            or host.extended_data() != other.extended_data()
+            or any(getattr(host, a) != getattr(other, a) for a in BASE_ATTRIBUTES)
+        ):
+            failures += 1
+            print(f"MISMATCH: {label} host {name}")
+    total = len(checks) + len(nr_inventory.hosts)
+    print(f"{total - failures}/{total} {label} checks returned the same results")
+    return failures
+
+
+def check_reindexed_views():
+    """
+    Check views filtered before their base inventory was reindexed keep the
+    hosts they held, and filter them against the new index.
+
+    :return failures: The number of views with different hosts.
+    """
+    failures = 0
+    indexed = PerfInventory(
+        host_file=os.path.join(advanced_dir, "hosts.yaml"),
+        group_file=os.path.join(advanced_dir, "groups.yaml"),
+        snapshot=False,
+        index=True,
+    ).load()
+    checks = leaves() + [~leaf for leaf in leaves() if isinstance(leaf, F)]
+    views = [indexed.filter(filter_obj) for filter_obj in checks]
+    expected = [list(view.hosts) for view in views]
+    # Removing the first host gives every other host a new id
+    removed = next(iter(indexed.hosts))
+    indexed.remove_host(removed)
+    indexed.reindex()
+    for filter_obj, view, names in zip(checks, views, expected):
+        names = [n for n in names if n != removed]
+        stock = Inventory(Hosts({n: indexed.hosts[n] for n in names}))
+        chained = list(view.filter(F(sla__ge=80)).hosts)
+        if (
+            list(view.hosts) != names
+            or len(view) != len(names)
+            or chained != list(stock.filter(F(sla__ge=80)).hosts)
+        ):
+            failures += 1
+            print(f"MISMATCH: reindexed view {filter_obj}")
+    print(
+        f"{len(checks) - failures}/{len(checks)} reindexed views returned the same hosts"
+    )
+    return failures
+
+
+def check_replaced_hosts(nr_inventory, inventory_class, label):
+    """
+    Check an indexed inventory whose host was replaced by another Host
+    object, which leaves the host names the same, no longer uses its index.
+
+    :param nr_inventory: The 003-advanced inventory.
+    :type nr_inventory: nornir.core.inventory.Inventory
+    :param inventory_class: The indexed inventory class, i.e. VectorInventory.
+    :type inventory_class: type
+    :param label: The name of the inventory, for the report.
+    :type label: string
+
+    :return failures: The number of filters with different hosts.
+    """
+    failures = 0
+    inventory = inventory_class(
+        Hosts(nr_inventory.hosts), nr_inventory.groups, nr_inventory.defaults
+    )
+    hosts = inventory.hosts
+    # The first host takes the attributes of the last one
+    first, last = next(iter(hosts)), hosts[list(hosts)[-1]]
+    hosts[first] = Host(
+        name=first,
+        hostname=last.hostname,
+        platform=last.platform,
+        data=dict(last.data),
+        groups=last.groups,
+        defaults=last.defaults,
+    )
+    stock = Inventory(Hosts(hosts), nr_inventory.groups, nr_inventory.defaults)
+    checks = leaves()
+    for filter_obj in checks:
+        expected = list(stock.filter(filter_obj).hosts)
+        if list(inventory.filter(filter_obj).hosts) != expected:
+            failures += 1
+            print(f"MISMATCH: replaced {label} host {filter_obj}")
+    print(
+        f"{len(checks) - failures}/{len(checks)} filters of replaced {label} hosts "
+        "returned the same hosts"
+    )
+    return failures
+
+
+def check_stream(nr_inventory):
+    """
+    Compare filtering the hosts while they're loaded with filtering the
+    loaded inventory.
+
+    :param nr_inventory: The 003-advanced inventory.
+    :type nr_inventory: nornir.core.inventory.Inventory
+
+    :return failures: The number of checks with a different result.
+    """
+    failures = 0
+    # Every load parses the files again, so only the single filters
+    checks = leaves() + [~leaf for leaf in leaves() if isinstance(leaf, F)]
+    for filter_obj in checks:
+        expected = list(nr_inventory.filter(filter_obj).hosts)
+        loaded = PerfInventory(
+            host_file=os.path.join(advanced_dir, "hosts.yaml"),
+            group_file=os.path.join(advanced_dir, "groups.yaml"),
+            stream=True,
+            filter=filter_obj,
+        ).load()
+        if list(loaded.hosts) != expected:
+            failures += 1
+            print(f"MISMATCH: filtered load {filter_obj}")
+    print(
+        f"{len(checks) - failures}/{len(checks)} filtered load checks returned the "
+        "same results"
+    )
+    return failures
+
+
+def check_parsers():
+    """
+    Compare the YAML parser backends with ruamel.yaml, on the inventory files
+    of every demo.
+
+    :return failures: The number of files parsed to different data.
+    """
+    failures = 0
+    files = sorted(
+        glob.glob(
+            os.path.join(dirname, "../../*/motherstarter/outputs/nr/inventory/*.yaml")
+        )
+    )
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            expected = parse_ruamel(f.read()) or {}
+        for parser in ("auto",) + PARSERS:
+            if load_yaml(path, parser=parser) != expected:
+                failures += 1
+                print(f"MISMATCH: {parser} parser {path}")
+    total = len(files) * (len(PARSERS) + 1)
+    print(f"{total - failures}/{total} parser checks returned the same data")
+    return failures
+
+
+def split_hosts(host_file, directory, count):
+    """
+    Split a hosts file into shards of consecutive hosts, so the merged shards
+    keep the order of the hosts file.
+
+    :param host_file: The path of the hosts file.
+    :type host_file: string
+    :param directory: The directory to write the shards to.
+    :type directory: string
+    :param count: The number of shards.
+    :type count: integer
+
+    :return paths: The paths of the shards, in order.
+    """
+    with open(host_file, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    # Every unindented line, besides the header, starts a host
+    starts = [n for n, line in enumerate(lines) if line[:1] not in ("", " ", "#", "-")]
+    step = -(-len(starts) // count)
+    paths = []
+    for shard, first in enumerate(range(0, len(starts), step)):
+        start = starts[first]
+        stop = starts[first + step] if first + step < len(starts) else len(lines)
+        paths.append(os.path.join(directory, f"hosts_{shard:02d}.yaml"))
+        with open(paths[-1], "w", encoding="utf-8") as f:
+            f.write("\n".join(lines[start:stop]) + "\n")
+    return paths
+
+
+def check_shards(nr_inventory):
+    """
+    Compare the 003-advanced inventory, split into host shards, with stock
+    nornir, and check hosts defined in two shards are refused.
+
+    :param nr_inventory: The 003-advanced inventory.
+    :type nr_inventory: nornir.core.inventory.Inventory
+
+    :return failures: The number of checks with a different result.
+    """
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        paths = split_hosts(os.path.join(advanced_dir, "hosts.yaml"), directory, 4)
+        for stream in (False, True):
+            sharded_inventory = ShardedInventory(
+                host_file=directory,
+                group_file=os.path.join(advanced_dir, "groups.yaml"),
+                snapshot=False,
+                processes=2,
+                stream=stream,
+            ).load()
+            label = "streamed shards" if stream else "shards"
+            failures += check_hosts(nr_inventory, sharded_inventory, label)
+        # A host of the first shard, defined again in another one
+        shutil.copyfile(paths[0], os.path.join(directory, "hosts_99.yaml"))
+        for stream in (False, True):
+            try:
+                ShardedInventory(
+                    host_file=os.path.join(directory, "hosts_*.yaml"),
+                    group_file=os.path.join(advanced_dir, "groups.yaml"),
+                    snapshot=False,
+                    processes=2,
+                    stream=stream,
+                ).load()
+            except ValueError as e:
+                print(f"Duplicate hosts refused: {e}")
+            else:
+                failures += 1
+                print("MISMATCH: duplicate hosts across shards weren't refused")
+    return failures
+
+
+def edit_inventory(directory, step):
+    """
+    Edit a copy of the 003-advanced inventory files, as a user would.
+
+    :param directory: The directory of the copy.
+    :type directory: string
+    :param step: 0 to add, remove and change hosts, 1 to change groups.
+    :type step: integer
+    """
+    host_file = os.path.join(directory, "hosts.yaml")
+    group_file = os.path.join(directory, "groups.yaml")
+    if step == 0:
+        hosts = load_yaml(host_file)
+        names = list(hosts)
+        del hosts[names[0]]
+        hosts[names[1]]["data"]["os_version"] = "99.9.9"
+        hosts[names[2]]["groups"][1] = "prod"
+        hosts[names[3]]["data"]["owner"] = "netops"
+        added = dict(hosts[names[-1]], hostname="new-r001.lab.dfjt.local")
+        added["groups"] = added["groups"][:2] + ["new"]
+        hosts["new-r001.lab.dfjt.local"] = added
+        with open(host_file, "w", encoding="utf-8") as f:
+            f.write(render_hosts_yaml(hosts))
+        path = host_file
+    else:
+        with open(group_file, "r", encoding="utf-8") as f:
+            text = f.read()
+        with open(group_file, "w", encoding="utf-8") as f:
+            f.write(text.replace("sla: 90", "sla: 75"))
+        path = group_file
+    # Don't rely on the resolution of the file system clock
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9 * (step + 1)))
+
+
+def check_kept_views(views, kept, expected, label):
+    """
+    Check views filtered before a reload keep the hosts they held, less the
+    removed ones, and filter them against the reloaded index.
+
+    :param views: The views.
+    :type views: list
+    :param kept: The host names of every view, before the reload.
+    :type kept: list
+    :param expected: The edited inventory, loaded again.
+    :type expected: nornir.core.inventory.Inventory
+    :param label: The name of the variant, for the report.
+    :type label: string
+
+    :return failures: The number of views with different hosts.
+    """
+    failures = 0
+    for view, names in zip(views, kept):
+        stock = Inventory(
+            Hosts({n: expected.hosts[n] for n in names if n in expected.hosts})
+        )
+        chained = list(view.filter(F(sla__ge=80)).hosts)
+        if (
+            list(view.hosts) != list(stock.hosts)
+            or len(view.hosts) != len(stock.hosts)
+            or len(view) != len(stock.hosts)
+            or chained != list(stock.filter(F(sla__ge=80)).hosts)
+        ):
+            failures += 1
+            print(f"MISMATCH: {label} kept view")
+    if views:
+        print(
+            f"{len(views) - failures}/{len(views)} {label} kept views returned the same hosts"
+        )
+    return failures
+
+
+def check_reload():
+    """
+    Compare inventories reloaded in place by an InventoryWatcher, after the
+    inventory files were edited, with the same inventory loaded again.
+
+    :return failures: The number of checks with a different result.
+    """
+    failures = 0
+    variants = [
+        {"index": True},
+        {"index": True, "cache": True},
+        {"plan": True, "cache": True},
+        {"flatten": True, "index": True},
+        {"columnar": True},
+        {"index": True, "filter": F(sla__ge=80)},
+    ]
+    if numpy is not None:
+        variants.append({"vectorize": True})
+    for options in variants:
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ("hosts.yaml", "groups.yaml"):
+                shutil.copyfile(
+                    os.path.join(advanced_dir, name), os.path.join(directory, name)
+                )
+            with open(os.path.join(directory, "groups.yaml"), "a") as f:
+                f.write("new:\n    data:\n        site_type: lab\n")
+            plugin = PerfInventory(
+                host_file=os.path.join(directory, "hosts.yaml"),
+                group_file=os.path.join(directory, "groups.yaml"),
+                **options,
+            )
+            nr = Nornir(inventory=plugin.load())
+            watcher = InventoryWatcher(nr, plugin)
+            label = "reloaded " + ", ".join(sorted(options))
+            for step in (0, 1):
+                # Filter first, so cached results and views are there
+                results = [nr.inventory.filter(*a, **k) for a, k in expressions()]
+                views = [r for r in results if isinstance(r, InventoryView)]
+                kept = [list(view.hosts) for view in views]
+                edit_inventory(directory, step)
+                if watcher.poll() is None:
+                    failures += 1
+                    print(f"MISMATCH: {label} edit {step} wasn't seen")
+                expected = PerfInventory(
+                    host_file=os.path.join(directory, "hosts.yaml"),
+                    group_file=os.path.join(directory, "groups.yaml"),
+                    snapshot=False,
+                    filter=options.get("filter"),
+                ).load()
+                if set(nr.inventory.hosts) != set(expected.hosts):
+                    failures += 1
+                    print(f"MISMATCH: {label} hosts after edit {step}")
+                    continue
+                # Hosts which only match the filter now are added at the end
+                expected.hosts = Hosts(
+                    {name: expected.hosts[name] for name in nr.inventory.hosts}
+                )
+                failures += check_hosts(expected, nr.inventory, f"{label} ({step})")
+                failures += check_kept_views(views, kept, expected, f"{label} ({step})")
+            # The snapshot was refreshed with the edits
+            if plugin.load_data() != watcher.data:
+                failures += 1
+                print(f"MISMATCH: {label} snapshot")
+    return failures
+
+
+def check_parallel(nr_inventory):
+    """
+    Compare parallel_filter, forced to use a process pool, with nornir's
+    own filter_func evaluation.
+
+    :param nr_inventory: The 003-advanced inventory.
+    :type nr_inventory: nornir.core.inventory.Inventory
+
+    :return failures: The number of filters with a different result.
+    """
+    failures = 0
+    checks = leaves() + [~leaf for leaf in leaves()]
+    checks += [odd_device_naming_convention, device_name_convention]
+    for func in checks:
+        expected = list(nr_inventory.filter(filter_func=func).hosts)
+        result = parallel_filter(nr_inventory, func, processes=2, threshold=0)
+        if list(result.hosts) != expected:
+            failures += 1
+            print(f"MISMATCH: parallel {func}")
+    print(
+        f"{len(checks) - failures}/{len(checks)} parallel checks returned the same results"
+    )
+    return failures
+
+
+def check_batch(nr_inventory):
+    """
+    Compare every filter evaluated in one batch, over the stock inventory and
+    the indexed inventory, with nornir evaluating them one by one.
+
+    :param nr_inventory: An IndexedInventory over the 003-advanced inventory.
+    :type nr_inventory: nornir_perf.inventory.IndexedInventory
+
+    :return failures: The number of filters with a different result.
+    """
+    stock = Inventory(nr_inventory.hosts, nr_inventory.groups, nr_inventory.defaults)
+    filters = {}
+    for i, (args, kwargs) in enumerate(expressions()):
+        filters[i] = args[0] if args else kwargs.get("filter_func", kwargs)
+    failures = 0
+    results = [batch_filter(inv, filters) for inv in (stock, nr_inventory)]
+    for name, filter_obj in filters.items():
+        if isinstance(filter_obj, dict):
+            expected = list(stock.filter(**filter_obj).hosts)
+        else:
+            expected = list(stock.filter(filter_obj).hosts)
+        if any(list(result[name].hosts) != expected for result in results):
+            failures += 1
+            print(f"MISMATCH: batch {filter_obj}")
+    print(
+        f"{len(filters) - failures}/{len(filters)} batch checks returned the same results"
+    )
+    return failures
+
+
+def check_cache(nr_inventory, cached_inventory):
+    """
+    Compare every filter, evaluated twice through the result cache, with
+    stock nornir, then check changing the hosts throws the results away.
+
+    :param nr_inventory: The 003-advanced inventory.
+    :type nr_inventory: nornir.core.inventory.Inventory
+    :param cached_inventory: The same inventory, with the result cache.
+    :type cached_inventory: nornir_perf.cache.CachedInventory
+
+    :return failures: The number of checks with a different result.
+    """
+    failures = 0
+    checks = expressions()
+    for args, kwargs in checks:
+        expected = list(nr_inventory.filter(*args, **kwargs).hosts)
+        # The first call fills the cache, the second one hits it
+        results = [list(cached_inventory.filter(*args, **kwargs).hosts) for _ in "ab"]
+        if results != [expected, expected]:
+            failures += 1
+            print(f"MISMATCH: cache {args} {kwargs}")
+    # Removing and adding back a host must be seen by the next filter, even
+    # though F(sla__ge=80) is already cached
+    expected = list(nr_inventory.filter(F(sla__ge=80)).hosts)
+    name = expected[0]
+    host = cached_inventory.hosts[name]
+    cached_inventory.remove_host(name)
+    removed = list(cached_inventory.filter(F(sla__ge=80)).hosts)
+    cached_inventory.add_host(host)
+    added = list(cached_inventory.filter(F(sla__ge=80)).hosts)
+    if removed != expected[1:] or sorted(added) != sorted(expected):
+        failures += 1
+        print(f"MISMATCH: cache invalidation {name}")
+    total = len(checks) + 1
+    print(f"{total - failures}/{total} cache checks returned the same results")
+    return failures
+
+
+def check_cached_group_edits():
+    """
+    Check changing the data of a group or the defaults, or the parent
+    groups of a group, in place throws the cached results away.
+
+    :return failures: The number of edits whose filter returned different
+    hosts.
+    """
+    failures = 0
+    inventories = [
+        PerfInventory(
+            host_file=os.path.join(advanced_dir, "hosts.yaml"),
+            group_file=os.path.join(advanced_dir, "groups.yaml"),
+            snapshot=False,
+            cache=cache,
+        ).load()
+        for cache in (False, True)
+    ]
+    filter_obj = F(region__eq="apac")
+    # Both inventories get the same edits, each one made once the cached
+    # inventory holds the result of the filter
+    edits = [
+        ("group data", lambda i: i.groups["mel"].data.__setitem__("region", "emea")),
+        ("defaults data", lambda i: i.defaults.data.__setitem__("region", "apac")),
+        # The hosts of the test group now inherit the region of mel
+        ("parent groups", lambda i: i.groups["test"].groups.append(i.groups["mel"])),
+    ]
+    for label, edit in edits:
+        inventories[1].filter(filter_obj)
+        for inventory in inventories:
+            edit(inventory)
+        expected, cached = (list(i.filter(filter_obj).hosts) for i in inventories)
+        if cached != expected:
+            failures += 1
+            print(f"MISMATCH: cached {label} edit")
+    print(
+        f"{len(edits) - failures}/{len(edits)} cached group edits returned the same hosts"
+    )
+    return failures
+
+
+def check_profile(nr_inventory, cached_inventory):
+    """
+    Compare every filter, evaluated within a FilterProfile, with the same
+    filter evaluated without, and check every call is recorded once with the
+    hosts it matched.
+
+    :param nr_inventory: The 003-advanced inventory.
+    :type nr_inventory: nornir.core.inventory.Inventory
+    :param cached_inventory: The same inventory, with the result cache.
+    :type cached_inventory: nornir_perf.cache.CachedInventory
+
+    :return failures: The number of checks with a different result.
+    """
+    stock = Inventory(nr_inventory.hosts, nr_inventory.groups, nr_inventory.defaults)
+    original = Inventory.filter
+    failures = 0
+    checks = expressions()
+    inventories = (stock, nr_inventory, cached_inventory)
+    for args, kwargs in checks:
+        expected = [list(i.filter(*args, **kwargs).hosts) for i in inventories]
+        with FilterProfile(allocations=True) as profile:
+            results = [list(i.filter(*args, **kwargs).hosts) for i in inventories]
+        matched = [record.matched for record in profile.records]
+        if results != expected or matched != [len(hosts) for hosts in expected]:
+            failures += 1
+            print(f"MISMATCH: profile {args} {kwargs}")
+    # The filter methods are only instrumented within the block
+    if Inventory.filter is not original:
+        failures += 1
+        print("MISMATCH: profile left Inventory.filter instrumented")
+    total = len(checks) + 1
+    print(f"{total - failures}/{total} profile checks returned the same results")
+    return failures
+
+
+def ios_only(host):
+    """
+    A filter function which is only valid for ios hosts, guarded by a
+    platform rule before it.
+
+    :param host: The host to check.
+    :type host: nornir.core.inventory.Host
+
+    :return bool: True if the host has an SLA of at least 80.
+    """
+    if host.platform != "ios":
+        raise ValueError(f"{host} isn't an ios host")
+    return host.get("sla") >= 80
+
+
+def check_codegen(nr_inventory):
+    """
+    Compare every F expression, compiled into a function, with stock nornir.
+
+    :param nr_inventory: The 003-advanced inventory.
+    :type nr_inventory: nornir.core.inventory.Inventory
+
+    :return failures: The number of checks with a different result.
+    """
+    stock = Inventory(nr_inventory.hosts, nr_inventory.groups, nr_inventory.defaults)
+    failures = 0
+    checks = [args[0] for args, kwargs in expressions() if args and not kwargs]
+    for filter_obj in checks:
+        expected = list(stock.filter(filter_obj).hosts)
+        result = list(stock.filter(filter_func=compile_filter(filter_obj)).hosts)
+        if result != expected:
+            failures += 1
+            print(f"MISMATCH: compiled {filter_obj}")
+    # A guard must stay first once the same operands were compiled in the
+    # other order, where the guarded operand would fail on every other host
+    guards = [
+        (F(site_code__contains=1), F(sla__eq=999)),
+        (ios_only, F(platform="ios")),
+    ]
+    for guarded, guard in guards:
+        compile_filter(AND(guarded, guard))
+        predicate = compile_filter(AND(guard, guarded))
+        expected = list(stock.filter(AND(guard, guarded)).hosts)
+        try:
+            result = list(stock.filter(filter_func=predicate).hosts)
+        except (TypeError, ValueError):
+            result = None
+        if result != expected or repr(predicate.filter_obj) != repr(
+            AND(guard, guarded)
+        ):
+            failures += 1
+            print(f"MISMATCH: compiled guard {guard}")
+    total = len(checks) + len(guards)
+    print(f"{total - failures}/{total} compiled checks returned the same results")
+    return failures
+
+
+def check_planner(nr_inventory, planned_inventory):
+    """
+    Compare filtering through the planner with stock nornir, and check the
+    actual rows explain() shows for every plan.
+
+    :param nr_inventory: The 003-advanced inventory.
+    :type nr_inventory: nornir.core.inventory.Inventory
+    :param planned_inventory: The same inventory, with the planner.
+    :type planned_inventory: nornir_perf.planner.PlannedInventory
+
+    :return failures: The number of checks with a different result.
+    """
+    failures = 0
+    checks = [args[0] for args, _ in expressions() if args]
+    for filter_obj in checks:
+        expected = len(nr_inventory.filter(filter_obj).hosts)
+        if planned_inventory.explain(filter_obj).rows[0].actual != expected:
+            failures += 1
+            print(f"MISMATCH: explain {filter_obj}")
+    print(
+        f"{len(checks) - failures}/{len(checks)} explain checks returned the same results"
+    )
+    return failures + check_hosts(nr_inventory, planned_inventory, "planned")
+
+
+if __name__ == "__main__":
+    # nornir itself compares values of different types, which python warns about
+    warnings.simplefilter("ignore", DeprecationWarning)
+    inventory = PerfInventory(
+        host_file=os.path.join(advanced_dir, "hosts.yaml"),
+        group_file=os.path.join(advanced_dir, "groups.yaml"),
+        snapshot=False,
+        index=True,
+        parser="ruamel",
+    ).load()
+    failures = check(inventory)
+    failures += check_reindexed_views()
+    failures += check_replaced_hosts(inventory, IndexedInventory, "indexed")
+    failures += check_parsers()
+    for parser in ("fast", "libyaml"):
+        parsed_inventory = PerfInventory(
+            host_file=os.path.join(advanced_dir, "hosts.yaml"),
+            group_file=os.path.join(advanced_dir, "groups.yaml"),
+            snapshot=False,
+            parser=parser,
+        ).load()
+        failures += check_hosts(inventory, parsed_inventory, f"{parser} parser")
+    for option in ("flatten", "columnar"):
+        other_inventory = PerfInventory(
+            host_file=os.path.join(advanced_dir, "hosts.yaml"),
+            group_file=os.path.join(advanced_dir, "groups.yaml"),
+            snapshot=False,
+            **{option: True},
+        ).load()
+        failures += check_hosts(inventory, other_inventory, option)
+    # The same inventory, built straight from the JSON inputs it's rendered from
+    json_inventory = JSONInventory(
+        host_file=os.path.join(inputs_dir, "inventory.json"),
+        group_file=os.path.join(inputs_dir, "groups.json"),
+        snapshot=False,
+    ).load()
+    failures += check_hosts(inventory, json_inventory, "inputs")
+    # The same inventory, parsed one host at a time
+    stream_inventory = PerfInventory(
+        host_file=os.path.join(advanced_dir, "hosts.yaml"),
+        group_file=os.path.join(advanced_dir, "groups.yaml"),
+        stream=True,
+    ).load()
+    failures += check_hosts(inventory, stream_inventory, "streamed")
+    failures += check_stream(inventory)
+    failures += check_shards(inventory)
+    failures += check_parallel(inventory)
+    failures += check_batch(inventory)
+    failures += check_codegen(inventory)
+    cached_inventory = PerfInventory(
+        host_file=os.path.join(advanced_dir, "hosts.yaml"),
+        group_file=os.path.join(advanced_dir, "groups.yaml"),
+        snapshot=False,
+        index=True,
+        cache=True,
+    ).load()
+    failures += check_cache(inventory, cached_inventory)
+    failures += check_cached_group_edits()
+    failures += check_profile(inventory, cached_inventory)
+    planned_inventory = PerfInventory(
+        host_file=os.path.join(advanced_dir, "hosts.yaml"),
+        group_file=os.path.join(advanced_dir, "groups.yaml"),
+        snapshot=False,
+        plan=True,
+    ).load()
+    failures += check_planner(inventory, planned_inventory)
+    failures += check_reload()
+    # The vectorized engine is only checked when numpy is installed
+    if numpy is None:
+        print("numpy isn't installed, skipping the vectorized checks")
+    else:
+        vector_inventory = VectorInventory(
+            inventory.hosts, inventory.groups, inventory.defaults
+        )
+        failures += check_hosts(inventory, vector_inventory, "vectorized")
+        failures += check_replaced_hosts(inventory, VectorInventory, "vector")
+    sys.exit(1 if failures else 0)
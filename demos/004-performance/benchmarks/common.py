@@ -0,0 +1,252 @@
+"""
+Shared helpers for the benchmarks: synthetic inventory generation and timing.
+
+The generated hosts follow the same structure as the demo inventory, so
+every filter used in the demo also works against them.
+"""
+
+# Import modules
+import os
+import random
+import re
+import shutil
+import sys
+import time
+from nornir.core.filter import F
+
+# Get path of the current dir under which the file is executed
+dirname = os.path.dirname(os.path.abspath(__file__))
+# Path to the demo inventory, whose groups are reused by the benchmarks
+inventory_dir = os.path.join(dirname, "../motherstarter/outputs/nr/inventory")
+# Make the nornir_perf package importable from the benchmark scripts
+sys.path.insert(0, os.path.join(dirname, "../code"))
+
+# Operating system group, vendor, host name family and candidate OS versions
+PLATFORMS = [
+    ("ios", "cisco", "csr", ["16.6.4", "16.6.3", "16.9.1", "15.2.7"]),
+    ("nxos", "cisco", "nxos", ["9.3(6)", "9.3(5)", "7.0(3)I7(8)"]),
+    ("junos", "juniper", "junos", ["18.4R2-S5", "18.4R1", "20.2R3-S1"]),
+    ("eos", "arista", "arista", ["4.23.2F", "4.22.0F", "4.25.4M"]),
+    ("panos", "palo alto", "paloalto", ["10.0.3", "9.1.8", "10.1.0"]),
+]
+DEVICE_TYPES = ["router", "switch", "firewall"]
+ENVIRONMENTS = [("lab", "lab"), ("prod", "prd"), ("test", "tst")]
+SITES = ["mel", "hbt", "chc", "ptl", "mtl", "bcn"]
+# The certified OS versions, from filter_certified_os_version
+CERTIFIED = ["10.0.3", "16.6.4", "4.23.2F", "9.3(6)", "18.4R2-S5"]
+
+
+def synthetic_hosts(count, seed=0):
+    """
+    Generate a synthetic inventory of hosts, in the parsed hosts.yaml format.
+
+    :param count: The number of hosts to generate.
+    :type count: integer
+    :param seed: The random seed, so runs are reproducible.
+    :type seed: integer
+
+    :return hosts: A dict of host name to host data.
+    """
+    rnd = random.Random(seed)
+    hosts = {}
+    for n in range(count):
+        os_group, vendor, family, versions = rnd.choice(PLATFORMS)
+        environment, env_label = rnd.choice(ENVIRONMENTS)
+        site_code = rnd.choice(SITES)
+        # Roughly one in ten hosts doesn't follow the naming convention
+        if n % 10 == 9:
+            name = f"dfjt-r{n:06d}.{env_label}.dfjt.local"
+        else:
+            name = f"lab-{family}{n // 100}-{n % 100:02d}.{env_label}.dfjt.local"
+        hosts[name] = {
+            "hostname": name,
+            "groups": [os_group, environment, site_code],
+            "data": {
+                "mgmt_ip": f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}",
+                "vendor": vendor,
+                "device_type": rnd.choice(DEVICE_TYPES),
+                "os_version": rnd.choice(versions),
+                "site_code": site_code,
+            },
+        }
+    return hosts
+
+
+def render_hosts_yaml(hosts):
+    """
+    Render hosts in the same layout as the motherstarter hosts.j2 template.
+
+    :param hosts: A dict of host name to host data.
+    :type hosts: dict
+
+    :return text: The rendered hosts.yaml contents.
+    """
+    lines = ["---", "# Autogenerated nornir file"]
+    for name, host in hosts.items():
+        lines.append(f"{name}:")
+        lines.append(f"    hostname: {host['hostname']}")
+        lines.append("    groups:")
+        lines.extend(f"        - {g}" for g in host["groups"])
+        lines.append("    data:")
+        lines.extend(f"        {k}: {v}" for k, v in host["data"].items())
+        lines.append("        ")
+    return "\n".join(lines) + "\n"
+
+
+def synthetic_inventory(count, seed=0):
+    """
+    Build a synthetic nornir Inventory in memory, skipping YAML entirely.
+
+    :param count: The number of hosts to generate.
+    :type count: integer
+    :param seed: The random seed, so runs are reproducible.
+    :type seed: integer
+
+    :return inventory: An initialised nornir Inventory.
+    """
+    from nornir_perf.plugin import build_inventory, read_yaml
+
+    groups = read_yaml(os.path.join(inventory_dir, "groups.yaml"))
+    return build_inventory(synthetic_hosts(count, seed), groups)
+
+
+def write_inventory(directory, count, seed=0):
+    """
+    Write a synthetic hosts.yaml, plus a copy of the demo groups.yaml.
+
+    :param directory: The directory to write the inventory files to.
+    :type directory: string
+    :param count: The number of hosts to generate.
+    :type count: integer
+    :param seed: The random seed, so runs are reproducible.
+    :type seed: integer
+
+    :return files: A tuple of (host_file, group_file).
+    """
+    os.makedirs(directory, exist_ok=True)
+    host_file = os.path.join(directory, "hosts.yaml")
+    group_file = os.path.join(directory, "groups.yaml")
+    with open(host_file, "w", encoding="utf-8") as f:
+        f.write(render_hosts_yaml(synthetic_hosts(count, seed)))
+    shutil.copyfile(os.path.join(inventory_dir, "groups.yaml"), group_file)
+    return host_file, group_file
+
+
+def write_shards(directory, count, seed=0):
+    """
+    Write a synthetic inventory split into one hosts file per site, plus a
+    copy of the demo groups.yaml next to the directory of the shards.
+
+    :param directory: The directory to write the host shards to.
+    :type directory: string
+    :param count: The number of hosts to generate.
+    :type count: integer
+    :param seed: The random seed, so runs are reproducible.
+    :type seed: integer
+
+    :return files: A tuple of (shard directory, group_file).
+    """
+    os.makedirs(directory, exist_ok=True)
+    sites = {}
+    for name, host in synthetic_hosts(count, seed).items():
+        sites.setdefault(host["data"]["site_code"], {})[name] = host
+    for site, hosts in sites.items():
+        with open(
+            os.path.join(directory, f"hosts_{site}.yaml"), "w", encoding="utf-8"
+        ) as f:
+            f.write(render_hosts_yaml(hosts))
+    group_file = os.path.join(os.path.dirname(directory), "groups.yaml")
+    shutil.copyfile(os.path.join(inventory_dir, "groups.yaml"), group_file)
+    return directory, group_file
+
+
+def best_of(func, repeat=3):
+    """
+    Time a function call, keeping the fastest of several runs.
+
+    :param func: The function to time, called without arguments.
+    :type func: callable
+    :param repeat: The number of runs.
+    :type repeat: integer
+
+    :return result: A tuple of (seconds, return value of the last run).
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, value
+
+
+def odd_device_naming_convention(host):
+    """
+    Filter function from the demo, matching odd numbered host names.
+
+    :param host: The host you want to filter on
+
+    :return bool: True if it matches, False if it doesn't match
+    """
+    return bool(re.match(r".+\-[0-9][1,3,5,7,9].+", host.name))
+
+
+def even_device_naming_convention(host):
+    """
+    Filter function from the demo, matching even numbered host names.
+
+    :param host: The host you want to filter on
+
+    :return bool: True if it matches, False if it doesn't match
+    """
+    return bool(re.match(r".+\-[0-9][2,4,6,8,0].+", host.name))
+
+
+def test_domain_name_convention(host):
+    """
+    Filter function from the demo, matching the test domain name suffix.
+
+    :param host: The host you want to filter on
+
+    :return bool: True if it matches, False if it doesn't match
+    """
+    return bool(re.match(r".+.tst.dfjt.local$", host.name))
+
+
+def device_name_convention(host):
+    """
+    Filter function from the demo, matching the device naming convention.
+
+    :param host: The host you want to filter on
+
+    :return bool: True if it matches, False if it doesn't match
+    """
+    return bool(re.match(r"\w{3}\-\w+\-\d{2}.\w{3}.dfjt.local", host.name))
+
+
+def non_device_name_convention(host):
+    """
+    Filter function from the demo, matching hosts outside the device naming
+    convention.
+
+    :param host: The host you want to filter on
+
+    :return bool: True if does not match, False if it matches the convention
+    """
+    return not device_name_convention(host)
+
+
+def chain(inventory):
+    """
+    Run the five chained filters from the "Chaining filters together" block
+    of the demo, one filter() call at a time.
+
+    :param inventory: The inventory (or Query) to filter.
+
+    :return inventory: The result of the last filter.
+    """
+    odd_devices = inventory.filter(filter_func=odd_device_naming_convention)
+    compliant = odd_devices.filter(filter_func=device_name_convention)
+    apac = compliant.filter(F(region__eq="apac"))
+    secondary = apac.filter(F(site_type__any=["tertiary", "secondary"]))
+    return secondary.filter(F(os_version__any=CERTIFIED))
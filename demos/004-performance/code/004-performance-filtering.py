@@ -0,0 +1,1322 @@
+"""
+This script is used to explain how Nornir filtering performs on
+large inventories and how the nornir_perf extensions speed it up
+"""
+
+# Import modules
+from nornir import InitNornir
+import os
+import json
+from colorama import Fore, init
+from nornir.core.filter import F
+
+# Importing nornir_perf registers the PerfInventory, JSONInventory and
+# ShardedInventory plugins
+from nornir_perf import HostnameClassifier, IPFilter, VersionFilter
+
+
+# Auto-reset colorama colours back after each print statement
+init(autoreset=True)
+
+# Get path of the current dir under which the file is executed
+dirname = os.path.dirname(os.path.abspath(__file__))
+# Compile the host naming rules once, the tags of each host name are cached
+classifier = HostnameClassifier()
+
+
+def get_nr(
+    snapshot=True,
+    index=False,
+    flatten=False,
+    columnar=False,
+    vectorize=False,
+    plan=False,
+    cache=False,
+    inputs=False,
+    stream=False,
+    filter=None,
+    parser="auto",
+    shards=None,
+):
+    """
+    Initialises a Nornir inventory using various configuration files.
+
+    :param snapshot: Whether to use the binary inventory snapshot cache, which
+        skips YAML parsing when the inventory files haven't changed.
+        Default: True
+    :type snapshot: boolean
+    :param index: Whether to build an attribute index, so equality and __any
+        filters are answered by a lookup instead of scanning every host.
+        Default: False
+    :type index: boolean
+    :param flatten: Whether to resolve the data every host inherits from its
+        groups into a lookup table, so inherited lookups don't walk the groups
+        of the host. Default: False
+    :type flatten: boolean
+    :param columnar: Whether to keep the data of every host in shared
+        columns, with the hosts as thin row proxies, to cut the memory used by
+        very large inventories. Default: False
+    :type columnar: boolean
+    :param vectorize: Whether to evaluate filters as NumPy masks, instead of
+        scanning every host. It needs numpy. Default: False
+    :type vectorize: boolean
+    :param plan: Whether to order the clauses of every filter by their
+        estimated cost and selectivity, from statistics collected at load
+        time. Default: False
+    :type plan: boolean
+    :param cache: Whether to memoize filter results, so repeating a filter
+        is a lookup until hosts or groups change. Default: False
+    :type cache: boolean
+    :param inputs: Whether to build the inventory straight from the JSON
+        inputs of motherstarter, instead of the YAML files rendered from them.
+        Default: False
+    :type inputs: boolean
+    :param stream: Whether to parse the hosts one at a time, building every
+        host as soon as it is parsed, to cut the memory used while loading
+        huge inventories. It skips the snapshot. Default: False
+    :type stream: boolean
+    :param filter: A filter the hosts must match to be kept in the inventory,
+        i.e. an F object, applied while the hosts are loaded.
+        Default: every host is kept
+    :type filter: callable
+    :param parser: The YAML parser used when the snapshot can't be used:
+        fast, for the autogenerated motherstarter files, libyaml, which needs
+        PyYAML, or ruamel, as SimpleInventory. auto picks the fastest one
+        which can parse the files. Default: auto
+    :type parser: string
+    :param shards: A directory or glob of host files, i.e. one per site, to
+        load instead of hosts.yaml. The files are parsed in parallel, across
+        a process pool. Default: hosts.yaml
+    :type shards: string
+
+    :return nr: An initialised Nornir inventory for use in other functions.
+    """
+    # Files rendered by motherstarter, the JSON inputs they're rendered from,
+    # or host shards
+    if inputs:
+        plugin = "JSONInventory"
+        host_file = os.path.join(dirname, "../inputs/inventory.json")
+        group_file = os.path.join(dirname, "../inputs/groups.json")
+    elif shards:
+        plugin = "ShardedInventory"
+        host_file = shards
+        group_file = os.path.join(
+            dirname, "../motherstarter/outputs/nr/inventory/groups.yaml"
+        )
+    else:
+        plugin = "PerfInventory"
+        host_file = os.path.join(
+            dirname, "../motherstarter/outputs/nr/inventory/hosts.yaml"
+        )
+        group_file = os.path.join(
+            dirname, "../motherstarter/outputs/nr/inventory/groups.yaml"
+        )
+    # Initialise nornir
+    nr = InitNornir(
+        inventory={
+            "plugin": plugin,
+            "options": {
+                "host_file": host_file,
+                "group_file": group_file,
+                "snapshot": snapshot,
+                "index": index,
+                "flatten": flatten,
+                "columnar": columnar,
+                "vectorize": vectorize,
+                "plan": plan,
+                "cache": cache,
+                "stream": stream,
+                "filter": filter,
+                "parser": parser,
+            },
+        }
+    )
+    return nr
+
+
+def display_inventory(nr):
+    """
+    Basic function to display the entire inventory for this demonstration.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    """
+    # Print seperator line and hosts header
+    print("=" * 50)
+    print("HOSTS IN INVENTORY")
+    # Iterate over hosts in inventory and printout hosts
+    for host in nr.inventory.hosts.keys():
+        print(f"Host: {Fore.CYAN}{host}")
+    print(f"There are {len(nr.inventory.hosts.keys())} hosts in this inventory.")
+    print("=" * 50)
+    # Print seperator line and hosts header
+    print("=" * 50)
+    print("GROUPS IN INVENTORY")
+    # Iterate over hosts in inventory and printout groups
+    for group in nr.inventory.groups.keys():
+        print(f"Group: {Fore.CYAN}{group}")
+    print(f"There are {len(nr.inventory.groups.keys())} groups in this inventory.")
+    print("=" * 50)
+
+
+def display_host_dict(nr, host):
+    """
+    Display entire host dictionary data structure for a given host.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param host: The host you want to filter on.
+    :type host: string
+
+    :return target_host: The targeted nornir host object.
+    """
+    # Filter all the hosts in the inventory, using the host passed in
+    # at the top of the function.
+    target_host = nr.inventory.hosts[host]
+    # Dump the hosts data structure to an indented variable
+    host_dict_data = json.dumps(target_host.dict(), indent=4)
+    # Print seperator
+    print("=" * 50)
+    # Print header and host data structure
+    print("Displaying information for host: " + Fore.CYAN + f"{host}")
+    print(f"{host_dict_data}")
+    # Print seperator
+    print("=" * 50)
+    # Return target host
+    return target_host
+
+
+def display_group_dict(nr, group):
+    """
+    Display entire group dictionary data structure for a given group.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param group: The group you want to filter on.
+    :type group: string
+
+    :return target_group: The targeted nornir group object.
+    """
+    # Filter all the groups in the inventory, using the group passed in
+    # at the top of the function.
+    target_group = nr.inventory.groups[group]
+    # Dump the groups data structure to an indented variable
+    group_dict_data = json.dumps(target_group.dict(), indent=4)
+    # Print seperator
+    print("=" * 50)
+    # Print header and group data structure
+    print("Displaying information for group: " + Fore.CYAN + f"{group}")
+    print(f"{group_dict_data}")
+    # Print seperator
+    print("=" * 50)
+    # Return target group
+    return target_group
+
+
+def filter_host_platform(nr, platform):
+    """
+    Filter the hosts inventory, based on a certain platform.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param platform: The type of platform you want to filter on.
+    :type platform: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on platform
+    target_hosts = nr.filter(platform=platform)
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The hosts which have platform {platform} are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Platform: {Fore.CYAN}{data.platform}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_host_vendor(nr, vendor):
+    """
+    Filter the hosts inventory, based on a certain vendor.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param vendor: The type of vendor you want to filter on.
+    :type vendor: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on vendor
+    target_hosts = nr.filter(vendor=vendor)
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The hosts which have vendor {vendor} are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Vendor: {Fore.CYAN}{data['vendor']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_host_mgmt_ip(nr, mgmt_ip):
+    """
+    Filter the hosts inventory, based on a certain management
+    IP address.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param mgmt_ip: The management IP address to filter on.
+    :type mgmt_ip: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on management IP address
+    target_hosts = nr.filter(mgmt_ip=mgmt_ip)
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The hosts which have the management IP address {mgmt_ip} is:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Management IP: {Fore.CYAN}{data['mgmt_ip']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_host_mgmt_subnet(nr, subnet):
+    """
+    Filter the hosts inventory, based on the subnet their management
+    IP address is in.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param subnet: The subnet to filter on, i.e. 10.0.0.0/22
+    :type subnet: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on management IP subnet
+    target_hosts = nr.filter(IPFilter(mgmt_ip__subnet=subnet))
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The hosts which have a management IP address in {subnet} are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Management IP: {Fore.CYAN}{data['mgmt_ip']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_group_platform(nr, platform):
+    """
+    TODO: This function doesn't work
+    Filter the groups inventory, based on a certain platform.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param platform: The type of platform you want to filter on.
+    :type platform: string
+
+    :return target_groups: The targeted nornir groups after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on platform
+    target_groups = nr.filter(platform=platform)
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The groups which have platform {platform} are:")
+    # Iterate over filtered results and printout information
+    for group, data in target_groups.inventory.groups.items():
+        print(
+            f"Group: {Fore.CYAN}{group} "
+            + Fore.RESET
+            + f"- Platform: {Fore.CYAN}{data.platform}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_groups.inventory.hosts.items())}")
+    # Print seperator
+    print("=" * 50)
+    # Return filtered groups
+    return target_groups
+
+
+def filter_group_vendor(nr, vendor):
+    """
+    TODO: This function doesn't work
+    Filter the groups inventory, based on a certain vendor.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param vendor: The type of vendor you want to filter on.
+    :type vendor: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on vendor
+    target_groups = nr.filter(vendor=vendor)
+    # Print seperator
+    print("=" * 50)
+    print(f"The hosts which have vendor {vendor} are:")
+    # Iterate over filtered results and printout information
+    for group, data in target_groups.inventory.groups.items():
+        print(
+            f"Group: {Fore.CYAN}{group} "
+            + Fore.RESET
+            + f"- Vendor: {Fore.CYAN}{data['vendor']}"
+        )
+    # Print seperator
+    print("=" * 50)
+    # Return filtered groups
+    return target_groups
+
+
+def filter_host_dev_type_vendor(nr, device_type, vendor):
+    """
+    Filter the hosts inventory, based on the following:
+    - device_type AND,
+    - vendor
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param device_type: The device type to filter on.
+    :type device_type: string
+    :param vendor: The vendor to filter on.
+    :type vendor: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on device type AND vendor
+    target_hosts = nr.filter(device_type=device_type, vendor=vendor)
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The hosts with device_type: {device_type} and vendor: {vendor} are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Device Type: {Fore.CYAN}{data['device_type']} "
+            + Fore.RESET
+            + f"- Vendor: {Fore.CYAN}{data['vendor']} "
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_host_dev_type_vendor_mgmt_ip(nr, device_type, vendor, mgmt_ip):
+    """
+    Filter the hosts inventory, based on the following:
+    - device_type AND,
+    - vendor AND,
+    - mgmt_ip
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param device_type: The device type to filter on.
+    :type device_type: string
+    :param vendor: The vendor to filter on.
+    :type vendor: string
+    :param mgmt_ip: The management IP to filter on.
+    :type mgmt_ip: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on device type AND vendor AND mgmt_ip
+    target_hosts = nr.filter(device_type=device_type, vendor=vendor, mgmt_ip=mgmt_ip)
+    # Print seperator and header
+    print("=" * 50)
+    print(
+        f"The host with device_type: {device_type} , vendor: {vendor} and mgmt_ip: {mgmt_ip} is:"
+    )
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Device Type: {Fore.CYAN}{data['device_type']} "
+            + Fore.RESET
+            + f"- Vendor: {Fore.CYAN}{data['vendor']} "
+            + Fore.RESET
+            + f"- Management IP: {Fore.CYAN}{data['mgmt_ip']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_vendor(nr, vendor):
+    """
+    Filter the hosts inventory, based on a certain management
+    IP address.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param vendor: The vendor to filter on.
+    :type vendor: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on vendor
+    target_hosts = nr.filter(vendor=vendor)
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The hosts which with vendor - {vendor} are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Vendor: {Fore.CYAN}{data['vendor']} "
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_dev_type(target_vendor, device_type):
+    """
+    Filter the already filtered inventory, based on device type.
+
+    :param target_vendor: A pre-filtered Nornir inventory, used for processing.
+    :param device_type: The device type to filter on.
+    :type device_type: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on device type
+    target_hosts = target_vendor.filter(device_type=device_type)
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The hosts which with device_type - {device_type} are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Device Type: {Fore.CYAN}{data['device_type']} "
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_hemisphere(nr, hemisphere="southern"):
+    """
+    Filter the hosts inventory, based on hemisphere.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param hemisphere: The hemisphere to filter on.
+        Default: southern
+    :type hemisphere: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on hemisphere
+    target_hosts = nr.filter(F(hemisphere__eq=hemisphere))
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The hosts with {hemisphere} hemisphere are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Hemisphere: {Fore.CYAN}{data['hemisphere']} "
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_eq_site_code(nr, site_code):
+    """
+    Filter the hosts inventory, based on site code.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param site_code: The site code to filter on.
+    :type site_code: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on site code
+    target_hosts = nr.filter(F(site_code__eq=site_code))
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The hosts with site code - {site_code} are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Site Code: {Fore.CYAN}{data['site_code']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_neq_site_code(nr, site_code):
+    """
+    Filter the hosts inventory, based on not equalling a site code.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param site_code: The site code to not filter on.
+    :type site_code: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on devices not equal to the site code
+    target_hosts = nr.filter(~F(site_code__eq=site_code))
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The hosts WITHOUT site code - {site_code} are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Site Code: {Fore.CYAN}{data['site_code']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_or_site_code(nr, site_code_a, site_code_b):
+    """
+    Filter the hosts inventory that equals a site_code_a OR site_code_b.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param site_code_a: The first site code to filter on.
+    :type site_code_a: string
+    :param site_code_b: The second site code to filter on.
+    :type site_code_b: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on site_code_a OR site_code_b
+    target_hosts = nr.filter(
+        F(site_code__eq=site_code_a) | F(site_code__eq=site_code_b)
+    )
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The hosts with site code - {site_code_a} or {site_code_b} are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Site Code: {Fore.CYAN}{data['site_code']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_not_and_dev_type(nr, dev_type_a, dev_type_b):
+    """
+    Filter the hosts inventory that does not equal a dev_type_a AND dev_type_b
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param dev_type_a: The first device type to not filter on.
+    :type dev_type_a: string
+    :param dev_type_b: The second device type to not filter on.
+    :type dev_type_b: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter not equal to on dev_type_a OR dev_type_b
+    target_hosts = nr.filter(
+        ~F(device_type__eq=dev_type_a) & ~F(device_type__eq=dev_type_b)
+    )
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The hosts which are NOT device_type - {dev_type_a} AND {dev_type_b} are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Device Type: {Fore.CYAN}{data['device_type']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_env_devices(nr, environment):
+    """
+    Filter the hosts inventory, which is a children of a certain
+    environment.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param environment: The environment to filter the children of.
+    :type environment: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based hosts being children of a group
+    target_hosts = nr.inventory.children_of_group(environment)
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The hosts which are children of group {environment} are:")
+    # Iterate over filtered results and printout information
+    for host in target_hosts:
+        print(f"Host: {Fore.CYAN}{host}")
+    # Print total and seperator
+    print(f"Total: {len(target_hosts)}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_ge_sla(nr, sla):
+    """
+    Filter the hosts inventory, which greater or equal to a SLA integer
+    value.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param sla: The SLA number to filter on
+    :type sla: integer
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based greater or equal to the SLA integer
+    target_hosts = nr.filter(F(sla__ge=sla))
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The hosts with SLA greater or equal to {sla} are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- SLA: {Fore.CYAN}{data['sla']} "
+            + Fore.RESET
+            + f"- Production: {Fore.CYAN}{data['production']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_certified_os_version(nr, version_list=None):
+    """
+    Filter the entire inventory to find hosts which match
+    a certified version_list.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param version_list: A list of versions which you would like to match on.
+        Default: None
+    :type verstion_list: list
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Specify a list of versions, which are deemed "certified"
+    # across the inventory
+    version_list = [
+        "10.0.3",  # panos certified version
+        "16.6.4",  # ios certified version
+        "4.23.2F",  # eos certified version
+        "9.3(6)",  # nxos certified version
+        "18.4R2-S5",  # junos certified version
+    ]
+    # Execute filter based on hosts matching any of the certified versions
+    target_hosts = nr.filter(F(os_version__any=version_list))
+    # Print seperator and header
+    print("=" * 50)
+    print(f"Certified OS version(s): {version_list}")
+    print("The hosts running a certified OS version are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Platform: {Fore.CYAN}{data.platform} "
+            + Fore.RESET
+            + f"- OS Version: {Fore.CYAN}{data['os_version']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_non_certified_os_version(nr, version_list=None):
+    """
+    Filter the entire inventory to find hosts which do not match
+    a certified version_list.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param version_list: A list of versions which you would like to match on.
+        Default: None
+    :type verstion_list: list
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Specify a list of versions, which are deemed "certified"
+    # across the inventory
+    version_list = [
+        "10.0.3",  # panos certified version
+        "16.6.4",  # ios certified version
+        "4.23.2F",  # eos certified version
+        "9.3(6)",  # nxos certified version
+        "18.4R2-S5",  # junos certified version
+    ]
+    # Execute filter based on hosts NOT matching any of the certified versions
+    target_hosts = nr.filter(~F(os_version__any=version_list))
+    # Print seperator and header
+    print("=" * 50)
+    print(f"Certified OS version(s): {version_list}")
+    print("The hosts NOT running a certified OS version are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Platform: {Fore.CYAN}{data.platform} "
+            + Fore.RESET
+            + f"- OS Version: {Fore.CYAN}{data['os_version']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_below_baseline_os_version(nr, baseline=None):
+    """
+    Filter the entire inventory to find hosts which run an OS version
+    older than the certified version of their platform.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param baseline: A dict of platform to the certified version.
+        Default: None
+    :type baseline: dict
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Specify the version of each platform, which is deemed "certified"
+    baseline = baseline or {
+        "paloalto_panos": "10.0.3",  # panos certified version
+        "ios": "16.6.4",  # ios certified version
+        "eos": "4.23.2F",  # eos certified version
+        "nxos": "9.3(6)",  # nxos certified version
+        "nxos_ssh": "9.3(6)",  # nxos certified version
+        "junos": "18.4R2-S5",  # junos certified version
+    }
+    # Execute filter based on hosts running an older version than the baseline
+    target_hosts = nr.filter(VersionFilter(os_version__lt=baseline))
+    # Print seperator and header
+    print("=" * 50)
+    print(f"Certified OS version baseline: {baseline}")
+    print("The hosts running an OS version older than the baseline are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Platform: {Fore.CYAN}{data.platform} "
+            + Fore.RESET
+            + f"- OS Version: {Fore.CYAN}{data['os_version']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_production_hosts(nr):
+    """
+    Filter the hosts inventory, which match the production
+    attribute.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on hosts being in production
+    target_hosts = nr.filter(F(production__eq=True))
+    # Print seperator and header
+    print("=" * 50)
+    print("The hosts running in Production are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Platform: {Fore.CYAN}{data.platform} "
+            + Fore.RESET
+            + f"- OS Version: {Fore.CYAN}{data['os_version']} "
+            + Fore.RESET
+            + f"- Production?: {Fore.CYAN}{data['production']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_region(nr, region):
+    """
+    Filter the hosts inventory, which match a given region.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param region: The region you want to filter on.
+    :type region: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on hosts in a region
+    target_hosts = nr.filter(F(region__eq=region))
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The hosts in region {region} are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Region: {Fore.CYAN}{data['region']} "
+            + Fore.RESET
+            + f"- Country: {Fore.CYAN}{data['country']} "
+            + Fore.RESET
+            + f"- Full Name: {Fore.CYAN}{data['full_name']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def odd_device_naming_convention(host):
+    """
+    Helper filter function to filter hosts based targeting
+    host names which have odd number names.
+
+    Examples:
+        - lab-junos-01.prd.dfjt.local
+        - lab-arista-11.tst.dfjt.local
+        - lab-nxos-73.lab.dfjt.local
+
+    :param host: The host you want to filter on
+
+    :return bool: True if it matches, False if it doesn't match
+    """
+    # Look up the cached naming tags of the host name and return boolean
+    return classifier.has_tag(host, "odd")
+
+
+def even_device_naming_convention(host):
+    """
+    Helper filter function to filter hosts based targeting
+    host names which have even number names.
+
+    Examples:
+        - lab-junos-08.prd.dfjt.local
+        - lab-arista-22.tst.dfjt.local
+        - lab-nxos-64.lab.dfjt.local
+
+    :param host: The host you want to filter on
+
+    :return bool: True if it matches, False if it doesn't match
+    """
+    # Look up the cached naming tags of the host name and return boolean
+    return classifier.has_tag(host, "even")
+
+
+def test_domain_name_convention(host):
+    """
+    Helper filter function to filter hosts based targeting
+    host names which have the .tst.dfjt.local domain name suffix.
+
+    Examples:
+        - lab-junos-08.tst.dfjt.local
+        - lab-arista-22.tst.dfjt.local
+        - lab-nxos-64.tst.dfjt.local
+
+    :param host: The host you want to filter on
+
+    :return bool: True if it matches, False if it doesn't match
+    """
+    # Look up the cached naming tags of the host name and return boolean
+    return classifier.has_tag(host, "test_domain")
+
+
+def device_name_convention(host):
+    """
+    Helper filter function to filter hosts based targeting
+    host names which a specified naming convention
+
+    Examples:
+        - lab-junos-08.tst.dfjt.local
+        - lab-arista-22.prd.dfjt.local
+        - lab-nxos-01.lab.dfjt.local
+
+    :param host: The host you want to filter on
+
+    :return bool: True if it matches, False if it doesn't match
+    """
+    # Look up the cached naming tags of the host name and return boolean
+    return classifier.has_tag(host, "convention")
+
+
+def non_device_name_convention(host):
+    """
+    Helper filter function to filter hosts based targeting
+    host names which do NOT match a specified naming convention
+
+    Examples:
+        - lab-junos-08.tstt.dfjt.local
+        - dfjt-arista-22.prd.dfjt.local
+        - lab-nxos-001.lab.dfjt.local
+
+    :param host: The host you want to filter on
+
+    :return bool: True if does not match, False if it matches the convention
+    """
+    # Look up the cached naming tags of the host name and return boolean
+    return not classifier.has_tag(host, "convention")
+
+
+def filter_odd_devices(nr):
+    """
+    Filter the hosts inventory, using a filter function to
+    find devices which match what is considered an odd number host.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter which calls a function to detect hosts with an
+    # odd number in their naming convention
+    target_hosts = nr.filter(filter_func=odd_device_naming_convention)
+    # Print seperator and header
+    print("=" * 50)
+    print("The hosts which match the odd naming convention are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Region: {Fore.CYAN}{data['region']} "
+            + Fore.RESET
+            + f"- Country: {Fore.CYAN}{data['country']} "
+            + Fore.RESET
+            + f"- Full Name: {Fore.CYAN}{data['full_name']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_even_devices(nr):
+    """
+    Filter the hosts inventory, using a filter function to
+    find devices which match what is considered an even number host.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter which calls a function to detect hosts with an
+    # even number in their naming convention
+    target_hosts = nr.filter(filter_func=even_device_naming_convention)
+    # Print seperator and header
+    print("=" * 50)
+    print("The hosts which match the even naming convention are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Region: {Fore.CYAN}{data['region']} "
+            + Fore.RESET
+            + f"- Country: {Fore.CYAN}{data['country']} "
+            + Fore.RESET
+            + f"- Full Name: {Fore.CYAN}{data['full_name']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_test_domain_devices(nr):
+    """
+    Filter the hosts inventory, using a filter function to
+    find devices which match what is considered an test domain name
+    suffix host.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter which calls a function to detect hosts with a
+    # test domain-name in their naming convention
+    target_hosts = nr.filter(filter_func=test_domain_name_convention)
+    # Print seperator and header
+    print("=" * 50)
+    print("The hosts which match the test domain-name naming convention are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(f"Host: {Fore.CYAN}{host} ")
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_device_name_convention(nr):
+    """
+    Filter the hosts inventory, using a filter function to
+    find devices which match the device name naming convention.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter which calls a function to detect hosts which
+    # match a pre-defined naming convention
+    target_hosts = nr.filter(filter_func=device_name_convention)
+    # Print seperator and header
+    print("=" * 50)
+    print("The hosts which match the device naming convention are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(f"Host: {Fore.CYAN}{host} ")
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_device_name_non_convention(nr):
+    """
+    Filter the hosts inventory, using a filter function to
+    find devices which does not match the device name naming convention.
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter which calls a function to detect hosts which do not
+    # match a pre-defined naming convention
+    target_hosts = nr.filter(filter_func=non_device_name_convention)
+    # Print seperator and header
+    print("=" * 50)
+    print("The hosts which do NOT match the device naming convention are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(f"Host: {Fore.CYAN}{host} ")
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_site_type(nr, site_type):
+    """
+    Filter the hosts inventory, which match a given site type.
+
+    :param nr: An initialised Nornir inventory, used for processing.
+    :param site_type: The site_type you want to filter on.
+    :type site_type: string
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter based on site type
+    target_hosts = nr.filter(F(site_type__eq=site_type))
+    # Print seperator and header
+    print("=" * 50)
+    print(f"The hosts which match site type {site_type} are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Site Type: {Fore.CYAN}{data['site_type']} "
+            + Fore.RESET
+            + f"- Site Code: {Fore.CYAN}{data['site_code']} "
+            + Fore.RESET
+            + f"- Full Name: {Fore.CYAN}{data['full_name']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+def filter_non_primary_site_type(nr):
+    """
+    Filter the hosts inventory, which match a site types which
+    are not a primary site_type
+
+    :param nr: An initialised Nornir inventory, used for processing.
+
+    :return target_hosts: The targeted nornir hosts after being
+    processed through nornir filtering.
+    """
+    # Execute filter which the site_type of secondary OR tertiary
+    target_hosts = nr.filter(F(site_type__any=["tertiary", "secondary"]))
+    # Print seperator and header
+    print("=" * 50)
+    print("The hosts which are at non-primary site types are:")
+    # Iterate over filtered results and printout information
+    for host, data in target_hosts.inventory.hosts.items():
+        print(
+            f"Host: {Fore.CYAN}{host} "
+            + Fore.RESET
+            + f"- Site Type: {Fore.CYAN}{data['site_type']} "
+            + Fore.RESET
+            + f"- Site Code: {Fore.CYAN}{data['site_code']} "
+            + Fore.RESET
+            + f"- Full Name: {Fore.CYAN}{data['full_name']}"
+        )
+    # Print total and seperator
+    print(f"Total: {len(target_hosts.inventory.hosts.items())}")
+    print("=" * 50)
+    # Return filtered hosts
+    return target_hosts
+
+
+"""
+Diagnostic/display functions
+"""
+# Initialise inventory, with the attribute index enabled
+nr = get_nr(index=True)
+# Display entire inventory
+display_inventory(nr)
+# Display host data structure
+display_host_dict(nr, host="lab-arista-01.lab.dfjt.local")
+# Display group data structure
+display_group_dict(nr, group="ios")
+display_group_dict(nr, group="test")
+display_group_dict(nr, group="ptl")
+"""
+Basic filter functions
+"""
+# filter_host_vendor(nr, vendor="arista")
+# filter_group_vendor(nr, vendor="cisco")
+# filter_host_platform(nr, platform="ios")
+# filter_group_platform(nr, platform="nxos_ssh")
+# filter_host_mgmt_ip(nr, mgmt_ip="10.0.0.1")
+# filter_host_mgmt_subnet(nr, subnet="10.0.0.0/28")
+"""
+Intermediate filter functions
+"""
+# filter_host_dev_type_vendor(nr, device_type="switch", vendor="juniper")
+# filter_host_dev_type_vendor_mgmt_ip(
+#     nr, device_type="switch", vendor="juniper", mgmt_ip="10.0.0.23"
+# )
+# cisco_devices = filter_vendor(nr, vendor="cisco")
+# cisco_routers = filter_dev_type(target_vendor=cisco_devices, device_type="router")
+# cisco_switches = filter_dev_type(target_vendor=cisco_devices, device_type="switch")
+# cisco_firewalls = filter_dev_type(target_vendor=cisco_devices, device_type="firewall")
+"""
+Advanced filter functions
+"""
+filter_hemisphere(nr, hemisphere="northern")
+filter_eq_site_code(nr, site_code="mtl")
+filter_neq_site_code(nr, site_code="mel")
+filter_or_site_code(nr, site_code_a="ptl", site_code_b="chc")
+filter_not_and_dev_type(nr, dev_type_a="switch", dev_type_b="router")
+filter_env_devices(nr, environment="test")
+filter_ge_sla(nr, sla=80)
+filter_certified_os_version(nr)
+non_cert_devs = filter_non_certified_os_version(nr)
+# filter_below_baseline_os_version(nr)
+filter_production_hosts(nr=non_cert_devs)
+apac_devices = filter_region(nr, region="apac")
+filter_odd_devices(nr)
+filter_even_devices(nr)
+filter_test_domain_devices(nr)
+filter_device_name_convention(nr)
+filter_device_name_non_convention(nr)
+filter_site_type(nr, site_type="primary")
+filter_non_primary_site_type(nr)
+"""
+Chaining filters together
+"""
+odd_devices = filter_odd_devices(nr)
+compliant_odd_devices = filter_device_name_convention(nr=odd_devices)
+apac_compliant_odd_devices = filter_region(nr=compliant_odd_devices, region="apac")
+apac_secondary_compliant_odd_devices = filter_non_primary_site_type(
+    nr=apac_compliant_odd_devices
+)
+apac_secondary_compliant_odd_certified_os_devices = filter_certified_os_version(
+    nr=apac_secondary_compliant_odd_devices
+)
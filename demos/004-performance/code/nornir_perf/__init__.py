@@ -0,0 +1,98 @@
+"""
+Performance extensions for nornir inventories and filtering, used by the
+004-performance demo.
+"""
+
+# Import modules
+from nornir.core.plugins.inventory import InventoryPluginRegister
+from nornir_perf.address import IPFilter, IPIndex, longest_prefix
+from nornir_perf.batch import FilterBatch, Selection, batch_filter
+from nornir_perf.bitmap import BitmapEngine, Complement, IndexedFilter
+from nornir_perf.cache import CachedInventory, ResultCache, canonical
+from nornir_perf.codegen import compile_filter
+from nornir_perf.columnar import ColumnHost, ColumnStore
+from nornir_perf.flat import FlatDefaults, FlatGroup, FlatHost
+from nornir_perf.groups import GroupIndex
+from nornir_perf.index import AttributeIndex, RangeIndex
+from nornir_perf.inputs import JSONInventory
+from nornir_perf.inventory import IndexedInventory, InventoryWrapper
+from nornir_perf.loader import iter_entries, load_yaml
+from nornir_perf.naming import (
+    HostnameClassifier,
+    NameFields,
+    NameFilter,
+    NameIndex,
+    tokenize,
+)
+from nornir_perf.parallel import HostProjection, parallel_filter
+from nornir_perf.planner import Plan, PlannedInventory, Planner, Statistics
+from nornir_perf.profile import FilterProfile, FilterRecord
+from nornir_perf.plugin import PerfInventory, build_inventory
+from nornir_perf.query import FusedPredicate, Query
+from nornir_perf.reload import InventoryWatcher
+from nornir_perf.shards import ShardedInventory, shard_files
+from nornir_perf.vector import VectorEngine, VectorIndex, VectorInventory
+from nornir_perf.version import VersionFilter, VersionIndex, version_key
+from nornir_perf.view import HostsView, InventoryView
+
+__all__ = [
+    "AttributeIndex",
+    "BitmapEngine",
+    "CachedInventory",
+    "ColumnHost",
+    "ColumnStore",
+    "Complement",
+    "FilterBatch",
+    "FilterProfile",
+    "FilterRecord",
+    "FlatDefaults",
+    "FlatGroup",
+    "FlatHost",
+    "FusedPredicate",
+    "GroupIndex",
+    "HostProjection",
+    "HostnameClassifier",
+    "HostsView",
+    "IPFilter",
+    "IPIndex",
+    "IndexedFilter",
+    "IndexedInventory",
+    "JSONInventory",
+    "InventoryView",
+    "InventoryWatcher",
+    "InventoryWrapper",
+    "NameFields",
+    "NameFilter",
+    "NameIndex",
+    "PerfInventory",
+    "Plan",
+    "PlannedInventory",
+    "Planner",
+    "Query",
+    "RangeIndex",
+    "ResultCache",
+    "Selection",
+    "ShardedInventory",
+    "Statistics",
+    "VectorEngine",
+    "VectorIndex",
+    "VectorInventory",
+    "VersionFilter",
+    "VersionIndex",
+    "batch_filter",
+    "build_inventory",
+    "canonical",
+    "compile_filter",
+    "iter_entries",
+    "load_yaml",
+    "longest_prefix",
+    "parallel_filter",
+    "shard_files",
+    "tokenize",
+    "version_key",
+]
+
+# Register the inventory plugins, so InitNornir can reference them by name
+InventoryPluginRegister.register("PerfInventory", PerfInventory)
+InventoryPluginRegister.register("JSONInventory", JSONInventory)
+InventoryPluginRegister.register("ShardedInventory", ShardedInventory)
@@ -0,0 +1,258 @@
+"""
+CIDR aware filtering of IP addresses, i.e. the mgmt_ip of the hosts.
+
+Nornir can only compare mgmt_ip as a string, so finding every host in a
+subnet means parsing the address of every host. The IPIndex parses every
+address once, and keeps the distinct addresses of each IP version as sorted
+integers. That is a flattened binary prefix trie: the addresses under any
+trie node (a prefix) are a contiguous slice of the sorted addresses, so a
+subnet query is two bisects plus the size of the result, and the addresses
+sharing the longest prefix with any address are its sorted neighbours.
+"""
+
+# Import modules
+import ipaddress
+from array import array
+from bisect import bisect_left, bisect_right
+from nornir_perf.bitmap import IndexedFilter, bitmap_from_ids
+
+# IPFilter operators: the same address, or an address within a subnet
+IP_OPERATORS = ("eq", "subnet")
+
+
+def host_address(host, attr="mgmt_ip"):
+    """
+    Parse the IP address of a host. Interface notation, i.e. 10.0.0.1/24,
+    gives the address of the interface.
+
+    :param host: The nornir host.
+    :type host: nornir.core.inventory.Host
+    :param attr: The attribute holding the address.
+    :type attr: string
+
+    :return address: An IPv4Address or IPv6Address, or None if the host
+    hasn't got a valid address.
+    """
+    value = host.get(attr)
+    if not isinstance(value, str):
+        return None
+    try:
+        if "/" in value:
+            return ipaddress.ip_interface(value).ip
+        return ipaddress.ip_address(value)
+    except ValueError:
+        return None
+
+
+def common_prefix(address, other):
+    """
+    Work out the length of the prefix two addresses share.
+
+    :param address: An IP address.
+    :type address: ipaddress.IPv4Address or ipaddress.IPv6Address
+    :param other: The other address, as an integer of the same IP version.
+    :type other: integer
+
+    :return length: The number of leading bits both addresses share.
+    """
+    return address.max_prefixlen - (int(address) ^ other).bit_length()
+
+
+class IPIndex:
+    def __init__(self, engine, attr="mgmt_ip"):
+        """
+        Index the IP addresses of every host of an inventory.
+
+        :param engine: The engine of the inventory, see
+            BitmapEngine.auxiliary.
+        :type engine: nornir_perf.bitmap.BitmapEngine
+        :param attr: The attribute holding the addresses.
+        :type attr: string
+        """
+        self.attr = attr
+        self.size = engine.index.size
+        # (version, address as integer) -> array of host ids
+        self.postings = {}
+        for i, host in enumerate(engine.hosts):
+            address = host_address(host, attr)
+            if address is not None:
+                key = (address.version, int(address))
+                self.postings.setdefault(key, array("l")).append(i)
+        # version -> sorted distinct addresses, as integers
+        self.keys = {4: [], 6: []}
+        for version, value in self.postings:
+            self.keys[version].append(value)
+        for keys in self.keys.values():
+            keys.sort()
+
+    def _range(self, version, low, high):
+        """
+        Find the hosts with an address between two addresses, inclusive.
+
+        :param version: The IP version.
+        :type version: integer
+        :param low: The lowest address, as an integer.
+        :type low: integer
+        :param high: The highest address, as an integer.
+        :type high: integer
+
+        :return bitmap: The bitmap of matching hosts.
+        """
+        keys = self.keys[version]
+        start, stop = bisect_left(keys, low), bisect_right(keys, high)
+        selected = keys[start:stop]
+        ids = [i for key in selected for i in self.postings[(version, key)]]
+        return bitmap_from_ids(ids, self.size)
+
+    def lookup(self, operator, target):
+        """
+        Find the hosts matching an IPFilter rule.
+
+        :param operator: One of IP_OPERATORS.
+        :type operator: string
+        :param target: The parsed target of the rule.
+        :type target: ipaddress address or network
+
+        :return bitmap: The bitmap of matching hosts.
+        """
+        if operator == "eq":
+            return self._range(target.version, int(target), int(target))
+        if operator == "subnet":
+            low, high = target.network_address, target.broadcast_address
+            return self._range(target.version, int(low), int(high))
+        raise ValueError(f"Unsupported IP operator: {operator}")
+
+    def _nearest(self, version, start, step, scope):
+        """
+        Walk the sorted addresses from a position, to the first address held
+        by a host in scope.
+
+        :return key: The address as an integer, or None if there is none.
+        """
+        keys = self.keys[version]
+        while 0 <= start < len(keys):
+            key = keys[start]
+            if any(scope >> i & 1 for i in self.postings[(version, key)]):
+                return key
+            start += step
+        return None
+
+    def longest_prefix(self, address, scope):
+        """
+        Find the most specific subnet which holds an address and the address
+        of at least one host in scope.
+
+        :param address: The IP address.
+        :type address: ipaddress.IPv4Address or ipaddress.IPv6Address
+        :param scope: The bitmap of hosts in scope.
+        :type scope: integer
+
+        :return network: The subnet, or None if no host in scope has an
+        address of the same IP version.
+        """
+        position = bisect_left(self.keys[address.version], int(address))
+        # The addresses sharing the longest prefix with the address are its
+        # neighbours in sorted order, on one side or the other
+        lengths = []
+        for start, step in ((position - 1, -1), (position, 1)):
+            key = self._nearest(address.version, start, step, scope)
+            if key is not None:
+                lengths.append(common_prefix(address, key))
+        if not lengths:
+            return None
+        return ipaddress.ip_network((int(address), max(lengths)), strict=False)
+
+
+def match_address(address, operator, target):
+    """
+    Evaluate an IPFilter rule against the address of a host.
+
+    :param address: The address of the host, or None if it hasn't got one.
+    :param operator: One of IP_OPERATORS.
+    :type operator: string
+    :param target: The parsed target of the rule.
+
+    :return bool: True if the address matches the rule.
+    """
+    if address is None:
+        return False
+    if operator == "eq":
+        return address == target
+    if operator == "subnet":
+        return address in target
+    raise ValueError(f"Unsupported IP operator: {operator}")
+
+
+class IPFilter(IndexedFilter):
+    def __init__(self, **kwargs):
+        """
+        Filter hosts on an IP address attribute, with the same keyword
+        syntax as nornir's F. The hosts must match every rule.
+
+        Examples:
+            - IPFilter(mgmt_ip="10.0.0.1")
+            - IPFilter(mgmt_ip__subnet="10.0.0.0/22")
+
+        Operators: eq (the default), the same address, and subnet, an
+        address within the subnet. Hosts without a valid address never match.
+
+        :param kwargs: The rules, as attribute__operator=target.
+        """
+        self.filters = kwargs
+        self.rules = []
+        for key, target in kwargs.items():
+            attr, _, operator = key.partition("__")
+            operator = operator or "eq"
+            if operator == "eq":
+                target = ipaddress.ip_address(target)
+            elif operator == "subnet":
+                target = ipaddress.ip_network(target, strict=False)
+            else:
+                raise ValueError(f"Unsupported IP operator: {operator}")
+            self.rules.append((attr, operator, target))
+
+    def __call__(self, host):
+        return all(
+            match_address(host_address(host, attr), operator, target)
+            for attr, operator, target in self.rules
+        )
+
+    def select(self, engine, scope):
+        for attr, operator, target in self.rules:
+            scope &= engine.auxiliary(IPIndex, attr).lookup(operator, target)
+        return scope
+
+    def __repr__(self):
+        return f"<IPFilter ({self.filters})>"
+
+
+def longest_prefix(nr, address, attr="mgmt_ip"):
+    """
+    Find the most specific subnet which holds an address and the address of
+    at least one host, i.e. to find the hosts closest to an address with
+    nr.filter(IPFilter(mgmt_ip__subnet=network)).
+
+    :param nr: An initialised Nornir, or an inventory.
+    :param address: The IP address.
+    :type address: string
+    :param attr: The attribute holding the addresses of the hosts.
+    :type attr: string
+
+    :return network: An ipaddress network, or None if no host has an
+    address of the same IP version.
+    """
+    address = ipaddress.ip_address(address)
+    inventory = getattr(nr, "inventory", nr)
+    engine = getattr(inventory, "engine", None)
+    scope = inventory.scope() if engine is not None else None
+    if scope is not None:
+        return engine.auxiliary(IPIndex, attr).longest_prefix(address, scope)
+    # Without an up to date index, compare the address of every host
+    lengths = [
+        common_prefix(address, int(other))
+        for other in (host_address(h, attr) for h in inventory.hosts.values())
+        if other is not None and other.version == address.version
+    ]
+    if not lengths:
+        return None
+    return ipaddress.ip_network((int(address), max(lengths)), strict=False)
@@ -0,0 +1,332 @@
+"""
+Shared-scan evaluation of a batch of filters.
+
+A report running a dozen filters against the same inventory scans every
+host once per filter. A FilterBatch takes the filters by name, and
+evaluates all of them in a single pass over the hosts instead, returning
+the filtered result of every filter by name.
+
+The F rules of every filter are compiled into a tree of closures. Every
+attribute the rules look up is resolved once per host, whatever the number
+of rules on it, and a rule used by more than one filter (i.e.
+site_code__eq="mel" in one filter, and its negation in another) is only
+evaluated once per host. Filters an index can answer without evaluating any
+host, on an IndexedInventory or a VectorInventory, are left to the index.
+"""
+
+# Import modules
+from nornir.core.filter import AND, F, NOT_F, OR
+from nornir.core.inventory import Hosts, Inventory
+from nornir_perf.bitmap import IndexedFilter, bitmap_from_ids
+from nornir_perf.query import clause
+
+
+def freeze(value):
+    """
+    Turn the target of an F rule into a hashable key, so rules with equal
+    targets share their result.
+
+    :param value: The target of the rule.
+
+    :return key: A hashable key, which includes the type of every value so
+    that 1 and True differ, or None if the value can't be frozen.
+    """
+    if isinstance(value, (list, tuple)):
+        items = tuple(freeze(v) for v in value)
+        return None if None in items else (type(value), items)
+    if isinstance(value, (set, frozenset)):
+        items = frozenset(freeze(v) for v in value)
+        return None if None in items else (type(value), items)
+    if isinstance(value, dict):
+        items = frozenset((freeze(k), freeze(v)) for k, v in value.items())
+        return None if any(None in item for item in items) else (type(value), items)
+    try:
+        hash(value)
+    except TypeError:
+        return None
+    return (type(value), value)
+
+
+class Selection(IndexedFilter):
+    def __init__(self, names):
+        """
+        A filter matching a set of hosts already selected by name, which
+        lets an inventory build its own filtered result for them.
+
+        :param names: The names of the selected hosts.
+        :type names: iterable
+        """
+        self.names = frozenset(names)
+
+    def __call__(self, host):
+        return host.name in self.names
+
+    def select(self, engine, scope):
+        ids = engine.index.ids
+        selected = (ids[n] for n in self.names if n in ids)
+        return bitmap_from_ids(selected, engine.index.size) & scope
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self.names)} hosts)"
+
+
+def _rule_predicate(rule, target):
+    """
+    Build the predicate of a single F rule, which keeps the attribute it
+    looks up in the results of the host being evaluated.
+
+    :param rule: The F keyword, split on "__".
+    :type rule: list
+    :param target: The value passed to the F filter.
+
+    :return predicate: A function of a host and the results of the host.
+    """
+    verify = F._verify_rules
+    if len(rule) == 1:
+
+        def evaluate(host, results):
+            return verify(host, rule, target)
+
+        return evaluate
+    attribute, operation = rule[0], rule[1:]
+
+    def evaluate(host, results):
+        try:
+            data = results[attribute]
+        except KeyError:
+            data = results[attribute] = host.get(attribute, {})
+        try:
+            return verify(data, operation, target)
+        except AttributeError:
+            return False
+
+    return evaluate
+
+
+def _shared_predicate(slot, evaluate):
+    """
+    Wrap the predicate of a rule used more than once, so its result is kept
+    in the results of the host being evaluated.
+
+    :param slot: The key of the result, in the results of the host.
+    :type slot: integer
+    :param evaluate: The predicate of the rule.
+    :type evaluate: callable
+
+    :return predicate: A function of a host and the results of the host.
+    """
+
+    def shared(host, results):
+        try:
+            return results[slot]
+        except KeyError:
+            result = results[slot] = evaluate(host, results)
+            return result
+
+    return shared
+
+
+class FilterBatch:
+    def __init__(self, filters):
+        """
+        A named set of filters, evaluated together in a single pass over the
+        hosts.
+
+        :param filters: The filters by name. Each one is anything
+            Inventory.filter() takes as a filter: an F expression, a filter
+            function, or a dict of keyword filters.
+        :type filters: dict
+        """
+        self.filters = {}
+        for name, filter_obj in filters.items():
+            if isinstance(filter_obj, dict):
+                filter_obj = clause(**filter_obj)
+            self.filters[name] = filter_obj
+        # (key, frozen target) -> number of filters using the rule
+        self._uses = {}
+        for filter_obj in self.filters.values():
+            self._count(filter_obj)
+        # (key, frozen target) -> slot in the results of a host
+        self._slots = {}
+        # Filter functions are called as they are, the rest is compiled
+        self._predicates = {
+            name: self._compile(filter_obj)
+            for name, filter_obj in self.filters.items()
+            if self._rules(filter_obj) or isinstance(filter_obj, (AND, OR))
+        }
+
+    def _rules(self, node):
+        """
+        List the F rules of a filter.
+
+        :param node: An F object, an AND/OR of them, or a filter function.
+
+        :return rules: A list of (key, target) tuples.
+        """
+        if isinstance(node, (AND, OR)):
+            return self._rules(node.op1) + self._rules(node.op2)
+        if type(node) in (F, NOT_F):
+            return list(node.filters.items())
+        return []
+
+    def _count(self, node):
+        """
+        Count the filters using every F rule of a filter.
+
+        :param node: An F object, an AND/OR of them, or a filter function.
+        """
+        for key, target in self._rules(node):
+            frozen = freeze(target)
+            if frozen is not None:
+                self._uses[key, frozen] = self._uses.get((key, frozen), 0) + 1
+
+    def _compile_rule(self, key, target):
+        """
+        Compile a single F rule, i.e. site_code__eq="mel", into a predicate.
+
+        The attribute the rule looks up is kept in the results of the host
+        being evaluated, for every other rule on the same attribute. Rules
+        used more than once in the batch keep their own result there too.
+
+        :param key: The F keyword.
+        :type key: string
+        :param target: The value passed to the F filter.
+
+        :return predicate: A function of a host and the results of the host.
+        """
+        evaluate = _rule_predicate(key.split("__"), target)
+        frozen = freeze(target)
+        if frozen is None or self._uses[key, frozen] < 2:
+            return evaluate
+        # Slots are integers, so they don't clash with attribute names
+        slot = self._slots.setdefault((key, frozen), len(self._slots))
+        return _shared_predicate(slot, evaluate)
+
+    def _compile(self, node):
+        """
+        Recursively compile a filter into a predicate.
+
+        :param node: An F object, an AND/OR of them, or a filter function.
+
+        :return predicate: A function of a host and the results of the host.
+        """
+        if isinstance(node, AND):
+            first, second = self._compile(node.op1), self._compile(node.op2)
+            return lambda host, results: first(host, results) and second(host, results)
+        if isinstance(node, OR):
+            first, second = self._compile(node.op1), self._compile(node.op2)
+            return lambda host, results: first(host, results) or second(host, results)
+        if type(node) in (F, NOT_F):
+            rules = [self._compile_rule(k, v) for k, v in node.filters.items()]
+            if type(node) is NOT_F:
+                if len(rules) == 1:
+                    return lambda host, results: not rules[0](host, results)
+                return lambda host, results: not any(r(host, results) for r in rules)
+            if len(rules) == 1:
+                return rules[0]
+            return lambda host, results: all(r(host, results) for r in rules)
+        # Anything else (i.e. a filter_func) is called with the host only
+        return lambda host, results: node(host)
+
+    def scan(self, hosts, names=None):
+        """
+        Evaluate filters against every host, in a single pass.
+
+        :param hosts: The hosts to evaluate.
+        :type hosts: nornir.core.inventory.Hosts
+        :param names: The names of the filters to evaluate.
+            Default: every filter of the batch
+        :type names: list
+
+        :return matched: A dict of filter name to the list of the names of
+        the matching hosts, in inventory order.
+        """
+        names = list(self.filters) if names is None else names
+        matched = {n: [] for n in names}
+        compiled = [
+            (self._predicates[n], matched[n]) for n in names if n in self._predicates
+        ]
+        functions = [
+            (self.filters[n], matched[n]) for n in names if n not in self._predicates
+        ]
+        for host_name, host in hosts.items():
+            # The attributes and shared rules resolved for this host
+            results = {}
+            for predicate, selected in compiled:
+                if predicate(host, results):
+                    selected.append(host_name)
+            for func, selected in functions:
+                if func(host):
+                    selected.append(host_name)
+        return matched
+
+    def run(self, nr):
+        """
+        Evaluate every filter of the batch.
+
+        :param nr: An initialised Nornir, or an inventory.
+
+        :return results: A dict of filter name to the result of
+        nr.filter() for that filter, in the order of the batch.
+        """
+        inventory = getattr(nr, "inventory", nr)
+        engine = getattr(inventory, "engine", None)
+        # Filters the index answers on its own don't need the scan
+        indexed = [
+            n
+            for n, f in self.filters.items()
+            if engine is not None and engine.indexed(f)
+        ]
+        scanned = [n for n in self.filters if n not in indexed]
+        results = {n: nr.filter(self.filters[n]) for n in indexed}
+        if scanned:
+            matched = self.scan(inventory.hosts, scanned)
+            for name in scanned:
+                results[name] = self._result(nr, inventory, matched[name])
+        return {n: results[n] for n in self.filters}
+
+    @staticmethod
+    def _result(nr, inventory, names):
+        """
+        Build the filtered result of a filter, from its matching hosts.
+
+        :param nr: An initialised Nornir, or an inventory.
+        :param inventory: The inventory of nr.
+        :type inventory: nornir.core.inventory.Inventory
+        :param names: The names of the matching hosts, in inventory order.
+        :type names: list
+
+        :return result: The same result as nr.filter() would return.
+        """
+        if type(inventory) is not Inventory:
+            # Let other inventories, i.e. an IndexedInventory, build their own
+            return nr.filter(Selection(names))
+        hosts = inventory.hosts
+        filtered = Inventory(
+            hosts=Hosts({n: hosts[n] for n in names}),
+            groups=inventory.groups,
+            defaults=inventory.defaults,
+        )
+        if nr is inventory:
+            return filtered
+        # A copy of the Nornir object, as Nornir.filter() does
+        result = nr.__class__(**nr.__dict__)
+        result.inventory = filtered
+        return result
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({list(self.filters)})"
+
+
+def batch_filter(nr, filters):
+    """
+    Evaluate a named set of filters in a single pass over the hosts.
+
+    :param nr: An initialised Nornir, or an inventory.
+    :param filters: The filters by name, see FilterBatch.
+    :type filters: dict
+
+    :return results: A dict of filter name to the result of nr.filter() for
+    that filter.
+    """
+    return FilterBatch(filters).run(nr)
@@ -0,0 +1,290 @@
+"""
+Bitmap evaluation of nornir filters.
+
+Every host of an indexed inventory has a dense integer id, so a set of hosts
+is stored as a bitmap (a python int, bit N set when host N is in the set).
+F leaves resolve to bitmaps from the AttributeIndex, and AND, OR and NOT
+become bitwise operations, with NOT taken as the complement against the
+hosts in scope.
+
+Filters which need an index of their own, such as the NameFilter, subclass
+IndexedFilter. The engine builds their index the first time it is needed,
+and asks the filter for a bitmap instead of evaluating every host.
+"""
+
+# Import modules
+from nornir.core.filter import AND, F, F_BASE, NOT_F, OR
+
+
+def bitmap_from_ids(ids, size):
+    """
+    Build a bitmap from a collection of host ids.
+
+    :param ids: The host ids to set.
+    :type ids: iterable
+    :param size: The number of hosts in the inventory.
+    :type size: integer
+
+    :return bitmap: The bitmap, as an integer.
+    """
+    buf = bytearray((size + 7) // 8)
+    for i in ids:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def ids_from_bitmap(bitmap):
+    """
+    List the host ids set in a bitmap, in ascending order.
+
+    :param bitmap: The bitmap, as an integer.
+    :type bitmap: integer
+
+    :return ids: A list of host ids.
+    """
+    # Reversed binary string, so the character at position N is bit N
+    bits = bin(bitmap)[:1:-1]
+    ids = []
+    i = bits.find("1")
+    while i != -1:
+        ids.append(i)
+        i = bits.find("1", i + 1)
+    return ids
+
+
+def count_bits(bitmap):
+    """
+    Count the hosts set in a bitmap.
+
+    :param bitmap: The bitmap, as an integer.
+    :type bitmap: integer
+
+    :return count: The number of bits set.
+    """
+    return bin(bitmap).count("1")
+
+
+class IndexedFilter(F_BASE):
+    """
+    Base class for filters answered by an index of their own, rather than by
+    the AttributeIndex. Subclasses implement __call__(host), which is what
+    stock nornir evaluates, and select(engine, scope), which must return the
+    bitmap of hosts in scope for which __call__ would return True.
+    """
+
+    def select(self, engine, scope):
+        """
+        Resolve the filter to a bitmap.
+
+        :param engine: The engine evaluating the filter, which builds and
+            holds the index of the filter, see BitmapEngine.auxiliary.
+        :type engine: nornir_perf.bitmap.BitmapEngine
+        :param scope: The bitmap of hosts in scope.
+        :type scope: integer
+
+        :return bitmap: The bitmap of hosts in scope matching the filter.
+        """
+        raise NotImplementedError()
+
+    def __and__(self, other):
+        return AND(self, other)
+
+    def __or__(self, other):
+        return OR(self, other)
+
+    def __invert__(self):
+        return Complement(self)
+
+
+class Complement(IndexedFilter):
+    def __init__(self, filter_obj):
+        """
+        The negation of an IndexedFilter.
+
+        :param filter_obj: The filter to negate.
+        :type filter_obj: nornir_perf.bitmap.IndexedFilter
+        """
+        self.filter_obj = filter_obj
+
+    def __call__(self, host):
+        return not self.filter_obj(host)
+
+    def select(self, engine, scope):
+        return scope & ~self.filter_obj.select(engine, scope)
+
+    def __invert__(self):
+        return self.filter_obj
+
+    def __repr__(self):
+        return f"NOT {self.filter_obj}"
+
+
+class BitmapEngine:
+    def __init__(self, index, hosts):
+        """
+        Evaluate nornir filters as bitmap operations over an AttributeIndex.
+
+        :param index: The index of the inventory.
+        :type index: nornir_perf.index.AttributeIndex
+        :param hosts: The hosts of the inventory, used to evaluate anything
+            the index can't answer, i.e. a filter_func.
+        :type hosts: nornir.core.inventory.Hosts
+        """
+        self.index = index
+        # Host objects by id, for the filters which have to be evaluated
+        self.hosts = [hosts[name] for name in index.names]
+        # Indexes of IndexedFilters, built on first use
+        self._auxiliary = {}
+
+    def auxiliary(self, factory, *args):
+        """
+        Get an index over the hosts of the engine, building it on first use.
+        The index is shared by every filter using the same factory and
+        arguments.
+
+        :param factory: The index class, or a function building the index
+            from the engine and the arguments.
+        :type factory: callable
+        :param args: Extra arguments of the factory, i.e. the attribute to
+            index. They must be hashable.
+
+        :return index: The index built by the factory.
+        """
+        key = (factory, args)
+        try:
+            return self._auxiliary[key]
+        except KeyError:
+            index = self._auxiliary[key] = factory(self, *args)
+            return index
+
+    def refresh(self, hosts):
+        """
+        Pick up the hosts of the index, after it was updated. The indexes of
+        IndexedFilters are thrown away, and rebuilt on their next use.
+
+        :param hosts: The hosts of the inventory.
+        :type hosts: nornir.core.inventory.Hosts
+        """
+        self.hosts = [hosts[name] for name in self.index.names]
+        self._auxiliary.clear()
+
+    def scan(self, predicate, scope):
+        """
+        Evaluate a predicate against every host in scope.
+
+        :param predicate: A function of a host, returning a boolean.
+        :type predicate: callable
+        :param scope: The bitmap of hosts to evaluate.
+        :type scope: integer
+
+        :return bitmap: The bitmap of hosts matching the predicate.
+        """
+        hosts = self.hosts
+        if scope == self.index.universe:
+            matched = [i for i, host in enumerate(hosts) if predicate(host)]
+        else:
+            matched = [i for i in ids_from_bitmap(scope) if predicate(hosts[i])]
+        return bitmap_from_ids(matched, self.index.size)
+
+    def indexed(self, node):
+        """
+        Check whether a filter can be answered without evaluating any host.
+
+        :param node: An F object, an AND/OR of them, or a filter function.
+
+        :return bool: True if the index answers the whole filter.
+        """
+        if isinstance(node, (AND, OR)):
+            return self.indexed(node.op1) and self.indexed(node.op2)
+        if isinstance(node, IndexedFilter):
+            return True
+        if type(node) in (F, NOT_F):
+            return all(self.index.rule_indexed(k) for k in node.filters)
+        return False
+
+    def _rule(self, key, target, scope):
+        """
+        Resolve a single F keyword argument, i.e. site_code__eq="mel".
+
+        :param key: The F keyword.
+        :type key: string
+        :param target: The value passed to the F filter.
+        :param scope: The bitmap of hosts in scope.
+        :type scope: integer
+
+        :return bitmap: The bitmap of hosts in scope matching the rule.
+        """
+        bitmap = self.index.lookup_rule(key, target)
+        if bitmap is not None:
+            return bitmap & scope
+        rule = key.split("__")
+        return self.scan(lambda host: F._verify_rules(host, rule, target), scope)
+
+    def _evaluate(self, node, scope):
+        """
+        Recursively evaluate a filter within a scope.
+
+        :param node: An F object, an AND/OR of them, or a filter function.
+        :param scope: The bitmap of hosts in scope.
+        :type scope: integer
+
+        :return bitmap: The bitmap of hosts in scope matching the filter.
+        """
+        if isinstance(node, AND):
+            # Evaluate the indexed side first, so the other side only has to
+            # look at the hosts which are still candidates
+            first, second = node.op1, node.op2
+            if not self.indexed(first) and self.indexed(second):
+                first, second = second, first
+            return self._evaluate(second, self._evaluate(first, scope))
+        if isinstance(node, OR):
+            # Hosts already matched by the first side aren't evaluated again
+            first = self._evaluate(node.op1, scope)
+            return first | self._evaluate(node.op2, scope & ~first)
+        if type(node) is F:
+            # All rules must match, so each narrows the scope of the next
+            rules = sorted(
+                node.filters.items(), key=lambda r: not self.index.rule_indexed(r[0])
+            )
+            for key, target in rules:
+                scope = self._rule(key, target, scope)
+            return scope
+        if type(node) is NOT_F:
+            # Hosts matching any of the rules are removed from the scope
+            remaining = scope
+            for key, target in node.filters.items():
+                remaining &= ~self._rule(key, target, remaining)
+            return remaining
+        if isinstance(node, IndexedFilter):
+            return node.select(self, scope)
+        # Anything else (i.e. a filter_func) has to be evaluated host by host
+        return self.scan(node, scope)
+
+    def evaluate(self, filter_obj=None, kwargs=None, scope=None):
+        """
+        Evaluate a filter, as passed to Inventory.filter(), to a bitmap.
+
+        :param filter_obj: The F object or filter function, if any.
+        :param kwargs: The keyword filters, if any.
+        :type kwargs: dict
+        :param scope: The bitmap of hosts to filter.
+            Default: every host in the index
+        :type scope: integer
+
+        :return bitmap: The bitmap of matching hosts.
+        """
+        kwargs = kwargs or {}
+        scope = self.index.universe if scope is None else scope
+        if filter_obj is not None and kwargs:
+            # A filter function with extra arguments, as Inventory.filter does
+            return self.scan(lambda host: filter_obj(host, **kwargs), scope)
+        if filter_obj is not None:
+            return self._evaluate(filter_obj, scope)
+        # Keyword filters match hosts which have all the given values
+        for key, target in kwargs.items():
+            bitmap = self.index.lookup_equal(key, target)
+            if bitmap is None:
+                scope = self.scan(lambda host: host.get(key) == target, scope)
+            else:
+                scope &= bitmap
+        return scope
@@ -0,0 +1,490 @@
+"""
+Memoized filter results.
+
+Tooling runs the same filters over and over against an inventory which
+rarely changes. A CachedInventory keeps the results of its filters in an LRU
+ResultCache, keyed by a canonical form of the filter: the rules of an F
+expression are normalised, so F(a=1, b=2), F(b=2) & F(a=1) and
+F(a=1) & F(b=2) share one entry. A repeated filter is a dict lookup.
+
+Every entry is stamped with the version of the inventory it was computed
+against. The hosts and groups of a CachedInventory are versioned
+containers, so adding, replacing or removing a host or group bumps the
+version and throws the cached results away. The data and parent groups of
+the groups, and the data of the defaults, are tracked like the ones of a
+flattened inventory, so changing them in place does as well. Changing the
+data or groups of a host in place, or assigning new data to a plain Group,
+can't be seen, so call invalidate() afterwards, or update_hosts() to keep the
+results of filters on attributes which didn't change.
+"""
+
+# Import modules
+from collections import OrderedDict
+from functools import partial
+from nornir.core.filter import AND, F, NOT_F, OR
+from nornir.core.inventory import Groups, Host
+from nornir_perf import flat
+from nornir_perf.batch import freeze
+from nornir_perf.bitmap import Complement, IndexedFilter
+from nornir_perf.index import BASE_ATTRIBUTES, MISSING, RULE_OPERATORS
+from nornir_perf.inventory import InventoryWrapper, VersionedHosts, versioned
+
+# Number of filter results kept by default
+CACHE_SIZE = 256
+
+
+def _operands(node, operator):
+    """
+    List the operands of a chain of the same operator, i.e. a & b & c.
+
+    :param node: The root of the chain.
+    :param operator: AND or OR.
+
+    :return operands: A list of filters.
+    """
+    if isinstance(node, operator):
+        return _operands(node.op1, operator) + _operands(node.op2, operator)
+    return [node]
+
+
+def _rules(filters, negated):
+    """
+    Build the canonical keys of the rules of an F or NOT_F.
+
+    :param filters: The rules, i.e. {"site_code__eq": "mel"}.
+    :type filters: dict
+    :param negated: Whether the rules are negated, as NOT_F does.
+    :type negated: boolean
+
+    :return keys: A list of keys, or None if a target can't be frozen.
+    """
+    keys = []
+    for key, target in filters.items():
+        frozen = freeze(target)
+        if frozen is None:
+            return None
+        keys.append(("NOT_F" if negated else "F", key, frozen))
+    return keys
+
+
+def _canonical_chain(node):
+    """
+    Build the canonical key of a chain of AND or OR.
+
+    :param node: An AND or OR.
+
+    :return key: A hashable key, or None if an operand can't be cached.
+    """
+    operator = type(node)
+    keys = []
+    for operand in _operands(node, operator):
+        key = _canonical(operand)
+        if key is None:
+            return None
+        # F(a=1, b=2) is F(a=1) & F(b=2), and ~F(a=1, b=2) is
+        # ~F(a=1) & ~F(b=2)
+        if operator is AND and key[0] == "AND":
+            keys.extend(key[1])
+        else:
+            keys.append(key)
+    return (operator.__name__, frozenset(keys))
+
+
+def _canonical_rules(node):
+    """
+    Build the canonical key of an F or NOT_F.
+
+    :param node: An F or NOT_F.
+
+    :return key: A hashable key, or None if a target can't be frozen.
+    """
+    keys = _rules(node.filters, type(node) is NOT_F)
+    if keys is None:
+        return None
+    # A single rule is its own key, and no rules match every host
+    return keys[0] if len(keys) == 1 else ("AND", frozenset(keys))
+
+
+def _canonical_complement(node):
+    """
+    Build the canonical key of the Complement of a filter.
+
+    :param node: A Complement.
+
+    :return key: A hashable key, or None if the filter can't be cached.
+    """
+    key = _canonical(node.filter_obj)
+    return None if key is None else ("NOT", key)
+
+
+def _canonical_indexed(node):
+    """
+    Build the canonical key of an IndexedFilter, i.e. a NameFilter, from its
+    keyword arguments.
+
+    :param node: An IndexedFilter.
+
+    :return key: A hashable key, or None if it hasn't got keyword arguments.
+    """
+    filters = getattr(node, "filters", None)
+    state = freeze(filters) if isinstance(filters, dict) else None
+    return None if state is None else (type(node), state)
+
+
+def _canonical_partial(node):
+    """
+    Build the canonical key of a functools.partial filter function.
+
+    :param node: A partial.
+
+    :return key: A hashable key, or None if its arguments can't be frozen.
+    """
+    arguments = freeze((node.args, tuple(sorted(node.keywords.items()))))
+    return None if arguments is None else ("partial", node.func, arguments)
+
+
+def _canonical_function(node):
+    """
+    Build the canonical key of any other filter function.
+
+    :param node: A filter function.
+
+    :return key: A hashable key, or None if the function isn't hashable.
+    """
+    try:
+        hash(node)
+    except TypeError:
+        return None
+    return ("func", node)
+
+
+# Filter type -> the builder of its canonical key. F and NOT_F match on their
+# exact type, the bases in order with isinstance, and anything else is keyed
+# as a filter function
+CANONICAL_TYPES = {F: _canonical_rules, NOT_F: _canonical_rules}
+CANONICAL_BASES = [
+    ((AND, OR), _canonical_chain),
+    (Complement, _canonical_complement),
+    (IndexedFilter, _canonical_indexed),
+    (partial, _canonical_partial),
+]
+
+
+def _canonical(node):
+    """
+    Recursively build the canonical key of a filter.
+
+    :param node: An F object, an AND/OR of them, or a filter function.
+
+    :return key: A hashable key, or None if the filter can't be cached.
+    """
+    build = CANONICAL_TYPES.get(type(node))
+    if build is None:
+        build = next(
+            (b for types, b in CANONICAL_BASES if isinstance(node, types)),
+            _canonical_function,
+        )
+    return build(node)
+
+
+def canonical(filter_obj=None, kwargs=None):
+    """
+    Build the canonical key of the arguments of a filter() call, which is
+    the same for filters matching the same hosts by construction.
+
+    :param filter_obj: The F object or filter function, if any.
+    :param kwargs: The keyword filters, or the arguments of the filter
+        function.
+    :type kwargs: dict
+
+    :return key: A hashable key, or None if the filter can't be cached.
+    """
+    arguments = freeze(tuple(sorted((kwargs or {}).items())))
+    if arguments is None:
+        return None
+    if filter_obj is None:
+        return ("kwargs", arguments)
+    key = _canonical(filter_obj)
+    return None if key is None else (key, arguments)
+
+
+def _attributes(key):
+    """
+    Find the host attributes a filter depends on, from its canonical key.
+
+    :param key: The canonical key of the filter, see canonical().
+
+    :return attributes: A set of attribute names, or None if the filter may
+    depend on anything, i.e. a filter function.
+    """
+    head, arguments = key
+    if head == "kwargs":
+        # Keyword filters compare the data of a host, as host.get() does
+        names = {item[1][0][1] for item in arguments[1]}
+        return None if any(hasattr(Host, n) for n in names) else names
+    if arguments[1]:
+        # The arguments of a filter function
+        return None
+    attributes = set()
+    keys = [head]
+    while keys:
+        key = keys.pop()
+        if key[0] in ("AND", "OR"):
+            keys.extend(key[1])
+        elif key[0] == "NOT":
+            keys.append(key[1])
+        elif key[0] in ("F", "NOT_F"):
+            rule = key[1].split("__")
+            attr = rule[0]
+            if len(rule) > 2 or attr in RULE_OPERATORS:
+                return None
+            if hasattr(Host, attr) and attr not in BASE_ATTRIBUTES:
+                return None
+            attributes.add(attr)
+        else:
+            return None
+    return attributes
+
+
+class ResultCache:
+    def __init__(self, maxsize=CACHE_SIZE):
+        """
+        An LRU cache of filter results, all computed against the same
+        version of an inventory.
+
+        :param maxsize: The number of results to keep.
+        :type maxsize: integer
+        """
+        self.maxsize = maxsize
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+
+    def get(self, key, version):
+        """
+        Look up a filter result.
+
+        :param key: The canonical key of the filter.
+        :param version: The current version of the inventory. Results of
+            any other version are thrown away.
+
+        :return result: The result, or None if it isn't cached.
+        """
+        if version != self.version:
+            self.clear()
+            self.version = version
+        try:
+            result = self._results[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._results.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, version, result):
+        """
+        Keep a filter result, evicting the least recently used one when the
+        cache is full.
+
+        :param key: The canonical key of the filter.
+        :param version: The version of the inventory the result is from.
+        :param result: The filter result.
+        """
+        if version != self.version:
+            self.clear()
+            self.version = version
+        self._results[key] = result
+        self._results.move_to_end(key)
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+    def clear(self):
+        """
+        Throw away every cached result.
+        """
+        self._results.clear()
+
+    def revalidate(self, version, keep):
+        """
+        Carry cached results over to a new version of the inventory, i.e.
+        the results of filters on attributes which didn't change.
+
+        :param version: The new version of the inventory.
+        :param keep: A function of the canonical key of a filter, returning
+            True if its result is still valid.
+        :type keep: callable
+        """
+        for key in [k for k in self._results if not keep(k)]:
+            del self._results[key]
+        self.version = version
+
+    def __len__(self):
+        return len(self._results)
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}({len(self)}/{self.maxsize}, "
+            f"hits={self.hits}, misses={self.misses})"
+        )
+
+
+def track_inherited(element):
+    """
+    Swap the data dict and parent groups of a group, or the data dict of
+    defaults, for tracked ones, so changing them in place bumps
+    flat.generation, which is part of the version of a CachedInventory.
+
+    :param element: The group or defaults.
+    :type element: nornir.core.inventory.BaseAttributes
+    """
+    for attr in ("data", "groups"):
+        # Defaults haven't got parent groups
+        value = getattr(element, attr, None)
+        tracked = flat.track(attr, value) if value is not None else value
+        if tracked is not value:
+            setattr(element, attr, tracked)
+
+
+def _set_group(groups, name, group):
+    """
+    Add a group to VersionedGroups, tracking its data and parent groups.
+    """
+    track_inherited(group)
+    dict.__setitem__(groups, name, group)
+
+
+class VersionedGroups(Groups):
+    """
+    The groups of a CachedInventory, counting their changes.
+    """
+
+    version = 0
+    __setitem__ = versioned(_set_group)
+    __delitem__ = versioned(dict.__delitem__)
+    clear = versioned(dict.clear)
+    pop = versioned(dict.pop)
+    popitem = versioned(dict.popitem)
+    setdefault = versioned(dict.setdefault)
+    update = versioned(dict.update)
+    if hasattr(dict, "__ior__"):
+        __ior__ = versioned(dict.__ior__)
+
+
+class CachedInventory(InventoryWrapper):
+    __slots__ = ("cache", "edits")
+
+    def __init__(self, inventory, maxsize=CACHE_SIZE):
+        """
+        A nornir Inventory which memoizes the results of its filters. The
+        filters themselves are evaluated by the wrapped inventory, i.e. an
+        IndexedInventory, and anything else is passed through to it.
+
+        Cached results are shared by every call of the same filter, so treat
+        them as read-only.
+
+        :param inventory: The inventory to cache the filters of. Its hosts
+            and groups are swapped for versioned copies, and the data of its
+            groups and defaults for tracked ones.
+        :type inventory: nornir.core.inventory.Inventory
+        :param maxsize: The number of filter results to keep.
+        :type maxsize: integer
+        """
+        super().__init__(inventory)
+        if not isinstance(self.hosts, VersionedHosts):
+            self.hosts = VersionedHosts(self.hosts)
+        if not isinstance(self.groups, VersionedGroups):
+            self.groups = VersionedGroups(self.groups)
+        self._track()
+        self.cache = ResultCache(maxsize)
+        # Bumped by invalidate(), for changes the containers can't see
+        self.edits = 0
+
+    def _track(self):
+        """
+        Track the data and parent groups of every group, and the data of the
+        defaults, i.e. after a reload assigned new ones.
+        """
+        for group in self.groups.values():
+            track_inherited(group)
+        track_inherited(self.defaults)
+
+    @property
+    def version(self):
+        """
+        The version of the inventory, which changes whenever hosts or groups
+        are changed, or the data of groups or defaults.
+        """
+        return (self.hosts.version, self.groups.version, flat.generation, self.edits)
+
+    def invalidate(self):
+        """
+        Throw away every cached result, i.e. after changing the data or
+        groups of a host in place.
+        """
+        self.edits += 1
+
+    def update_hosts(self, previous, current, groups=()):
+        """
+        Update the wrapped inventory after hosts or groups were added,
+        removed or changed, and keep the cached results of the filters which
+        only depend on attributes which didn't change. Any host added or
+        removed throws every result away.
+
+        :param previous: Host name -> the attributes the host had before the
+            change, for every host removed or changed.
+        :type previous: dict
+        :param current: Host name -> the attributes of the host, for every
+            host added or changed.
+        :type current: dict
+        :param groups: The names of the groups added, removed or whose
+            parent groups changed.
+        :type groups: iterable
+        """
+        update = getattr(self.inventory, "update_hosts", None)
+        if update is not None:
+            update(previous, current, groups)
+        self._track()
+        cached = self.cache.version
+        if previous.keys() != current.keys() or (
+            # The cached results must be of the hosts before these changes.
+            # Group changes are seen through the hosts they change
+            cached is None
+            or cached[0] != self.hosts.version
+            or cached[3] != self.edits
+        ):
+            self.invalidate()
+            return
+        changed = set()
+        for name, attributes in current.items():
+            before = previous[name]
+            for attr in before.keys() | attributes.keys():
+                old, new = before.get(attr, MISSING), attributes.get(attr, MISSING)
+                # 1 and True are equal, but not to every operator
+                if type(old) is not type(new) or old != new:
+                    changed.add(attr)
+
+        def keep(key):
+            attributes = _attributes(key)
+            return attributes is not None and not attributes & changed
+
+        self.cache.revalidate(self.version, keep)
+
+    def filter(self, filter_obj=None, filter_func=None, **kwargs):
+        """
+        Filter the inventory, see nornir.core.inventory.Inventory.filter.
+
+        :return inventory: The result of the wrapped inventory, from the
+        cache if the same filter already ran against this version.
+        """
+        key = canonical(filter_obj or filter_func, kwargs)
+        if key is None:
+            # Unhashable arguments, so nothing to key the result on
+            return self.inventory.filter(filter_obj, filter_func, **kwargs)
+        version = self.version
+        result = self.cache.get(key, version)
+        if result is None:
+            result = self.inventory.filter(filter_obj, filter_func, **kwargs)
+            self.cache.put(key, version, result)
+        return result
@@ -0,0 +1,286 @@
+"""
+Compiled F expressions.
+
+Evaluating an F expression walks the AND/OR tree for every host, splits
+every keyword on "__" and dispatches every rule through
+F._verify_rules(), which looks up the operator with hasattr() each time.
+compile_filter() does all of that once: it turns the expression into the
+source of a single Python function, with the rules inlined, and execs it.
+
+The attribute a rule looks up is fetched with host.get(), as nornir does,
+and attributes used by more than one rule are only fetched once per host.
+The eq/ne/ge/gt/le/lt, contains and any operators are inlined for the
+builtin types found in an inventory, and anything else (i.e. another
+operator, a nested key, or a value of another type) falls back to
+F._verify_rules(), so the compiled function returns the same result as the
+expression for every host. Anything in the tree which isn't an F, NOT_F,
+AND or OR (i.e. a filter function or an IndexedFilter) is called as it is.
+
+Compiled functions are cached by the expression, with its operands and rules
+in the order they are evaluated, so compiling the same filter again is a dict
+lookup. The order is part of the key: a rule or a filter function may only be
+safe to evaluate once the rules before it matched.
+"""
+
+# Import modules
+from collections import OrderedDict
+from nornir.core.filter import AND, F, NOT_F, OR
+from nornir.core.inventory import Host
+from nornir_perf.batch import freeze
+
+# Number of compiled functions kept by default
+CODE_CACHE_SIZE = 256
+# Operators which every object implements, so they never fall back
+COMPARISONS = ("eq", "ne", "ge", "gt", "le", "lt")
+# Types with a __contains__, and types without an any attribute
+CONTAINERS = (str, list, tuple, dict, set, frozenset)
+SCALARS = (str, int, float, bool, type(None), list, tuple, dict)
+
+# Code key -> compiled function, least recently used first
+_compiled = OrderedDict()
+# Not fetched yet, for attributes shared by several rules
+_UNSET = object()
+
+
+def _path(data, rule, target):
+    """
+    Evaluate the rest of an F rule, against the attribute it looked up, the
+    way F._verify_rules() does.
+
+    :param data: The value of the attribute.
+    :param rule: The rest of the rule, i.e. ["eq"].
+    :type rule: list
+    :param target: The value passed to the F filter.
+
+    :return bool: True if it matches, False if it doesn't match
+    """
+    try:
+        return F._verify_rules(data, rule, target)
+    except AttributeError:
+        return False
+
+
+def _host_attribute(name):
+    """
+    Check whether a single part F rule, i.e. F(platform="ios"), names an
+    attribute or method of a host rather than an inventory key.
+
+    :param name: The F keyword.
+    :type name: string
+
+    :return bool: True if any host class has the attribute or operator.
+    """
+    classes = [Host]
+    for cls in classes:
+        classes.extend(cls.__subclasses__())
+    return any(hasattr(c, name) or hasattr(c, f"__{name}__") for c in classes)
+
+
+def _code_key(node):
+    """
+    Recursively build the key of the compiled function of an expression,
+    which keeps the operands of AND/OR and the rules of an F in the order
+    they are evaluated.
+
+    :param node: An F object, an AND/OR of them, or a filter function.
+
+    :return key: A hashable key, or None if a target can't be frozen.
+    """
+    if isinstance(node, (AND, OR)):
+        op1, op2 = _code_key(node.op1), _code_key(node.op2)
+        if op1 is None or op2 is None:
+            return None
+        return (type(node).__name__, op1, op2)
+    if type(node) in (F, NOT_F):
+        rules = tuple((key, freeze(target)) for key, target in node.filters.items())
+        if any(target is None for _, target in rules):
+            return None
+        return (type(node).__name__, rules)
+    # Anything else is called as it is, and bound to the compiled function,
+    # so only that same object shares it
+    return ("call", id(node))
+
+
+class _Generator:
+    def __init__(self, node):
+        """
+        Generate the source of the function evaluating an F expression.
+
+        :param node: The F expression.
+        """
+        self.constants = {
+            "_UNSET": _UNSET,
+            "_path": _path,
+            "_verify": F._verify_rules,
+            "_CONTAINERS": CONTAINERS,
+            "_SCALARS": SCALARS,
+        }
+        # Attribute -> number of rules looking it up
+        self.uses = {}
+        self._count(node)
+        # Attribute -> local variable, for attributes shared by rules
+        self.shared = {}
+        self.temporaries = 0
+        self.expression = self._expression(node)
+
+    def _count(self, node):
+        """
+        Count the rules looking up every attribute of an expression.
+
+        :param node: An F object, an AND/OR of them, or a filter function.
+        """
+        if isinstance(node, (AND, OR)):
+            self._count(node.op1)
+            self._count(node.op2)
+        elif type(node) in (F, NOT_F):
+            for key in node.filters:
+                rule = key.split("__")
+                if len(rule) > 1:
+                    self.uses[rule[0]] = self.uses.get(rule[0], 0) + 1
+
+    def constant(self, value, prefix):
+        """
+        Bind a value to a name of the generated function.
+
+        :param value: The value, i.e. the target of a rule.
+        :param prefix: The prefix of the name.
+        :type prefix: string
+
+        :return name: The name.
+        """
+        name = f"{prefix}{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def temporary(self):
+        """
+        Reserve a local variable of the generated function.
+
+        :return name: The name of the variable.
+        """
+        self.temporaries += 1
+        return f"d{self.temporaries}"
+
+    def _accessor(self, attribute):
+        """
+        Generate the lookup of an attribute, as F._verify_rules() does it.
+
+        :param attribute: The attribute, i.e. site_code.
+        :type attribute: string
+
+        :return source: An expression.
+        """
+        fetch = f"host.get({attribute!r}, {{}})"
+        if self.uses[attribute] < 2:
+            return fetch
+        if attribute not in self.shared:
+            self.shared[attribute] = f"a{len(self.shared)}"
+        name = self.shared[attribute]
+        return f"({name} if {name} is not _UNSET else ({name} := {fetch}))"
+
+    def _rule(self, key, target):
+        """
+        Generate a single F rule, i.e. site_code__eq="mel".
+
+        :param key: The F keyword.
+        :type key: string
+        :param target: The value passed to the F filter.
+
+        :return source: An expression.
+        """
+        rule = key.split("__")
+        value = self.constant(target, "t")
+        if len(rule) == 1:
+            if key in ("in", "any", "all") or _host_attribute(key):
+                return f"_verify(host, {self.constant(rule, 'r')}, {value})"
+            return f"(host.get({key!r}) == {value})"
+        attribute, operation = rule[0], rule[1:]
+        accessor = self._accessor(attribute)
+        operator = operation[0] if len(operation) == 1 else None
+        if operator in COMPARISONS:
+            return f"{accessor}.__{operator}__({value})"
+        rest = self.constant(operation, "r")
+        data = self.temporary()
+        fallback = f"_path({data}, {rest}, {value})"
+        if operator == "contains":
+            return (
+                f"({data}.__contains__({value}) "
+                f"if ({data} := {accessor}).__class__ in _CONTAINERS else {fallback})"
+            )
+        if operator == "any":
+            if type(target) in (list, tuple):
+                # Same as comparing every target, for a value which isn't a list
+                scalar = f"{data} in {value}"
+            else:
+                scalar = f"any(x == {data} for x in {value})"
+            return (
+                f"((any(x in {data} for x in {value}) if {data}.__class__ is list "
+                f"else {scalar}) "
+                f"if ({data} := {accessor}).__class__ in _SCALARS else {fallback})"
+            )
+        return f"_path({accessor}, {rest}, {value})"
+
+    def _expression(self, node):
+        """
+        Recursively generate an expression.
+
+        :param node: An F object, an AND/OR of them, or a filter function.
+
+        :return source: An expression.
+        """
+        if isinstance(node, AND):
+            return f"({self._expression(node.op1)} and {self._expression(node.op2)})"
+        if isinstance(node, OR):
+            return f"({self._expression(node.op1)} or {self._expression(node.op2)})"
+        if type(node) in (F, NOT_F):
+            rules = [self._rule(k, v) for k, v in node.filters.items()]
+            if type(node) is NOT_F:
+                return f"(not ({' or '.join(rules) or 'False'}))"
+            return f"({' and '.join(rules) or 'True'})"
+        # Anything else (i.e. a filter function) is called with the host only
+        return f"{self.constant(node, 'f')}(host)"
+
+    def source(self):
+        """
+        Generate the source of the function.
+
+        :return source: The source of a function of a host, named compiled.
+        """
+        lines = ["def compiled(host):"]
+        if self.shared:
+            lines.append(f"    {' = '.join(self.shared.values())} = _UNSET")
+        lines.append(f"    return bool({self.expression})")
+        return "\n".join(lines) + "\n"
+
+
+def compile_filter(filter_obj, maxsize=CODE_CACHE_SIZE):
+    """
+    Compile an F expression into a single Python function.
+
+        site_filter = compile_filter(F(site_code__eq="mel") & ~F(sla__ge=80))
+        nr.filter(filter_func=site_filter)
+
+    :param filter_obj: An F object, or an AND/OR of them.
+    :param maxsize: The number of compiled functions to keep.
+    :type maxsize: integer
+
+    :return predicate: A function of a host returning a boolean, with the
+    generated code in its source attribute, and the expression in its
+    filter_obj attribute.
+    """
+    key = _code_key(filter_obj)
+    if key is not None and key in _compiled:
+        _compiled.move_to_end(key)
+        return _compiled[key]
+    generator = _Generator(filter_obj)
+    source = generator.source()
+    namespace = dict(generator.constants)
+    exec(compile(source, f"<compiled {filter_obj!r}>", "exec"), namespace)
+    predicate = namespace["compiled"]
+    predicate.source = source
+    predicate.filter_obj = filter_obj
+    if key is not None:
+        _compiled[key] = predicate
+        if len(_compiled) > maxsize:
+            _compiled.popitem(last=False)
+    return predicate
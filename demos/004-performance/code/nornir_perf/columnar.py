@@ -0,0 +1,471 @@
+"""
+Columnar host records.
+
+Every host of a nornir inventory is an object holding its own data dict,
+parent groups list, connection dicts and strings, even though every host of
+hosts.yaml has the same few keys (mgmt_ip, vendor, device_type, os_version
+and site_code) and mostly the same values. The ColumnStore keeps each
+attribute and data key of every host in a column instead: a table of the
+distinct values, interned, and an array of the value code of every host.
+
+The hosts themselves are ColumnHost row proxies, which only hold their name
+and row. They are nornir Hosts, so filters, tasks and group inheritance work
+unchanged, and reading or writing host.data reads or writes the columns. As a
+Host subclass, each one still has the slots of Host, but only the name is set,
+the others stay empty pointers.
+"""
+
+# Import modules
+import sys
+from array import array
+from collections.abc import MutableMapping
+from nornir.core.inventory import Host, ParentGroups
+from nornir.plugins.inventory.simple import _get_connection_options
+
+# The base attributes of a host, inherited from groups when None
+BASE_ATTRIBUTES = ("hostname", "port", "username", "password", "platform")
+
+# The value code of hosts which don't have a data key
+MISSING_CODE = 0
+
+# Marks data keys a host doesn't have, in the value table of a column
+MISSING = object()
+
+
+class Column:
+    __slots__ = ("values", "codes", "_codes")
+
+    def __init__(self, size=0):
+        """
+        A dictionary encoded column: the distinct values, and the value code
+        of every row. Rows added before the column existed don't have it.
+
+        :param size: The number of rows the column starts with.
+        :type size: integer
+        """
+        self.values = [MISSING]
+        self.codes = array("I", [MISSING_CODE]) * size
+        # value -> code, to share the codes of equal values while loading
+        self._codes = {}
+
+    def encode(self, value, key=None):
+        """
+        Find the code of a value, adding it to the value table if it's new.
+
+        :param value: The value.
+        :param key: The key to share codes on. Default: the value itself,
+            and its type for anything but strings, so 1 and True differ.
+
+        :return code: The value code.
+        """
+        if value is MISSING:
+            return MISSING_CODE
+        if self._codes is not None:
+            if key is None:
+                key = value if type(value) is str else (type(value), value)
+            try:
+                return self._codes[key]
+            except KeyError:
+                pass
+            except TypeError:
+                # Unhashable values, i.e. lists, aren't shared
+                key = None
+        if type(value) is str:
+            value = sys.intern(value)
+        code = len(self.values)
+        self.values.append(value)
+        if self._codes is not None and key is not None:
+            self._codes[key] = code
+        return code
+
+    def append(self, value, key=None):
+        """
+        Add a row holding a value.
+
+        :param value: The value, or MISSING.
+        :param key: The key to share codes on, see encode.
+        """
+        self.codes.append(self.encode(value, key))
+
+    def get(self, row):
+        """
+        Get the value of a row.
+
+        :param row: The row.
+        :type row: integer
+
+        :return value: The value, or MISSING.
+        """
+        return self.values[self.codes[row]]
+
+    def set(self, row, value, key=None):
+        """
+        Set the value of a row.
+
+        :param row: The row.
+        :type row: integer
+        :param value: The value, or MISSING.
+        :param key: The key to share codes on, see encode.
+        """
+        self.codes[row] = self.encode(value, key)
+
+    def compact(self):
+        """
+        Drop the table used to share codes while loading, which is as large
+        as the value table for columns of unique values, i.e. mgmt_ip. Values
+        set afterwards get their own code.
+        """
+        self._codes = None
+
+
+class ColumnStore:
+    def __init__(self, defaults):
+        """
+        Columns holding the attributes and data of every host of an
+        inventory.
+
+        :param defaults: The defaults of the inventory.
+        :type defaults: nornir.core.inventory.Defaults
+        """
+        self.defaults = defaults
+        self.size = 0
+        # attribute -> Column
+        self.attributes = {name: Column() for name in BASE_ATTRIBUTES}
+        # data key -> Column, in the order the keys were first seen
+        self.data = {}
+        # The parent groups of every host, shared by hosts with the same groups
+        self.groups = Column()
+        # row -> dict, only for the hosts which have any
+        self.connection_options = {}
+        self.connections = {}
+
+    def append(self, attributes, groups, data, connection_options=None):
+        """
+        Add a host record.
+
+        :param attributes: The base attributes of the host.
+        :type attributes: dict
+        :param groups: The parent groups of the host.
+        :type groups: list
+        :param data: The data of the host.
+        :type data: dict
+        :param connection_options: The connection options of the host.
+        :type connection_options: dict
+
+        :return row: The row of the host.
+        """
+        row = self.size
+        self.size += 1
+        for name, column in self.attributes.items():
+            column.append(attributes.get(name))
+        for key in data:
+            if key not in self.data:
+                self.data[sys.intern(key)] = Column(row)
+        for key, column in self.data.items():
+            column.append(data.get(key, MISSING))
+        self.groups.append(ParentGroups(groups), key=tuple(groups))
+        if connection_options:
+            self.connection_options[row] = connection_options
+        return row
+
+    def get(self, row, key):
+        """
+        Get a data key of a host.
+
+        :param row: The row of the host.
+        :type row: integer
+        :param key: The data key.
+        :type key: string
+
+        :return value: The value. KeyError is raised if the host hasn't got it.
+        """
+        column = self.data.get(key)
+        value = MISSING if column is None else column.get(row)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def set(self, row, key, value):
+        """
+        Set a data key of a host.
+
+        :param row: The row of the host.
+        :type row: integer
+        :param key: The data key.
+        :type key: string
+        :param value: The value, or MISSING to remove the key.
+        """
+        column = self.data.get(key)
+        if column is None:
+            if value is MISSING:
+                return
+            column = self.data[key] = Column(self.size)
+        column.set(row, value)
+
+    def keys(self, row):
+        """
+        List the data keys of a host.
+
+        :param row: The row of the host.
+        :type row: integer
+
+        :return keys: A list of data keys.
+        """
+        return [k for k, column in self.data.items() if column.codes[row]]
+
+    def compact(self):
+        """
+        Drop the tables used to share values while loading, see
+        Column.compact. The groups keep theirs, as there are few of them.
+        """
+        for column in self.attributes.values():
+            column.compact()
+        for column in self.data.values():
+            column.compact()
+
+
+class RowData(MutableMapping):
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store, row):
+        """
+        The data of a ColumnHost, read from and written to the columns.
+
+        :param store: The columns.
+        :type store: nornir_perf.columnar.ColumnStore
+        :param row: The row of the host.
+        :type row: integer
+        """
+        self._store = store
+        self._row = row
+
+    def __getitem__(self, key):
+        return self._store.get(self._row, key)
+
+    def __setitem__(self, key, value):
+        self._store.set(self._row, key, value)
+
+    def __delitem__(self, key):
+        self._store.get(self._row, key)
+        self._store.set(self._row, key, MISSING)
+
+    def __iter__(self):
+        return iter(self._store.keys(self._row))
+
+    def __len__(self):
+        return len(self._store.keys(self._row))
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class RowGroups(ParentGroups):
+    def __init__(self, groups, store, row):
+        """
+        A copy of the parent groups of a ColumnHost, which writes any change
+        back to the columns.
+
+        :param groups: The parent groups.
+        :type groups: list
+        :param store: The columns.
+        :type store: nornir_perf.columnar.ColumnStore
+        :param row: The row of the host.
+        :type row: integer
+        """
+        super().__init__(groups)
+        self._store = store
+        self._row = row
+
+    def _save(self):
+        """
+        Write the parent groups back to the columns.
+        """
+        self._store.groups.set(self._row, ParentGroups(self), key=tuple(self))
+
+
+def _written_back(method):
+    """
+    Wrap a list method of RowGroups, so changes are written back.
+
+    :param method: The list method.
+    :type method: callable
+
+    :return method: The wrapped method.
+    """
+
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._save()
+        return result
+
+    wrapper.__name__ = method.__name__
+    return wrapper
+
+
+for _name in (
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "append",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "clear",
+    "sort",
+    "reverse",
+):
+    setattr(RowGroups, _name, _written_back(getattr(list, _name)))
+
+
+def _attribute(name):
+    """
+    Build the property of a base attribute of a ColumnHost.
+
+    :param name: One of BASE_ATTRIBUTES.
+    :type name: string
+
+    :return property: The property, reading and writing the column.
+    """
+
+    def getter(self):
+        return self._store.attributes[name].get(self._row)
+
+    def setter(self, value):
+        self._store.attributes[name].set(self._row, value)
+
+    return property(getter, setter)
+
+
+class ColumnHost(Host):
+    # Host's own slots, from hostname to connections, are still allocated, as
+    # a subclass can't drop them, but are never set: they are empty pointers,
+    # not per host objects, and the properties below shadow them
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, name, store, row):
+        """
+        A nornir Host whose attributes and data are a row of a ColumnStore.
+
+        It subclasses Host, rather than duck typing it, so code checking
+        isinstance(host, Host) and the Host methods nornir and the connection
+        plugins call, i.e. get_connection, open_connection and
+        get_connection_parameters, keep working. Of the Host slots, it only
+        sets name.
+
+        :param name: The host name.
+        :type name: string
+        :param store: The columns.
+        :type store: nornir_perf.columnar.ColumnStore
+        :param row: The row of the host.
+        :type row: integer
+        """
+        self.name = name
+        self._store = store
+        self._row = row
+
+    hostname = _attribute("hostname")
+    port = _attribute("port")
+    username = _attribute("username")
+    password = _attribute("password")
+    platform = _attribute("platform")
+
+    @property
+    def data(self):
+        return RowData(self._store, self._row)
+
+    @data.setter
+    def data(self, value):
+        for key in self._store.data:
+            self._store.set(self._row, key, MISSING)
+        for key, item in (value or {}).items():
+            self._store.set(self._row, key, item)
+
+    @property
+    def groups(self):
+        return RowGroups(self._store.groups.get(self._row), self._store, self._row)
+
+    @groups.setter
+    def groups(self, value):
+        RowGroups(value or (), self._store, self._row)._save()
+
+    @property
+    def defaults(self):
+        return self._store.defaults
+
+    @property
+    def connection_options(self):
+        return self._store.connection_options.setdefault(self._row, {})
+
+    @connection_options.setter
+    def connection_options(self, value):
+        self._store.connection_options[self._row] = value or {}
+
+    @property
+    def connections(self):
+        return self._store.connections.setdefault(self._row, {})
+
+    @connections.setter
+    def connections(self, value):
+        self._store.connections[self._row] = value
+
+    def dict(self):
+        result = super().dict()
+        result["data"] = dict(self.data)
+        return result
+
+    def __getitem__(self, item):
+        try:
+            return self._store.get(self._row, item)
+        except KeyError:
+            return Host.__getitem__(self, item)
+
+
+def columnar_hosts(hosts_dict, groups, defaults):
+    """
+    Build the ColumnHost hosts of parsed inventory data, like
+    SimpleInventory builds its hosts.
+
+    :param hosts_dict: The parsed contents of the hosts file.
+    :type hosts_dict: dict
+    :param groups: The groups the hosts belong to.
+    :type groups: nornir.core.inventory.Groups
+    :param defaults: The defaults of the inventory.
+    :type defaults: nornir.core.inventory.Defaults
+
+    :return hosts: A dict of host name to ColumnHost.
+    """
+    store = ColumnStore(defaults)
+    hosts = {}
+    for name, host in hosts_dict.items():
+        host = column_host(store, name, host, groups)
+        hosts[host.name] = host
+    store.compact()
+    return hosts
+
+
+def column_host(store, name, host, groups):
+    """
+    Add a host of parsed inventory data to a ColumnStore.
+
+    :param store: The columns, i.e. the store of the other hosts.
+    :type store: nornir_perf.columnar.ColumnStore
+    :param name: The host name.
+    :type name: string
+    :param host: The parsed host data.
+    :type host: dict
+    :param groups: The groups the host may belong to.
+    :type groups: nornir.core.inventory.Groups
+
+    :return host: The ColumnHost of the new row.
+    """
+    attributes = {a: host.get(a) for a in BASE_ATTRIBUTES}
+    connection_options = _get_connection_options(host.get("connection_options") or {})
+    row = store.append(
+        attributes,
+        [groups[g] for g in host.get("groups") or ()],
+        host.get("data") or {},
+        connection_options,
+    )
+    name = sys.intern(name)
+    return ColumnHost(name, store, row)
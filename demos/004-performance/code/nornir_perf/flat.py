@@ -0,0 +1,296 @@
+"""
+Flattened group inheritance.
+
+Every inherited lookup on a nornir Host, i.e. host["region"], or
+host.platform when the host doesn't set it, walks the groups of the host and
+their parent groups, in order, until one of them holds the key. A FlatHost
+resolves everything it inherits into a lookup table instead, shared by every
+host with the same groups and defaults, so an inherited lookup is a single
+dict lookup.
+
+The tables are thrown away whenever inherited data may have changed. The
+data and parent groups of FlatGroup and FlatDefaults are tracked, and any
+change to them, or to the groups of a host, bumps a generation counter which
+every table is checked against. Hosts with a group which isn't tracked, i.e.
+a plain Group added later on, fall back to the nornir lookups.
+"""
+
+# Import modules
+from collections import namedtuple
+from functools import wraps
+from nornir.core.inventory import Defaults, Group, Host, ParentGroups
+
+# The attributes inherited from groups and defaults when a host doesn't set them
+BASE_ATTRIBUTES = ("hostname", "port", "username", "password", "platform")
+
+# The attributes of groups and defaults which inherited lookups depend on
+TRACKED_ATTRIBUTES = BASE_ATTRIBUTES + ("data", "groups")
+
+# Everything a host inherits: the data as host[key] sees it, the data as
+# host.extended_data() sees it (which keeps None defaults) and the base
+# attributes
+InheritedTable = namedtuple("InheritedTable", ["data", "extended", "attributes"])
+
+# Bumped by every change to inherited data
+generation = 0
+# (defaults, groups of the host...) -> InheritedTable, for this generation
+_tables = {}
+
+
+def invalidate():
+    """
+    Throw away every inherited lookup table, after inherited data changed.
+    """
+    global generation
+    generation += 1
+    _tables.clear()
+
+
+def _tracked(method):
+    """
+    Wrap a method of a tracked container, so calling it invalidates the
+    inherited lookup tables.
+
+    :param method: The method of the container base class.
+    :type method: callable
+
+    :return method: The wrapped method.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        invalidate()
+        return result
+
+    return wrapper
+
+
+class TrackedDict(dict):
+    """
+    The data dict of a FlatGroup or FlatDefaults.
+    """
+
+    __setitem__ = _tracked(dict.__setitem__)
+    __delitem__ = _tracked(dict.__delitem__)
+    clear = _tracked(dict.clear)
+    pop = _tracked(dict.pop)
+    popitem = _tracked(dict.popitem)
+    setdefault = _tracked(dict.setdefault)
+    update = _tracked(dict.update)
+    # dict |= was added in Python 3.9
+    if hasattr(dict, "__ior__"):
+        __ior__ = _tracked(dict.__ior__)
+
+
+class TrackedParentGroups(ParentGroups):
+    """
+    The parent groups of a FlatHost or FlatGroup.
+    """
+
+    __setitem__ = _tracked(list.__setitem__)
+    __delitem__ = _tracked(list.__delitem__)
+    __iadd__ = _tracked(list.__iadd__)
+    append = _tracked(list.append)
+    extend = _tracked(list.extend)
+    insert = _tracked(list.insert)
+    pop = _tracked(list.pop)
+    remove = _tracked(list.remove)
+    clear = _tracked(list.clear)
+    sort = _tracked(list.sort)
+    reverse = _tracked(list.reverse)
+
+
+def track(name, value):
+    """
+    Swap the data dict or parent groups being assigned to an inventory
+    element for a tracked one.
+
+    :param name: The attribute being assigned.
+    :type name: string
+    :param value: The value being assigned.
+
+    :return value: The value to assign.
+    """
+    if name == "data" and not isinstance(value, TrackedDict):
+        return TrackedDict(value)
+    if name == "groups" and not isinstance(value, TrackedParentGroups):
+        return TrackedParentGroups(value)
+    return value
+
+
+class FlatGroup(Group):
+    def __setattr__(self, name, value):
+        super().__setattr__(name, track(name, value))
+        if name in TRACKED_ATTRIBUTES:
+            invalidate()
+
+
+class FlatDefaults(Defaults):
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, track(name, value))
+        if name in TRACKED_ATTRIBUTES:
+            invalidate()
+
+
+def flat_defaults(defaults):
+    """
+    Copy nornir defaults into FlatDefaults.
+
+    :param defaults: The defaults to copy.
+    :type defaults: nornir.core.inventory.Defaults
+
+    :return defaults: The FlatDefaults.
+    """
+    return FlatDefaults(
+        hostname=defaults.hostname,
+        port=defaults.port,
+        username=defaults.username,
+        password=defaults.password,
+        platform=defaults.platform,
+        data=defaults.data,
+        connection_options=defaults.connection_options,
+    )
+
+
+def inherited_table(host):
+    """
+    Resolve everything a host inherits from its groups and defaults.
+
+    :param host: The host.
+    :type host: nornir_perf.flat.FlatHost
+
+    :return table: An InheritedTable, or None if the groups or defaults of
+    the host aren't tracked.
+    """
+    defaults = object.__getattribute__(host, "defaults")
+    groups = object.__getattribute__(host, "groups")
+    key = (defaults,) + tuple(groups)
+    try:
+        return _tables[key]
+    except KeyError:
+        pass
+    extended_groups = host.extended_groups()
+    if not isinstance(defaults, FlatDefaults) or not all(
+        isinstance(g, FlatGroup) for g in extended_groups
+    ):
+        table = None
+    else:
+        table = _build_table(extended_groups, defaults)
+    _tables[key] = table
+    return table
+
+
+def _build_table(groups, defaults):
+    """
+    Resolve the data and attributes inherited from a chain of groups and
+    the defaults.
+
+    :param groups: The groups of a host and their parent groups, in lookup
+        order, as host.extended_groups() lists them.
+    :type groups: list
+    :param defaults: The defaults of the host.
+    :type defaults: nornir_perf.flat.FlatDefaults
+
+    :return table: An InheritedTable.
+    """
+    # The first group holding a key wins, then the defaults
+    data = {}
+    for group in groups:
+        for k, v in group.data.items():
+            data.setdefault(k, v)
+    extended = dict(data)
+    for k, v in defaults.data.items():
+        extended.setdefault(k, v)
+        # host[key] skips defaults which are None
+        if v is not None:
+            data.setdefault(k, v)
+    attributes = {
+        name: _inherited_attribute(name, groups, defaults) for name in BASE_ATTRIBUTES
+    }
+    return InheritedTable(data, extended, attributes)
+
+
+def _inherited_attribute(name, groups, defaults):
+    """
+    Walk a chain of groups for a base attribute, i.e. platform.
+
+    :param name: The attribute name.
+    :type name: string
+    :param groups: The groups, in lookup order.
+    :type groups: list
+    :param defaults: The defaults, used when no group sets the attribute.
+    :type defaults: nornir_perf.flat.FlatDefaults
+
+    :return value: The value of the first group which isn't None, or the
+    value of the defaults.
+    """
+    for group in groups:
+        value = object.__getattribute__(group, name)
+        if value is not None:
+            return value
+    return object.__getattribute__(defaults, name)
+
+
+class FlatHost(Host):
+    __slots__ = ("_flat",)
+
+    def __init__(self, *args, **kwargs):
+        """
+        A nornir Host which looks up everything it inherits from its groups
+        and defaults in a lookup table, see nornir_perf.flat. It takes the
+        same arguments as Host.
+        """
+        self._flat = None
+        super().__init__(*args, **kwargs)
+
+    def __setattr__(self, name, value):
+        if name in ("groups", "defaults"):
+            value = track(name, value)
+            object.__setattr__(self, "_flat", None)
+        super().__setattr__(name, value)
+
+    def inherited(self):
+        """
+        Get the lookup table of everything the host inherits, resolving it
+        again if inherited data changed since it was last resolved.
+
+        :return table: An InheritedTable, or None if the groups or defaults
+        of the host aren't tracked.
+        """
+        flat = object.__getattribute__(self, "_flat")
+        if flat is not None and flat[0] == generation:
+            return flat[1]
+        table = inherited_table(self)
+        object.__setattr__(self, "_flat", (generation, table))
+        return table
+
+    def __getattribute__(self, name):
+        value = object.__getattribute__(self, name)
+        if value is None and name in BASE_ATTRIBUTES:
+            table = self.inherited()
+            if table is None:
+                return Host.__getattribute__(self, name)
+            return table.attributes[name]
+        return value
+
+    def __getitem__(self, item):
+        try:
+            return self.data[item]
+        except KeyError:
+            table = self.inherited()
+            if table is None:
+                return Host.__getitem__(self, item)
+            return table.data[item]
+
+    def extended_data(self):
+        table = self.inherited()
+        if table is None:
+            return Host.extended_data(self)
+        result = dict(self.data)
+        for k, v in table.extended.items():
+            if k not in result:
+                result[k] = v
+        return result
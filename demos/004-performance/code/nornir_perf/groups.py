@@ -0,0 +1,109 @@
+"""
+Group membership index.
+
+Inventory.children_of_group walks every host, and the group ancestry of each
+host, on every call. The GroupIndex works out the groups of every host once,
+including the groups it belongs to through its parent groups, and keeps the
+reverse mapping of group name to hosts, so children_of_group is a lookup.
+
+The index doesn't watch the inventory. Hosts and groups added, removed or
+re-parented must be passed to add_host, remove_host, update_host and
+update_group, which only recompute the hosts affected by the change.
+"""
+
+
+class GroupIndex:
+    def __init__(self, hosts):
+        """
+        Build the group membership index of a set of hosts.
+
+        :param hosts: The hosts to index.
+        :type hosts: nornir.core.inventory.Hosts
+        """
+        # group name -> names of the group and all its ancestor groups
+        self._ancestors = {}
+        # host name -> (host, names of every group the host belongs to)
+        self.memberships = {}
+        # group name -> set of the hosts belonging to the group
+        self.members = {}
+        for host in hosts.values():
+            self.add_host(host)
+
+    def ancestors(self, group, _seen=()):
+        """
+        Find the names of a group and every group it inherits from.
+
+        :param group: The group.
+        :type group: nornir.core.inventory.Group
+
+        :return names: A frozenset of group names.
+        """
+        names = self._ancestors.get(group.name)
+        if names is None:
+            names = {group.name}
+            for parent in group.groups:
+                # Guard against groups which are their own ancestor
+                if parent.name not in _seen:
+                    names |= self.ancestors(parent, _seen + (group.name,))
+            names = self._ancestors[group.name] = frozenset(names)
+        return names
+
+    def add_host(self, host):
+        """
+        Add a host to the index, or refresh its memberships.
+
+        :param host: The host to add.
+        :type host: nornir.core.inventory.Host
+        """
+        self.remove_host(host.name)
+        names = frozenset().union(*(self.ancestors(g) for g in host.groups))
+        self.memberships[host.name] = (host, names)
+        for name in names:
+            self.members.setdefault(name, set()).add(host)
+
+    def remove_host(self, name):
+        """
+        Remove a host from the index, if it is in it.
+
+        :param name: The host name.
+        :type name: string
+        """
+        host, names = self.memberships.pop(name, (None, ()))
+        for group in names:
+            self.members[group].discard(host)
+
+    def update_host(self, host):
+        """
+        Refresh the memberships of a host, i.e. after its groups changed.
+
+        :param host: The host which changed.
+        :type host: nornir.core.inventory.Host
+        """
+        self.add_host(host)
+
+    def update_group(self, name):
+        """
+        Refresh the memberships affected by a group being added, removed or
+        having its parent groups changed.
+
+        :param name: The group name.
+        :type name: string
+        """
+        # Only the hosts which belonged to the group can gain or lose groups
+        # through it, but any cached ancestry may go through the group
+        affected = list(self.members.get(name, ()))
+        self._ancestors.clear()
+        for host in affected:
+            self.add_host(host)
+
+    def children(self, name):
+        """
+        Find the hosts which belong to a group, directly or through their
+        parent groups.
+
+        :param name: The group name.
+        :type name: string
+
+        :return hosts: A new set of hosts.
+        """
+        return set(self.members.get(name, ()))
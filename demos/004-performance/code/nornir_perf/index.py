@@ -0,0 +1,637 @@
+"""
+Inventory indexes, used to answer nornir filters without scanning every host.
+
+The AttributeIndex gives every host a dense integer id, and maps every
+(attribute, value) pair to the ids of the hosts holding that value,
+including the data inherited from groups, i.e. `region` and `hemisphere`
+from the site groups. Lookups return bitmaps of host ids, see bitmap.py.
+
+Filters are answered with exactly the same semantics as nornir's own
+filtering. Rather than re-implementing the F operators, each operator is
+evaluated once per distinct attribute value (using nornir's own code) and
+the hosts holding the matching values are returned. Equality and `__any`
+lookups on plain scalar values skip even that, and use a direct hash lookup,
+while `ge`/`gt`/`le`/`lt` on integer values use a bisect on a RangeIndex.
+"""
+
+# Import modules
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from nornir.core.filter import F
+from nornir.core.inventory import Host
+from nornir_perf.bitmap import bitmap_from_ids, ids_from_bitmap
+
+
+# Host attributes which filters can reach, besides the host data
+BASE_ATTRIBUTES = ("name", "hostname", "platform", "port", "username", "password")
+
+# Value types whose __eq__ never returns NotImplemented against their own
+# type (or a subclass of it), so hash lookups give the same answer as nornir
+SAFE_TYPES = (str, int, float, bool, type(None))
+
+# Value types served by a RangeIndex. Floats aren't, as NaN can't be sorted
+INTEGER_TYPES = (int, bool)
+
+# F operators answered by a RangeIndex
+RANGE_OPERATORS = ("ge", "gt", "le", "lt")
+
+# Rules which nornir treats as operators, rather than attribute names
+RULE_OPERATORS = ("in", "any", "all")
+
+# Values held by at least 1/DENSE_RATIO of the hosts keep a cached bitmap,
+# the rest are stored as a compact array of host ids only
+DENSE_RATIO = 64
+
+# Sentinel for hosts which don't have an attribute at all
+MISSING = object()
+
+
+def host_attributes(host):
+    """
+    Resolve every attribute of a host which filters can reach, including
+    the data it inherits from its groups and the defaults.
+
+    :param host: The nornir host to resolve.
+    :type host: nornir.core.inventory.Host
+
+    :return attributes: A dict of attribute name to value.
+    """
+    attributes = {}
+    for k, v in host.extended_data().items():
+        # Data keys named like a Host attribute or method are shadowed by it
+        if hasattr(Host, k):
+            continue
+        # nornir reports a None inherited from the defaults as a missing key
+        if v is None and host.get(k, MISSING) is MISSING:
+            continue
+        attributes[k] = v
+    for k in BASE_ATTRIBUTES:
+        attributes[k] = host.get(k)
+    return attributes
+
+
+def verify_rule(value, operator, target):
+    """
+    Evaluate a single F operator against an attribute value, exactly the way
+    nornir does when it has already resolved the attribute of a host.
+
+    :param value: The attribute value of the host.
+    :param operator: The F operator, i.e. eq, ge, any, contains.
+    :type operator: string
+    :param target: The value passed to the F filter.
+
+    :return bool: True if the value matches, False otherwise.
+    """
+    try:
+        return F._verify_rules(value, [operator], target)
+    except AttributeError:
+        return False
+
+
+def is_hashable(value):
+    """
+    Check whether a value can be used as a dict key.
+
+    :param value: The value to check.
+
+    :return bool: True if the value is hashable.
+    """
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def is_lookup_key(value):
+    """
+    Check whether a filter value can be answered by a hash lookup. Besides
+    being hashable, it must equal itself, which NaN doesn't (but a dict
+    lookup would still find it, as dicts compare by identity first).
+
+    :param value: The value to check.
+
+    :return bool: True if the value can be looked up.
+    """
+    return is_hashable(value) and value == value
+
+
+class RangeIndex:
+    def __init__(self, keys):
+        """
+        A sorted index over the distinct integer values of one attribute, so
+        range queries cost a bisect plus the size of the result.
+
+        :param keys: The distinct integer values of the attribute.
+        :type keys: iterable
+        """
+        self.keys = sorted(keys)
+
+    def select(self, operator, target):
+        """
+        Find the values which compare with the target.
+
+        :param operator: One of ge, gt, le or lt.
+        :type operator: string
+        :param target: The integer to compare with.
+        :type target: integer
+
+        :return keys: The matching values.
+        """
+        if operator == "ge":
+            start = bisect_left(self.keys, target)
+            return self.keys[start:]
+        if operator == "gt":
+            start = bisect_right(self.keys, target)
+            return self.keys[start:]
+        if operator == "le":
+            return self.keys[: bisect_right(self.keys, target)]
+        if operator == "lt":
+            return self.keys[: bisect_left(self.keys, target)]
+        raise ValueError(f"Unsupported range operator: {operator}")
+
+
+class AttributeIndex:
+    def __init__(self, hosts):
+        """
+        Build an inverted index over every attribute of a set of hosts.
+
+        :param hosts: The hosts to index.
+        :type hosts: nornir.core.inventory.Hosts
+        """
+        # Dense host ids, which are also the position in the inventory
+        self.names = list(hosts)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.size = len(self.names)
+        self.universe = (1 << self.size) - 1
+        # attribute -> {(type, value): array of host ids}
+        self.postings = {}
+        # attribute -> [(value, host id)] for values such as lists
+        self.unhashable = {}
+        # attribute -> bitmap of the hosts which don't have the attribute
+        self.missing = {}
+        # (attribute, integer type) -> RangeIndex
+        self.ranges = {}
+        # (attribute, (type, value)) -> bitmap, for the frequent values
+        self._dense = {}
+        # Bumped whenever hosts get new ids, so bitmaps of the previous ids
+        # can be told apart
+        self.generation = 0
+        for i, host in enumerate(hosts.values()):
+            for attr, value in host_attributes(host).items():
+                if is_hashable(value):
+                    postings = self.postings.setdefault(attr, {})
+                    postings.setdefault((type(value), value), array("l")).append(i)
+                else:
+                    self.unhashable.setdefault(attr, []).append((value, i))
+        # Work out which hosts don't have each attribute
+        for attr in set(self.postings) | set(self.unhashable):
+            present = [i for ids in self.postings.get(attr, {}).values() for i in ids]
+            present.extend(i for _, i in self.unhashable.get(attr, ()))
+            self.missing[attr] = self.universe & ~bitmap_from_ids(present, self.size)
+        # Build a sorted range index for every attribute with integer values
+        for attr in self.postings:
+            self._build_ranges(attr)
+
+    def _build_ranges(self, attr):
+        """
+        Build the sorted range indexes of the integer values of an attribute.
+
+        :param attr: The attribute name.
+        :type attr: string
+        """
+        postings = self.postings.get(attr, {})
+        for typ in INTEGER_TYPES:
+            keys = [v for t, v in postings if t is typ]
+            if keys:
+                self.ranges[(attr, typ)] = RangeIndex(keys)
+            else:
+                self.ranges.pop((attr, typ), None)
+
+    def _discard(self, attr, value, i):
+        """
+        Take a host out of the posting of one of its values.
+
+        :param attr: The attribute name.
+        :type attr: string
+        :param value: The value the host was indexed with.
+        :param i: The host id.
+        :type i: integer
+
+        :return bool: True if the value has no hosts left.
+        """
+        if not is_hashable(value):
+            values = self.unhashable.get(attr, [])
+            self.unhashable[attr] = [(v, j) for v, j in values if j != i]
+            return False
+        postings = self.postings.get(attr, {})
+        keys = [(type(value), value)]
+        if keys[0] not in postings:
+            # i.e. a NaN, which isn't the object it was indexed with
+            keys = list(postings)
+        for key in keys:
+            posting = postings[key]
+            position = bisect_left(posting, i)
+            if position < len(posting) and posting[position] == i:
+                del posting[position]
+                self._dense.pop((attr, key), None)
+                if not posting:
+                    del postings[key]
+                    return True
+                return False
+        return False
+
+    def _renumber(self, hosts):
+        """
+        Give the hosts left after some were removed the ids of their new
+        positions, in every posting and bitmap.
+
+        :param hosts: The hosts of the inventory, in order.
+        :type hosts: nornir.core.inventory.Hosts
+        """
+        self.generation += 1
+        ids = {name: i for i, name in enumerate(hosts)}
+        # Old id -> new id, or None for the removed hosts
+        renumbered = [ids.get(name) for name in self.names]
+        for postings in self.postings.values():
+            for key, posting in postings.items():
+                postings[key] = array("l", (renumbered[i] for i in posting))
+        for attr, values in self.unhashable.items():
+            self.unhashable[attr] = [(v, renumbered[i]) for v, i in values]
+        size = len(hosts)
+        for attr, bitmap in self.missing.items():
+            self.missing[attr] = bitmap_from_ids(
+                (
+                    renumbered[i]
+                    for i in ids_from_bitmap(bitmap)
+                    if renumbered[i] is not None
+                ),
+                size,
+            )
+        self._dense.clear()
+
+    def update_hosts(self, hosts, previous, current):
+        """
+        Update the index after hosts were added, removed or changed, without
+        resolving the attributes of any other host again. The ids of the
+        hosts stay their positions in the inventory, so removing hosts
+        renumbers the ones after them, and bumps the generation.
+
+        :param hosts: The hosts of the inventory, after the changes.
+        :type hosts: nornir.core.inventory.Hosts
+        :param previous: Host name -> the attributes the host was indexed
+            with, for every host removed or changed.
+        :type previous: dict
+        :param current: Host name -> the attributes of the host, see
+            host_attributes(), for every host added or changed.
+        :type current: dict
+        """
+        # Attributes which gained or lost a distinct value
+        reranged = self._discard_hosts(previous)
+        if any(name not in hosts for name in previous if name in self.ids):
+            self._renumber(hosts)
+        # New hosts are at the end of the inventory, the others keep their ids
+        self.names = list(hosts)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.size = len(self.names)
+        self.universe = (1 << self.size) - 1
+        for attributes in current.values():
+            for attr in attributes:
+                if attr not in self.missing:
+                    # No other host has the attribute
+                    self.missing[attr] = self.universe
+        for name, attributes in current.items():
+            reranged |= self._add_host(self.ids[name], attributes)
+        for attr in reranged:
+            self._build_ranges(attr)
+
+    def _discard_hosts(self, previous):
+        """
+        Take removed or changed hosts out of the postings of the values they
+        were indexed with.
+
+        :param previous: Host name -> the attributes the host was indexed
+            with.
+        :type previous: dict
+
+        :return attributes: The set of attributes which lost a distinct value.
+        """
+        reranged = set()
+        for name, attributes in previous.items():
+            i = self.ids.get(name)
+            if i is None:
+                continue
+            for attr, value in attributes.items():
+                if self._discard(attr, value, i):
+                    reranged.add(attr)
+        return reranged
+
+    def _add_host(self, i, attributes):
+        """
+        Index the attributes of an added or changed host.
+
+        :param i: The host id.
+        :type i: integer
+        :param attributes: The attributes of the host, see host_attributes().
+        :type attributes: dict
+
+        :return attributes: The set of attributes which gained a distinct
+        value.
+        """
+        reranged = set()
+        bit = 1 << i
+        for attr in self.missing:
+            if attr in attributes:
+                self.missing[attr] &= ~bit
+            else:
+                self.missing[attr] |= bit
+        for attr, value in attributes.items():
+            if not is_hashable(value):
+                self.unhashable.setdefault(attr, []).append((value, i))
+                continue
+            key = (type(value), value)
+            postings = self.postings.setdefault(attr, {})
+            if key not in postings:
+                postings[key] = array("l")
+                reranged.add(attr)
+            insort(postings[key], i)
+            self._dense.pop((attr, key), None)
+        return reranged
+
+    def indexed(self, attr):
+        """
+        Check whether filters on an attribute can be answered by the index.
+
+        :param attr: The attribute name.
+        :type attr: string
+
+        :return bool: True if the index can answer filters on the attribute.
+        """
+        # Host methods and attributes such as `groups` or `data` aren't
+        # indexed, but a key no host has at all is still answerable
+        return attr in self.missing or not (
+            hasattr(Host, attr) or attr in RULE_OPERATORS
+        )
+
+    def rule_indexed(self, key):
+        """
+        Check whether an F keyword argument can be answered by the index.
+
+        :param key: The F keyword, i.e. site_code__eq or site_code.
+        :type key: string
+
+        :return bool: True if the index can answer the rule.
+        """
+        rule = key.split("__")
+        if len(rule) == 2 or (len(rule) == 1 and rule[0] not in RULE_OPERATORS):
+            return self.indexed(rule[0])
+        return False
+
+    def _gather(self, attr, keys, ids=()):
+        """
+        Combine the postings of several values of an attribute into a bitmap.
+
+        :param attr: The attribute name.
+        :type attr: string
+        :param keys: The (type, value) posting keys to combine.
+        :type keys: iterable
+        :param ids: Extra host ids to include.
+        :type ids: iterable
+
+        :return bitmap: The bitmap of hosts holding any of the values.
+        """
+        postings = self.postings.get(attr, {})
+        bitmap = 0
+        sparse = list(ids)
+        for key in keys:
+            posting = postings.get(key)
+            if posting is None:
+                continue
+            if len(posting) * DENSE_RATIO < self.size:
+                sparse.extend(posting)
+                continue
+            # Frequent values keep their bitmap, so they're combined with a
+            # single bitwise OR on the next lookup
+            dense = self._dense.get((attr, key))
+            if dense is None:
+                dense = self._dense[(attr, key)] = bitmap_from_ids(posting, self.size)
+            bitmap |= dense
+        if sparse:
+            bitmap |= bitmap_from_ids(sparse, self.size)
+        return bitmap
+
+    def _scan_values(self, attr, predicate, skip_type=None):
+        """
+        Evaluate a predicate once per distinct value of an attribute.
+
+        :param attr: The attribute name.
+        :type attr: string
+        :param predicate: A function of the value, returning a boolean.
+        :type predicate: callable
+        :param skip_type: A function of a value type, returning True when the
+            values of that type were already answered by a hash lookup.
+        :type skip_type: callable
+
+        :return bitmap: The bitmap of hosts whose value matches.
+        """
+        keys = [
+            (typ, value)
+            for typ, value in self.postings.get(attr, {})
+            if not (skip_type is not None and skip_type(typ)) and predicate(value)
+        ]
+        ids = [i for value, i in self.unhashable.get(attr, ()) if predicate(value)]
+        return self._gather(attr, keys, ids)
+
+    def _value_types(self, attr):
+        """
+        Return the distinct value types of an attribute.
+
+        :param attr: The attribute name.
+        :type attr: string
+
+        :return types: A set of value types.
+        """
+        return {typ for typ, _ in self.postings.get(attr, {})}
+
+    def _hash_lookup(self, attr, targets, usable_type):
+        """
+        Collect the hosts holding any of the target values, by hash lookup.
+
+        :param attr: The attribute name.
+        :type attr: string
+        :param targets: The values to look up.
+        :type targets: list
+        :param usable_type: A function of a value type, returning True when
+            hash lookups are valid for values of that type.
+        :type usable_type: callable
+
+        :return bitmap: The bitmap of matching hosts.
+        """
+        keys = [
+            (typ, target)
+            for typ in self._value_types(attr)
+            if usable_type(typ)
+            for target in targets
+        ]
+        return self._gather(attr, keys)
+
+    def lookup(self, attr, operator, target):
+        """
+        Find the hosts matching a single F rule, i.e. F(attr__operator=target).
+
+        :param attr: The attribute name.
+        :type attr: string
+        :param operator: The F operator, i.e. eq, ge, any, contains.
+        :type operator: string
+        :param target: The value passed to the F filter.
+
+        :return bitmap: The bitmap of matching hosts, or None if the index
+        can't answer the rule.
+        """
+        if not self.indexed(attr):
+            return None
+
+        def predicate(value):
+            return verify_rule(value, operator, target)
+
+        # F resolves a missing attribute to an empty dict before comparing,
+        # which is only evaluated when some hosts really miss the attribute
+        missing = self.missing.get(attr, self.universe)
+        bitmap = missing if missing and predicate({}) else 0
+        handler = self._LOOKUPS.get(operator)
+        result = None
+        if handler is not None:
+            result = handler(self, attr, operator, target, predicate)
+        if result is None:
+            result = self._scan_values(attr, predicate)
+        return bitmap | result
+
+    def _lookup_eq(self, attr, operator, target, predicate):
+        """
+        Find the hosts matching an eq rule, by hash lookup.
+
+        :param attr: The attribute name.
+        :type attr: string
+        :param operator: The F operator, eq.
+        :type operator: string
+        :param target: The value passed to the F filter.
+        :param predicate: The rule, as a function of a value.
+        :type predicate: callable
+
+        :return bitmap: The bitmap of matching hosts, or None if the target
+        can't be looked up.
+        """
+        if not is_lookup_key(target):
+            return None
+
+        # Values of the target type (or a supertype) compare normally, the
+        # rest are evaluated, as their __eq__ may be NotImplemented
+        def usable(typ):
+            return typ in SAFE_TYPES and issubclass(type(target), typ)
+
+        bitmap = self._hash_lookup(attr, [target], usable)
+        return bitmap | self._scan_values(attr, predicate, usable)
+
+    def _lookup_any(self, attr, operator, target, predicate):
+        """
+        Find the hosts matching an any rule, by hash lookup of every target.
+
+        :param attr: The attribute name.
+        :type attr: string
+        :param operator: The F operator, any.
+        :type operator: string
+        :param target: The values passed to the F filter.
+        :param predicate: The rule, as a function of a value.
+        :type predicate: callable
+
+        :return bitmap: The bitmap of matching hosts, or None if the targets
+        can't be looked up.
+        """
+        if not isinstance(target, (list, tuple, set)):
+            return None
+        if not all(is_lookup_key(t) for t in target):
+            return None
+
+        # Scalar values match when equal to any target, list values are
+        # evaluated as they are checked for membership instead
+        def usable(typ):
+            return typ in SAFE_TYPES
+
+        bitmap = self._hash_lookup(attr, list(target), usable)
+        return bitmap | self._scan_values(attr, predicate, usable)
+
+    def _lookup_range(self, attr, operator, target, predicate):
+        """
+        Find the hosts matching a ge, gt, le or lt rule, from the RangeIndex.
+
+        :param attr: The attribute name.
+        :type attr: string
+        :param operator: The F operator, i.e. ge.
+        :type operator: string
+        :param target: The value passed to the F filter.
+        :param predicate: The rule, as a function of a value.
+        :type predicate: callable
+
+        :return bitmap: The bitmap of matching hosts, or None if the target
+        isn't an integer.
+        """
+        if not isinstance(target, INTEGER_TYPES):
+            return None
+
+        # Integer values are bisected, any other value type is evaluated
+        def usable(typ):
+            return (attr, typ) in self.ranges and issubclass(type(target), typ)
+
+        bitmap = 0
+        for typ in self._value_types(attr):
+            if usable(typ):
+                keys = self.ranges[(attr, typ)].select(operator, target)
+                bitmap |= self._gather(attr, [(typ, k) for k in keys])
+        return bitmap | self._scan_values(attr, predicate, usable)
+
+    # F operator -> the lookup answering it, any other operator is evaluated
+    # once per distinct value
+    _LOOKUPS = dict.fromkeys(RANGE_OPERATORS, _lookup_range)
+    _LOOKUPS.update(eq=_lookup_eq, any=_lookup_any)
+
+    def lookup_equal(self, attr, target):
+        """
+        Find the hosts matching a keyword filter, i.e. nr.filter(attr=target).
+
+        :param attr: The attribute name.
+        :type attr: string
+        :param target: The value to compare with.
+
+        :return bitmap: The bitmap of matching hosts, or None if the index
+        can't answer the filter.
+        """
+        if not self.indexed(attr) or not is_lookup_key(target):
+            return None
+        # Keyword filters resolve a missing attribute to None
+        missing = self.missing.get(attr, self.universe)
+        bitmap = missing if target is None else 0
+
+        def usable(typ):
+            return typ in SAFE_TYPES
+
+        bitmap |= self._hash_lookup(attr, [target], usable)
+        return bitmap | self._scan_values(attr, lambda v: v == target, usable)
+
+    def lookup_rule(self, key, target):
+        """
+        Find the hosts matching a single F keyword argument.
+
+        :param key: The F keyword, i.e. site_code__eq or site_code.
+        :type key: string
+        :param target: The value passed to the F filter.
+
+        :return bitmap: The bitmap of matching hosts, or None if the index
+        can't answer the rule.
+        """
+        rule = key.split("__")
+        if len(rule) == 2:
+            return self.lookup(rule[0], rule[1], target)
+        # A bare F(attr=value) compares with ==, like a keyword filter
+        if len(rule) == 1 and rule[0] not in RULE_OPERATORS:
+            return self.lookup_equal(rule[0], target)
+        return None
@@ -0,0 +1,299 @@
+"""
+JSONInventory - an inventory plugin reading the motherstarter JSON inputs.
+
+motherstarter renders inputs/inventory.json and inputs/groups.json into
+hosts.yaml and groups.yaml, through the templates/nornir Jinja templates,
+and nornir parses the YAML back. JSONInventory builds the same hosts and
+groups straight from the JSON files, skipping both steps.
+
+Every field goes through the same mapping as the templates: the
+operating_system, environment and site_code of a device become its groups,
+the vendor is lowercased, the sla of a group is an integer, and every value
+is typed the way the YAML parser types the rendered text (i.e. "false" is a
+boolean, "4.22" is a float). The top-level arrays are decoded one device at
+a time, so the raw JSON of a large inventory is never held in memory all at
+once.
+"""
+
+# Import modules
+import json
+import os
+from nornir_perf.loader import resolve_scalar
+from nornir_perf.plugin import PerfInventory, read_yaml
+
+# Number of characters read from the JSON files at a time
+CHUNK_SIZE = 1024 * 1024
+# The fields of a site group, as rendered by groups.j2
+SITE_FIELDS = ("full_name", "country", "region", "hemisphere", "site_type")
+
+# The characters which may follow the digits of a number cut short, i.e. 2.
+NUMBER_CHARACTERS = "0123456789.eE+-"
+
+# Not in the JSON object, which Jinja renders as an empty string
+_MISSING = object()
+
+
+def _skip_separators(buffer, position):
+    """
+    Skip the whitespace and separators before the next item of a JSON array.
+
+    :param buffer: The text read so far.
+    :type buffer: string
+    :param position: The position to skip from.
+    :type position: integer
+
+    :return position: The position of the next item, or the end of the buffer.
+    """
+    while position < len(buffer) and buffer[position] in " \t\r\n,":
+        position += 1
+    return position
+
+
+def _decode_item(decoder, buffer, position, eof):
+    """
+    Decode the item at a position of the buffer, unless it may be cut short.
+
+    :param decoder: The JSON decoder.
+    :type decoder: json.JSONDecoder
+    :param buffer: The text read so far.
+    :type buffer: string
+    :param position: The position of the item.
+    :type position: integer
+    :param eof: Whether the whole file was read.
+    :type eof: boolean
+
+    :return item: A tuple of (item, end), or (None, None) if the item needs
+    more of the file.
+    """
+    try:
+        item, end = decoder.raw_decode(buffer, position)
+    except json.JSONDecodeError:
+        return None, None
+    if eof:
+        return item, end
+    # An item ending with the buffer may be cut short, and so may a number
+    # followed by what may be the rest of it, i.e. "2." of 2.5
+    rest = buffer[end:]
+    if not rest or (type(item) in (int, float) and not rest.lstrip(NUMBER_CHARACTERS)):
+        return None, None
+    return item, end
+
+
+def _refill(f, buffer, position, chunk_size):
+    """
+    Keep the rest of the buffer, and read the next chunk.
+
+    :param f: The JSON file.
+    :param buffer: The text read so far.
+    :type buffer: string
+    :param position: The position of the first character to keep.
+    :type position: integer
+    :param chunk_size: The number of characters to read.
+    :type chunk_size: integer
+
+    :return buffer: A tuple of (buffer, eof).
+    """
+    chunk = f.read(chunk_size)
+    return buffer[position:] + chunk, not chunk
+
+
+def iter_array(path, encoding="utf-8", chunk_size=CHUNK_SIZE):
+    """
+    Decode the items of a JSON file holding a top-level array, one at a time.
+
+    :param path: The path of the JSON file.
+    :type path: string
+    :param encoding: The encoding of the JSON file.
+    :type encoding: string
+    :param chunk_size: The number of characters to read at a time.
+    :type chunk_size: integer
+
+    :return items: A generator of the decoded items.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding=encoding) as f:
+        buffer, position, eof, started = "", 0, False, False
+        while True:
+            position = _skip_separators(buffer, position)
+            if position < len(buffer):
+                if not started:
+                    if buffer[position] != "[":
+                        raise ValueError(f"{path}: expected a JSON array")
+                    started, position = True, position + 1
+                    continue
+                if buffer[position] == "]":
+                    return
+                item, end = _decode_item(decoder, buffer, position, eof)
+                if end is not None:
+                    yield item
+                    position = end
+                    continue
+            if eof:
+                raise ValueError(f"{path}: invalid or unterminated JSON array")
+            buffer, eof = _refill(f, buffer, position, chunk_size)
+            position = 0
+
+
+def scalar(value):
+    """
+    Type a value the way it comes out of rendering it into a template and
+    parsing the YAML back, i.e. "70" is an integer and "false" a boolean.
+
+    :param value: The value from the JSON file.
+
+    :return value: The typed value.
+    """
+    # Jinja renders values with str(), and undefined values as nothing
+    return resolve_scalar("" if value is _MISSING else str(value).strip())
+
+
+def _integer(value):
+    """
+    Convert a value to an integer, the way the Jinja int filter does.
+
+    :param value: The value from the JSON file.
+
+    :return integer: The integer, or 0 if the value isn't a number.
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _lower(value):
+    """
+    Lowercase a value, the way the Jinja lower filter does.
+
+    :param value: The value from the JSON file.
+
+    :return text: The lowercased text.
+    """
+    return "" if value is _MISSING else str(value).lower()
+
+
+def host_entry(device):
+    """
+    Map a device of inventory.json to a host, as hosts.j2 renders it.
+
+    :param device: The device.
+    :type device: dict
+
+    :return entry: A tuple of (name, host data), in the parsed hosts.yaml
+    format.
+    """
+    field = device.get
+    name = scalar(field("name", _MISSING))
+    return name, {
+        "hostname": name,
+        "groups": [
+            scalar(field("operating_system", _MISSING)),
+            scalar(field("environment", _MISSING)),
+            scalar(field("site_code", _MISSING)),
+        ],
+        "data": {
+            "mgmt_ip": scalar(field("mgmt_ip", _MISSING)),
+            "vendor": scalar(_lower(field("vendor", _MISSING))),
+            "device_type": scalar(field("device_type", _MISSING)),
+            "os_version": scalar(field("os_version", _MISSING)),
+            "site_code": scalar(field("site_code", _MISSING)),
+        },
+    }
+
+
+def group_entry(group):
+    """
+    Map a group of groups.json to a group, as groups.j2 renders it.
+
+    groups.j2 picks the fields of a group by its name. Environment groups
+    are recognised by their sla, and site groups by their site fields,
+    instead, so new environments and sites don't need a mapping of their own.
+
+    :param group: The group.
+    :type group: dict
+
+    :return entry: A tuple of (name, group data), in the parsed groups.yaml
+    format.
+    """
+    field = group.get
+    name = scalar(field("name", _MISSING))
+    if "sla" in group:
+        data = {
+            "sla": _integer(field("sla")),
+            "production": scalar(field("production", _MISSING)),
+        }
+        return name, {"data": data}
+    if any(f in group for f in SITE_FIELDS):
+        return name, {"data": {f: scalar(field(f, _MISSING)) for f in SITE_FIELDS}}
+    return name, {
+        "platform": scalar(field("platform", _MISSING)),
+        "data": {"vendor": scalar(_lower(field("vendor", _MISSING)))},
+    }
+
+
+class JSONInventory(PerfInventory):
+    def __init__(
+        self,
+        host_file="inputs/inventory.json",
+        group_file="inputs/groups.json",
+        defaults_file="defaults.yaml",
+        **kwargs,
+    ):
+        """
+        Inventory plugin which builds the inventory straight from the
+        motherstarter JSON inputs, instead of the YAML files rendered from
+        them. Every other option is the same as PerfInventory, i.e. the
+        snapshot, index or cache.
+
+        :param host_file: The path of the inventory.json devices file.
+        :type host_file: string
+        :param group_file: The path of the groups.json file. It is skipped if
+            it doesn't exist.
+        :type group_file: string
+        :param defaults_file: The path of the nornir defaults file, in YAML.
+            It is skipped if it doesn't exist.
+        :type defaults_file: string
+        """
+        super().__init__(
+            host_file=host_file,
+            group_file=group_file,
+            defaults_file=defaults_file,
+            **kwargs,
+        )
+
+    def parse_groups(self):
+        """
+        Build the groups from the groups JSON file, and parse the defaults
+        file from YAML.
+
+        :return data: A dict with the groups and defaults, in the parsed YAML
+        format.
+        """
+        data = {"groups": {}, "defaults": {}}
+        if os.path.exists(self.group_file):
+            data["groups"] = dict(
+                map(group_entry, iter_array(self.group_file, self.encoding))
+            )
+        if os.path.exists(self.defaults_file):
+            data["defaults"] = read_yaml(self.defaults_file, self.encoding, self.parser)
+        return data
+
+    def parse_hosts(self):
+        """
+        Build the hosts from the devices JSON file.
+
+        :return hosts: The hosts, in the parsed hosts.yaml format.
+        """
+        return dict(self.iter_hosts())
+
+    def iter_hosts(self):
+        """
+        Build the hosts from the devices JSON file, one device at a time.
+
+        :return hosts: A generator of (name, host data) tuples.
+        """
+        return map(host_entry, iter_array(self.host_file, self.encoding))
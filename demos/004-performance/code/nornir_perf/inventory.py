@@ -0,0 +1,300 @@
+"""
+IndexedInventory - a nornir Inventory which answers filters from an index,
+InventoryWrapper - the base of inventories adding behaviour to another, and
+VersionedHosts - the hosts container the inventories use to see host changes.
+"""
+
+# Import modules
+from functools import wraps
+from nornir.core.inventory import Hosts, Inventory
+from nornir_perf.bitmap import BitmapEngine
+from nornir_perf.groups import GroupIndex
+from nornir_perf.index import AttributeIndex
+from nornir_perf.view import InventoryView
+
+
+def versioned(method):
+    """
+    Wrap a method of a versioned container, so calling it bumps the version.
+
+    :param method: The method of the container base class.
+    :type method: callable
+
+    :return method: The wrapped method.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self.version += 1
+        return result
+
+    return wrapper
+
+
+class VersionedHosts(Hosts):
+    """
+    The hosts of an IndexedInventory, a VectorInventory or a CachedInventory,
+    counting their changes, so adding, replacing or removing a host is seen
+    straight away.
+    """
+
+    version = 0
+    __setitem__ = versioned(dict.__setitem__)
+    __delitem__ = versioned(dict.__delitem__)
+    clear = versioned(dict.clear)
+    pop = versioned(dict.pop)
+    popitem = versioned(dict.popitem)
+    setdefault = versioned(dict.setdefault)
+    update = versioned(dict.update)
+    # dict |= was added in Python 3.9
+    if hasattr(dict, "__ior__"):
+        __ior__ = versioned(dict.__ior__)
+
+
+class IndexedInventory(Inventory):
+    __slots__ = ("engine", "group_index", "stale", "indexed")
+
+    def __init__(self, hosts, groups=None, defaults=None, engine=None):
+        """
+        A nornir Inventory which evaluates filters as bitmap operations over
+        an AttributeIndex, instead of evaluating every host. Anything the
+        index can't answer (i.e. a filter_func) is still evaluated host by
+        host, but only against the hosts which are still candidates.
+
+        Filtering returns a zero-copy InventoryView of the matching hosts,
+        and children_of_group is answered from a GroupIndex.
+
+        :param hosts: The hosts of the inventory.
+        :type hosts: nornir.core.inventory.Hosts
+        :param groups: The groups of the inventory.
+        :type groups: nornir.core.inventory.Groups
+        :param defaults: The defaults of the inventory.
+        :type defaults: nornir.core.inventory.Defaults
+        :param engine: An existing engine to share, i.e. with the inventory
+            this one was filtered from. Default: a new index over the hosts.
+        :type engine: nornir_perf.bitmap.BitmapEngine
+        """
+        super().__init__(hosts=hosts, groups=groups, defaults=defaults)
+        # Adding, replacing or removing a host bumps the version, so a filter
+        # can tell the index is out of date without looking at every host
+        if not isinstance(self.hosts, VersionedHosts):
+            self.hosts = VersionedHosts(self.hosts)
+        if engine is None:
+            engine = BitmapEngine(AttributeIndex(self.hosts), self.hosts)
+        self.engine = engine
+        self.group_index = GroupIndex(self.hosts)
+        # Set when hosts are added or removed, until the next reindex()
+        self.stale = False
+        # The version of the hosts the index is up to date with
+        self.indexed = self.hosts.version
+
+    @property
+    def index(self):
+        """
+        The AttributeIndex shared by this inventory and its filtered children.
+        """
+        return self.engine.index
+
+    def scope(self):
+        """
+        Build the bitmap of the hosts held by this inventory.
+
+        :return bitmap: The bitmap of hosts, or None if the index is out of
+        date, i.e. hosts were added, replaced or removed since it was built
+        or updated.
+        """
+        if self.stale or getattr(self.hosts, "version", None) != self.indexed:
+            return None
+        return self.index.universe
+
+    def filter(self, filter_obj=None, filter_func=None, **kwargs):
+        """
+        Filter the inventory, see nornir.core.inventory.Inventory.filter.
+
+        :return inventory: An InventoryView of the matching hosts, or a new
+        IndexedInventory if the index is out of date.
+        """
+        scope = self.scope()
+        if scope is None:
+            # The index is out of date, so let nornir evaluate every host
+            hosts = super().filter(filter_obj, filter_func, **kwargs).hosts
+            inventory = IndexedInventory(
+                hosts=hosts,
+                groups=self.groups,
+                defaults=self.defaults,
+                engine=self.engine,
+            )
+            # Its hosts are a subset of the hosts of the index
+            inventory.stale = True
+            return inventory
+        bitmap = self.engine.evaluate(filter_obj or filter_func, kwargs, scope)
+        return InventoryView(self, bitmap)
+
+    def reindex(self):
+        """
+        Rebuild the AttributeIndex, i.e. after adding or removing hosts.
+        """
+        if not isinstance(self.hosts, VersionedHosts):
+            self.hosts = VersionedHosts(self.hosts)
+        self.engine = BitmapEngine(AttributeIndex(self.hosts), self.hosts)
+        self.stale = False
+        self.indexed = self.hosts.version
+
+    def update_hosts(self, previous, current, groups=()):
+        """
+        Update the AttributeIndex and the GroupIndex after hosts or groups
+        were added, removed or changed, for the hosts which changed only.
+
+        :param previous: Host name -> the attributes the host had before the
+            change, see nornir_perf.index.host_attributes(), for every host
+            removed or changed, including the hosts whose groups or defaults
+            data changed.
+        :type previous: dict
+        :param current: Host name -> the attributes of the host, for every
+            host added or changed.
+        :type current: dict
+        :param groups: The names of the groups added, removed or whose
+            parent groups changed.
+        :type groups: iterable
+        """
+        if self.stale:
+            # Hosts were added or removed without their attributes
+            self.reindex()
+        else:
+            self.index.update_hosts(self.hosts, previous, current)
+            self.engine.refresh(self.hosts)
+            # The changes of the hosts are the ones which were just applied
+            self.indexed = self.hosts.version
+        for name in previous:
+            if name not in self.hosts:
+                self.group_index.remove_host(name)
+        for name in groups:
+            self.group_index.update_group(name)
+        for name in current:
+            self.group_index.add_host(self.hosts[name])
+
+    def children_of_group(self, group):
+        """
+        Find the hosts which belong to a group, including those which belong
+        to it through their parent groups, from the GroupIndex.
+
+        :param group: The group, or its name.
+        :type group: string or nornir.core.inventory.Group
+
+        :return hosts: A set of hosts.
+        """
+        if not isinstance(group, str):
+            if self.groups.get(group.name) is not group:
+                # The index is by name, so let nornir compare group objects
+                return super().children_of_group(group)
+            group = group.name
+        return self.group_index.children(group)
+
+    def add_host(self, host):
+        """
+        Add a host to the inventory, or replace the host with the same name.
+
+        The group memberships of the host are indexed straight away. Filters
+        are evaluated by nornir until the AttributeIndex is rebuilt with
+        reindex().
+
+        :param host: The host to add.
+        :type host: nornir.core.inventory.Host
+        """
+        self.hosts[host.name] = host
+        self.group_index.add_host(host)
+        self.stale = True
+
+    def remove_host(self, name):
+        """
+        Remove a host from the inventory.
+
+        :param name: The host name.
+        :type name: string
+        """
+        del self.hosts[name]
+        self.group_index.remove_host(name)
+        self.stale = True
+
+    def update_host(self, name):
+        """
+        Refresh the group memberships of a host, after its groups changed.
+
+        :param name: The host name.
+        :type name: string
+        """
+        self.group_index.update_host(self.hosts[name])
+
+    def add_group(self, group):
+        """
+        Add a group to the inventory, or replace the group with the same name.
+
+        :param group: The group to add.
+        :type group: nornir.core.inventory.Group
+        """
+        self.groups[group.name] = group
+        self.group_index.update_group(group.name)
+
+    def update_group(self, name):
+        """
+        Refresh the group memberships of the hosts of a group, after its
+        parent groups changed.
+
+        :param name: The group name.
+        :type name: string
+        """
+        self.group_index.update_group(name)
+
+
+def _forwarded(name):
+    """
+    Build a property of an InventoryWrapper, which reads and writes the
+    attribute of the wrapped inventory.
+
+    :param name: The attribute, i.e. hosts.
+    :type name: string
+
+    :return property: The property.
+    """
+
+    def getter(self):
+        return getattr(self.inventory, name)
+
+    def setter(self, value):
+        setattr(self.inventory, name, value)
+
+    return property(getter, setter)
+
+
+class InventoryWrapper(Inventory):
+    __slots__ = ("inventory",)
+
+    def __init__(self, inventory):
+        """
+        A nornir Inventory which adds behaviour to another inventory, i.e. an
+        IndexedInventory. The hosts, groups and defaults are the ones of the
+        wrapped inventory, and anything the wrapper doesn't implement, i.e.
+        the engine or add_host(), is passed through to it.
+
+        :param inventory: The inventory to wrap.
+        :type inventory: nornir.core.inventory.Inventory
+        """
+        self.inventory = inventory
+
+    hosts = _forwarded("hosts")
+    groups = _forwarded("groups")
+    defaults = _forwarded("defaults")
+
+    def filter(self, filter_obj=None, filter_func=None, **kwargs):
+        return self.inventory.filter(filter_obj, filter_func, **kwargs)
+
+    def children_of_group(self, group):
+        return self.inventory.children_of_group(group)
+
+    def __getattr__(self, name):
+        # Only called for attributes the wrapper hasn't got, so slots which
+        # aren't set yet mustn't recurse
+        if name == "inventory" or name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.inventory, name)
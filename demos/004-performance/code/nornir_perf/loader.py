@@ -0,0 +1,395 @@
+"""
+Inventory file parsing.
+
+SimpleInventory parses the inventory files with ruamel.yaml's safe loader,
+which is pure python unless ruamel.yaml.clib is installed, and is the
+startup bottleneck of any script loading a large inventory. load_yaml()
+picks a parser backend instead:
+
+- fast: a restricted parser for the "# Autogenerated nornir file" format
+  motherstarter renders, made of indented block mappings and lists of plain
+  values. Anything else in the file (i.e. quotes, flow collections, anchors
+  or comments after a value) makes it give up.
+- libyaml: PyYAML's CSafeLoader, if PyYAML is installed with libyaml.
+- ruamel: ruamel.yaml's safe loader, as SimpleInventory does.
+
+The default, auto, tries them in that order, the fast parser only for
+autogenerated files, falling back to the next one whenever a backend isn't
+available or can't parse the file. Every backend types plain values the way
+ruamel.yaml does (YAML 1.2, so "yes" is a string and "false" a boolean), so
+they all return the same data.
+
+iter_entries() parses the top-level mapping of a file one entry at a time
+instead, so a multi-hundred-MB inventory isn't held in memory twice, as the
+parsed document and as the hosts built from it, and every host can be built
+(and thrown away, if it doesn't match a filter) as soon as it is parsed.
+"""
+
+# Import modules
+import ruamel.yaml
+from ruamel.yaml.events import MappingEndEvent, MappingStartEvent, StreamEndEvent
+from ruamel.yaml.nodes import ScalarNode
+from ruamel.yaml.resolver import VersionedResolver, implicit_resolvers
+
+# PyYAML is optional, and only the libyaml backend needs it
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# The parser backends, in the order auto tries them
+PARSERS = ("fast", "libyaml", "ruamel")
+# The header of the files rendered by the motherstarter templates
+AUTOGENERATED = "# Autogenerated nornir file"
+
+# Plain YAML words which aren't strings, i.e. true or null
+RESERVED = {"true", "false", "null"}
+# Characters a plain value can't start with
+INDICATORS = set("[]{}#&*!|>'\"%@`,?:")
+STRING_TAG = "tag:yaml.org,2002:str"
+# The YAML 1.2 resolver ruamel's safe loader types plain values with
+_resolver = VersionedResolver()
+# Plain value -> typed value, for values which aren't plain strings
+_scalars = {}
+
+
+class UnsupportedSyntax(ValueError):
+    """
+    Raised by the fast parser for anything outside the autogenerated format.
+    """
+
+
+def resolve_scalar(text):
+    """
+    Type a plain YAML value the way ruamel.yaml's safe loader does, i.e.
+    "70" is an integer and "false" a boolean.
+
+    :param text: The plain value.
+    :type text: string
+
+    :return value: The typed value.
+    """
+    # Most values are plain strings, which don't need the resolver
+    if text[:1].isalpha() and text.isascii() and text.lower() not in RESERVED:
+        return text
+    try:
+        return _scalars[text]
+    except KeyError:
+        pass
+    if _resolver.resolve(ScalarNode, text, (True, False)) == STRING_TAG:
+        typed = text
+    else:
+        typed = ruamel.yaml.YAML(typ="safe").load(text)
+    _scalars[text] = typed
+    return typed
+
+
+def _plain(text):
+    """
+    Type a key or value of the fast parser, checking it is a plain value.
+
+    :param text: The stripped key or value.
+    :type text: string
+
+    :return value: The typed value.
+    """
+    if (
+        text[0] in INDICATORS
+        or text[0] == "-"
+        and text[1:2] in ("", " ")
+        or ": " in text
+        or " #" in text
+        or text[-1] == ":"
+        or text in ("<<", "=")
+    ):
+        raise UnsupportedSyntax(text)
+    return resolve_scalar(text)
+
+
+def _open_block(stack, pending, indent, item):
+    """
+    Set the value of a key whose value is on the next lines: a nested block
+    or list, which may be as indented as its key, or else None.
+
+    :param stack: The (indentation, container) of the open mappings and
+        lists.
+    :type stack: list
+    :param pending: The (mapping, key, indentation) of the key.
+    :type pending: tuple
+    :param indent: The indentation of the next line.
+    :type indent: integer
+    :param item: Whether the next line is a list item.
+    :type item: boolean
+    """
+    mapping, key, parent = pending
+    if indent > parent or item and indent == parent:
+        mapping[key] = [] if item else {}
+        stack.append((indent, mapping[key]))
+    else:
+        mapping[key] = None
+
+
+def _container(stack, indent, line):
+    """
+    Close the mappings and lists more indented than a line, and find the
+    one the line belongs to.
+
+    :param stack: The (indentation, container) of the open mappings and
+        lists.
+    :type stack: list
+    :param indent: The indentation of the line.
+    :type indent: integer
+    :param line: The line, for the error.
+    :type line: string
+
+    :return container: The mapping or list.
+    """
+    while stack[-1][0] > indent:
+        stack.pop()
+    level, container = stack[-1]
+    if level != indent:
+        raise UnsupportedSyntax(line)
+    return container
+
+
+def _parse_item(container, content, line):
+    """
+    Parse a list item, i.e. "- value".
+
+    :param container: The list the item belongs to.
+    :param content: The stripped line.
+    :type content: string
+    :param line: The line, for the error.
+    :type line: string
+    """
+    if type(container) is not list:
+        raise UnsupportedSyntax(line)
+    value = content[2:].strip()
+    if not value:
+        raise UnsupportedSyntax(line)
+    container.append(_plain(value))
+
+
+def _parse_entry(container, content, line, indent):
+    """
+    Parse a mapping entry, i.e. "key: value", or "key:" with the value on
+    the next lines.
+
+    :param container: The mapping the entry belongs to.
+    :param content: The stripped line.
+    :type content: string
+    :param line: The line, for the error.
+    :type line: string
+    :param indent: The indentation of the line.
+    :type indent: integer
+
+    :return pending: The (mapping, key, indentation) of the key if its value
+    is on the next lines, else None.
+    """
+    if type(container) is not dict:
+        raise UnsupportedSyntax(line)
+    if content[-1] == ":":
+        key, value = content[:-1].rstrip(), ""
+    else:
+        key, separator, value = content.partition(": ")
+        if not separator:
+            raise UnsupportedSyntax(line)
+        key, value = key.rstrip(), value.strip()
+    key = _plain(key)
+    # Duplicate keys are refused, so leave them to the full parsers
+    if key in container:
+        raise UnsupportedSyntax(line)
+    if value:
+        container[key] = _plain(value)
+        return None
+    container[key] = None
+    return (container, key, indent)
+
+
+def parse_fast(text):
+    """
+    Parse an autogenerated inventory file, made of indented block mappings
+    and lists of plain values, one per line.
+
+    :param text: The contents of the file.
+    :type text: string
+
+    :return data: The parsed data, or None for an empty file.
+    """
+    root = None
+    # (indentation, container) of the open mappings and lists
+    stack = []
+    # (mapping, key, indentation) of a key whose value is on the next lines
+    pending = None
+    started = False
+    for line in text.splitlines():
+        content = line.strip()
+        if not content or content[0] == "#":
+            continue
+        if content == "---" and not started:
+            continue
+        started = True
+        indent = len(line) - len(line.lstrip(" "))
+        if line[indent] == "\t" or content in ("---", "..."):
+            raise UnsupportedSyntax(line)
+        item = content[:2] == "- " or content == "-"
+        if root is None:
+            root = [] if item else {}
+            stack.append((indent, root))
+        elif pending is not None:
+            _open_block(stack, pending, indent, item)
+            pending = None
+        container = _container(stack, indent, line)
+        if item:
+            _parse_item(container, content, line)
+        else:
+            pending = _parse_entry(container, content, line, indent)
+    return root
+
+
+if yaml is not None and hasattr(yaml, "CSafeLoader"):
+
+    class _LibYAMLLoader(yaml.CSafeLoader):
+        """
+        PyYAML's libyaml loader, typing plain values with the YAML 1.2 rules
+        of ruamel.yaml instead of the YAML 1.1 ones of PyYAML.
+        """
+
+        yaml_implicit_resolvers = {}
+
+        def construct_mapping(self, node, deep=False):
+            # ruamel.yaml refuses duplicate keys, where PyYAML keeps the last
+            keys = [
+                k.value
+                for k, _ in node.value
+                if isinstance(k, yaml.ScalarNode) and k.tag != "tag:yaml.org,2002:merge"
+            ]
+            if len(set(keys)) != len(keys):
+                raise yaml.constructor.ConstructorError(
+                    None, None, "found duplicate key", node.start_mark
+                )
+            return super().construct_mapping(node, deep)
+
+    for _versions, _tag, _regexp, _first in implicit_resolvers:
+        if (1, 2) in _versions:
+            _LibYAMLLoader.add_implicit_resolver(_tag, _regexp, _first)
+            # Merge keys are handled by the loader, everything else is typed
+            # by ruamel.yaml's resolver
+            if _tag != "tag:yaml.org,2002:merge":
+                _LibYAMLLoader.add_constructor(
+                    _tag, lambda loader, node: resolve_scalar(node.value)
+                )
+else:
+    _LibYAMLLoader = None
+
+# The errors which make load_yaml() fall back to the next backend, so files
+# the other backends can't parse get ruamel.yaml's own error
+_FALLBACK_ERRORS = (UnsupportedSyntax,) + ((yaml.YAMLError,) if yaml else ())
+
+
+def parse_libyaml(text):
+    """
+    Parse an inventory file with PyYAML's libyaml loader.
+
+    :param text: The contents of the file.
+    :type text: string
+
+    :return data: The parsed data, or None for an empty file.
+    """
+    if _LibYAMLLoader is None:
+        raise ImportError("PyYAML with libyaml is needed by the libyaml parser")
+    return yaml.load(text, Loader=_LibYAMLLoader)  # nosec B506 - a safe loader
+
+
+def parse_ruamel(text):
+    """
+    Parse an inventory file with ruamel.yaml's safe loader, as
+    SimpleInventory does.
+
+    :param text: The contents of the file.
+    :type text: string
+
+    :return data: The parsed data, or None for an empty file.
+    """
+    return ruamel.yaml.YAML(typ="safe").load(text)
+
+
+def load_yaml(path, encoding="utf-8", parser="auto"):
+    """
+    Parse a YAML inventory file with the first available parser backend
+    which can parse it.
+
+    :param path: The path of the YAML file.
+    :type path: string
+    :param encoding: The encoding of the YAML file.
+    :type encoding: string
+    :param parser: The backend to try first: fast, libyaml or ruamel. auto
+        tries them all in that order, the fast parser only for autogenerated
+        files. The next ones are tried if it isn't available or can't parse
+        the file.
+        Default: auto
+    :type parser: string
+
+    :return data: The parsed data, or an empty dict for an empty file.
+    """
+    if parser != "auto" and parser not in PARSERS:
+        raise ValueError(f"Unknown parser {parser!r}, expected auto or {PARSERS}")
+    with open(path, "r", encoding=encoding) as f:
+        text = f.read()
+    first = PARSERS.index(parser) if parser != "auto" else 0
+    backends = PARSERS[first:]
+    if parser == "auto" and AUTOGENERATED not in text[:256]:
+        backends = backends[1:]
+    for backend in backends:
+        try:
+            if backend == "fast":
+                return parse_fast(text) or {}
+            if backend == "libyaml" and _LibYAMLLoader is not None:
+                return parse_libyaml(text) or {}
+        except _FALLBACK_ERRORS:
+            continue
+    return parse_ruamel(text) or {}
+
+
+def iter_entries(path, encoding="utf-8"):
+    """
+    Parse the top-level mapping of a YAML inventory file, one entry at a
+    time, the same way SimpleInventory parses the whole file.
+
+    :param path: The path of the YAML file.
+    :type path: string
+    :param encoding: The encoding of the YAML file.
+    :type encoding: string
+
+    :return entries: A generator of (name, data) tuples, in file order.
+    """
+    # The pure python loader, as the composer of the C one can't be driven
+    yml = ruamel.yaml.YAML(typ="safe", pure=True)
+    with open(path, "r", encoding=encoding) as f:
+        constructor, parser = yml.get_constructor_parser(f)
+        composer = yml.composer
+        # Skip the start of the stream and of the document
+        parser.get_event()
+        if parser.check_event(StreamEndEvent):
+            return
+        parser.get_event()
+        if not parser.check_event(MappingStartEvent):
+            # An empty document, or anything but a mapping, i.e. a list
+            document = constructor.construct_document(composer.compose_node(None, None))
+            if document:
+                raise ValueError(f"{path}: expected a mapping of hosts or groups")
+            return
+        parser.get_event()
+        names = set()
+        while not parser.check_event(MappingEndEvent):
+            key = constructor.construct_object(composer.compose_node(None, None), True)
+            value = constructor.construct_object(
+                composer.compose_node(None, None), True
+            )
+            # The whole file loader refuses duplicate keys as well
+            if key in names:
+                raise ValueError(f"{path}: duplicate entry {key!r}")
+            names.add(key)
+            # Only entries with an anchor are kept by the composer, for aliases
+            constructor.constructed_objects.clear()
+            yield key, value
@@ -0,0 +1,325 @@
+"""
+Hostname classification.
+
+The naming convention filters of the demo each run re.match with their own
+pattern string, for every host, every time they are used. The
+HostnameClassifier compiles all the naming rules once, into a single
+pattern, and classifies a host name against every rule in one match. The
+tags of the most recently used host names are cached, so the naming filters
+become a tag lookup.
+
+Host names also hold structured fields, i.e. lab-arista-22.tst.dfjt.local
+is the prefix "lab", the family "arista", the ordinal 22, the environment
+label "tst" and the domain "dfjt.local". The tokenizer splits host names into
+these typed fields without any regex, and the NameIndex indexes them, so a
+NameFilter such as NameFilter(ordinal__between=(10, 20)) is answered from the
+index.
+"""
+
+# Import modules
+import re
+import sys
+from array import array
+from collections import OrderedDict, namedtuple
+from nornir_perf.bitmap import IndexedFilter, bitmap_from_ids
+from nornir_perf.index import RangeIndex
+
+# Number of host names whose tags are kept by default, which holds every host
+# of a large inventory, while names of hosts renamed or removed since are
+# eventually dropped
+TAG_CACHE_SIZE = 1 << 17
+
+# The naming rules of the demo, as matched by re.match against the host name
+NAMING_RULES = {
+    # odd_device_naming_convention
+    "odd": r".+\-[0-9][1,3,5,7,9].+",
+    # even_device_naming_convention
+    "even": r".+\-[0-9][2,4,6,8,0].+",
+    # test_domain_name_convention
+    "test_domain": r".+.tst.dfjt.local$",
+    # device_name_convention, and its opposite non_device_name_convention
+    "convention": r"\w{3}\-\w+\-\d{2}.\w{3}.dfjt.local",
+}
+
+
+class HostnameClassifier:
+    def __init__(self, rules=None, maxsize=TAG_CACHE_SIZE):
+        """
+        Classify host names against a set of naming rules, with a single
+        precompiled pattern.
+
+        :param rules: A dict of tag to regex, matched from the start of the
+            host name like re.match. The regexes must not contain named or
+            numbered group references. Default: NAMING_RULES
+        :type rules: dict
+        :param maxsize: The number of host names whose tags are kept, the
+            least recently used are classified again when needed.
+            Default: TAG_CACHE_SIZE
+        :type maxsize: integer
+        """
+        self.rules = dict(NAMING_RULES if rules is None else rules)
+        # Every rule is an optional lookahead at the start of the name, so a
+        # single match tries every rule, and sets a named group for each rule
+        # which matched. The rules can overlap, as lookaheads don't consume
+        # any of the name.
+        self.pattern = re.compile(
+            "".join(f"(?:(?=(?P<{tag}>{rule})))?" for tag, rule in self.rules.items())
+        )
+        # Tags of the host names classified most recently, in least recently
+        # used order
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+
+    def classify(self, name):
+        """
+        Find the naming rules a host name matches.
+
+        :param name: The host name.
+        :type name: string
+
+        :return tags: A frozenset of the tags of the matching rules.
+        """
+        try:
+            tags = self.cache[name]
+        except KeyError:
+            groups = self.pattern.match(name).groupdict()
+            tags = frozenset(tag for tag, value in groups.items() if value is not None)
+            self.cache[name] = tags
+            if len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+            return tags
+        self.cache.move_to_end(name)
+        return tags
+
+    def classify_hosts(self, hosts):
+        """
+        Classify every host of an inventory, in a single pass.
+
+        :param hosts: The hosts to classify.
+        :type hosts: nornir.core.inventory.Hosts
+
+        :return tags: A dict of host name to the tags of the host.
+        """
+        return {name: self.classify(name) for name in hosts}
+
+    def has_tag(self, host, tag):
+        """
+        Check whether a host name matches a naming rule.
+
+        :param host: The host you want to check.
+        :type host: nornir.core.inventory.Host
+        :param tag: The tag of the naming rule.
+        :type tag: string
+
+        :return bool: True if it matches, False if it doesn't match
+        """
+        return tag in self.classify(host.name)
+
+
+# The fields of a host name, i.e. lab-arista-22.tst.dfjt.local
+NameFields = namedtuple("NameFields", ["prefix", "family", "ordinal", "env", "domain"])
+
+# NameFilter operators, and the operators which only apply to the ordinal
+NAME_OPERATORS = ("eq", "any", "ge", "gt", "le", "lt", "between", "odd", "even")
+ORDINAL_OPERATORS = ("ge", "gt", "le", "lt", "between", "odd", "even")
+
+
+def tokenize(name):
+    """
+    Split a host name into its fields, without using a regex.
+
+    Examples:
+        - lab-arista-22.tst.dfjt.local -> lab, arista, 22, tst, dfjt.local
+        - dfjt-r000009.prd.dfjt.local -> dfjt, r000009, None, prd, dfjt.local
+
+    :param name: The host name.
+    :type name: string
+
+    :return fields: A NameFields record. Fields which the host name doesn't
+    have are None, and the ordinal is an integer.
+    """
+    label, _, rest = name.partition(".")
+    env, _, domain = rest.partition(".")
+    prefix, _, tail = label.partition("-")
+    family, separator, number = tail.rpartition("-")
+    if not separator:
+        family, number = tail, ""
+    # Only plain ASCII digits are an ordinal, i.e. not "²" or "-1"
+    ordinal = int(number) if number.isdigit() and number.isascii() else None
+    # The same few prefixes, families and domains repeat across every host
+    return NameFields(
+        sys.intern(prefix) if prefix else None,
+        sys.intern(family) if family else None,
+        ordinal,
+        sys.intern(env) if env else None,
+        sys.intern(domain) if domain else None,
+    )
+
+
+# Ordinal operator -> comparison of an ordinal with the NameFilter target
+ORDINAL_COMPARISONS = {
+    "ge": lambda value, target: value >= target,
+    "gt": lambda value, target: value > target,
+    "le": lambda value, target: value <= target,
+    "lt": lambda value, target: value < target,
+    "between": lambda value, target: target[0] <= value <= target[1],
+    "odd": lambda value, target: (value % 2 == 1) is bool(target),
+    "even": lambda value, target: (value % 2 == 0) is bool(target),
+}
+
+
+def compare(value, operator, target):
+    """
+    Evaluate a NameFilter rule against the value of a field.
+
+    :param value: The value of the field, or None if the name hasn't got it.
+    :param operator: One of NAME_OPERATORS.
+    :type operator: string
+    :param target: The value passed to the NameFilter.
+
+    :return bool: True if the value matches the rule.
+    """
+    if value is None:
+        return False
+    if operator in ORDINAL_OPERATORS:
+        return _compare_ordinal(value, operator, target)
+    return _compare_text(value, operator, target)
+
+
+def _compare_text(value, operator, target):
+    """
+    Evaluate an eq or any rule, which apply to every field.
+
+    :param value: The value of the field.
+    :param operator: eq or any.
+    :type operator: string
+    :param target: The value passed to the NameFilter.
+
+    :return bool: True if the value matches the rule.
+    """
+    if operator == "eq":
+        return value == target
+    if operator == "any":
+        return value in target
+    raise ValueError(f"Unsupported name operator: {operator}")
+
+
+def _compare_ordinal(value, operator, target):
+    """
+    Evaluate a rule which only applies to the ordinal, i.e. between.
+
+    :param value: The ordinal.
+    :type value: integer
+    :param operator: One of ORDINAL_OPERATORS.
+    :type operator: string
+    :param target: The value passed to the NameFilter.
+
+    :return bool: True if the ordinal matches the rule.
+    """
+    return ORDINAL_COMPARISONS[operator](value, target)
+
+
+class NameIndex:
+    def __init__(self, engine):
+        """
+        Tokenize every host name of an inventory, and index the fields.
+
+        :param engine: The engine of the inventory, see
+            BitmapEngine.auxiliary.
+        :type engine: nornir_perf.bitmap.BitmapEngine
+        """
+        names = engine.index.names
+        self.size = len(names)
+        # The fields of every host, by host id
+        self.records = [tokenize(name) for name in names]
+        # field -> {value: array of host ids}
+        self.postings = {field: {} for field in NameFields._fields}
+        for i, record in enumerate(self.records):
+            for field, value in zip(NameFields._fields, record):
+                if value is not None:
+                    self.postings[field].setdefault(value, array("l")).append(i)
+        self.ordinals = RangeIndex(self.postings["ordinal"])
+        # (field, operator, target) -> bitmap, as the index never changes
+        self._cache = {}
+
+    def _keys(self, field, operator, target):
+        """
+        Find the distinct values of a field matching a rule.
+
+        :return keys: A list of values.
+        """
+        if field == "ordinal" and operator in ("ge", "gt", "le", "lt"):
+            return self.ordinals.select(operator, target)
+        if field == "ordinal" and operator == "between":
+            low, high = target
+            return [k for k in self.ordinals.select("ge", low) if k <= high]
+        return [k for k in self.postings[field] if compare(k, operator, target)]
+
+    def lookup(self, field, operator, target):
+        """
+        Find the hosts whose name matches a rule.
+
+        :param field: One of the NameFields.
+        :type field: string
+        :param operator: One of NAME_OPERATORS.
+        :type operator: string
+        :param target: The value passed to the NameFilter.
+
+        :return bitmap: The bitmap of matching hosts.
+        """
+        try:
+            key = (field, operator, target)
+            return self._cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Lists, i.e. for any, can't be cached
+            key = None
+        postings = self.postings[field]
+        ids = [i for k in self._keys(field, operator, target) for i in postings[k]]
+        bitmap = bitmap_from_ids(ids, self.size)
+        if key is not None:
+            self._cache[key] = bitmap
+        return bitmap
+
+
+class NameFilter(IndexedFilter):
+    def __init__(self, **kwargs):
+        """
+        Filter hosts on the fields of their name, with the same keyword
+        syntax as nornir's F, i.e. NameFilter(env="tst", ordinal__odd=True).
+        The hosts must match every rule.
+
+        Operators: eq (the default), any, and for the ordinal only ge, gt,
+        le, lt, between (inclusive, with a (low, high) tuple), odd and even.
+
+        :param kwargs: The rules, as field__operator=target.
+        """
+        self.filters = kwargs
+        self.rules = []
+        for key, target in kwargs.items():
+            field, _, operator = key.partition("__")
+            operator = operator or "eq"
+            if field not in NameFields._fields:
+                raise ValueError(f"Unknown name field: {field}")
+            if operator not in NAME_OPERATORS:
+                raise ValueError(f"Unsupported name operator: {operator}")
+            if operator in ORDINAL_OPERATORS and field != "ordinal":
+                raise ValueError(f"Operator {operator} only applies to the ordinal")
+            self.rules.append((field, operator, target))
+
+    def __call__(self, host):
+        fields = tokenize(host.name)
+        return all(
+            compare(getattr(fields, field), operator, target)
+            for field, operator, target in self.rules
+        )
+
+    def select(self, engine, scope):
+        index = engine.auxiliary(NameIndex)
+        for field, operator, target in self.rules:
+            scope &= index.lookup(field, operator, target)
+        return scope
+
+    def __repr__(self):
+        return f"<NameFilter ({self.filters})>"
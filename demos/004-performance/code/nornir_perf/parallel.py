@@ -0,0 +1,192 @@
+"""
+Parallel evaluation of filter functions, across a process pool.
+
+A filter_func is evaluated host by host in a single interpreter, so a CPU
+heavy predicate (regexes, parsing, checksums) keeps a single core busy.
+parallel_filter() projects every host into a compact, picklable
+HostProjection, hands the projections and the predicate to a pool of worker
+processes once, and then only sends each worker ranges of host ids to
+evaluate. The matching ids of every range are merged back into a filtered
+inventory. Below a size threshold, the pool costs more than it saves, so the
+filter is evaluated serially instead.
+"""
+
+# Import modules
+import functools
+import os
+import pickle  # nosec B403 - only used to check the predicate can be sent
+from concurrent.futures import ProcessPoolExecutor
+
+# Inventories smaller than this are filtered serially
+PARALLEL_THRESHOLD = 5000
+
+# Ranges of host ids per process, so one slow range doesn't hold up the rest
+SHARDS_PER_PROCESS = 4
+
+
+class HostProjection:
+    __slots__ = (
+        "name",
+        "hostname",
+        "port",
+        "username",
+        "password",
+        "platform",
+        "groups",
+        "data",
+        "_ancestry",
+        "_extended",
+        "_hidden",
+    )
+
+    def __init__(self, host):
+        """
+        A compact, picklable copy of a host, as seen by filter functions:
+        the name, the base attributes and data (resolved through the groups
+        and defaults) and the names of the groups. It supports the same
+        lookups as a nornir Host, i.e. host["region"], host.get("sla") and
+        host.has_parent_group("mel").
+
+        :param host: The host to project.
+        :type host: nornir.core.inventory.Host
+        """
+        self.name = host.name
+        self.hostname = host.hostname
+        self.port = host.port
+        self.username = host.username
+        self.password = host.password
+        self.platform = host.platform
+        self.groups = tuple(g.name for g in host.groups)
+        self.data = dict(host.data)
+        self._ancestry = frozenset(g.name for g in host.extended_groups())
+        self._extended = host.extended_data()
+        # Keys of host.keys() which host[key] doesn't find, i.e. None defaults
+        self._hidden = ()
+        for key in self._extended:
+            try:
+                host[key]
+            except KeyError:
+                self._hidden += (key,)
+
+    def __getitem__(self, item):
+        if item in self._hidden:
+            raise KeyError(item)
+        return self._extended[item]
+
+    def get(self, item, default=None):
+        if hasattr(self, item):
+            return getattr(self, item)
+        try:
+            return self[item]
+        except KeyError:
+            return default
+
+    def has_parent_group(self, group):
+        return getattr(group, "name", group) in self._ancestry
+
+    def extended_data(self):
+        return dict(self._extended)
+
+    def keys(self):
+        return self._extended.keys()
+
+    def values(self):
+        return self._extended.values()
+
+    def items(self):
+        return self._extended.items()
+
+    def __iter__(self):
+        return iter(self._extended)
+
+    def __len__(self):
+        return len(self._extended)
+
+    def __bool__(self):
+        return bool(self.name)
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}: {self.name}"
+
+
+# The projections and predicate of a worker process, see _start_worker
+_worker = {}
+
+
+def _start_worker(projections, predicate):
+    """
+    Keep the projections and predicate in a worker process, so the tasks
+    sent to it are only ranges of host ids.
+
+    :param projections: The projection of every host, by host id.
+    :type projections: list
+    :param predicate: The filter function.
+    :type predicate: callable
+    """
+    _worker["projections"] = projections
+    _worker["predicate"] = predicate
+
+
+def _evaluate_shard(start, stop):
+    """
+    Evaluate the predicate against a range of hosts, in a worker process.
+
+    :param start: The first host id.
+    :type start: integer
+    :param stop: The host id after the last one.
+    :type stop: integer
+
+    :return ids: The ids of the matching hosts.
+    """
+    projections, predicate = _worker["projections"], _worker["predicate"]
+    return [i for i in range(start, stop) if predicate(projections[i])]
+
+
+def parallel_filter(
+    nr, filter_func, processes=None, threshold=PARALLEL_THRESHOLD, **kwargs
+):
+    """
+    Filter hosts with a filter function evaluated across a process pool, the
+    same way as nr.filter(filter_func=filter_func, **kwargs).
+
+    The filter function must be picklable, i.e. a function defined at the
+    top level of a module (not a lambda). In the worker processes, it's
+    called with a HostProjection rather than the host itself.
+
+    :param nr: An initialised Nornir, or an inventory.
+    :param filter_func: The filter function.
+    :type filter_func: callable
+    :param processes: The number of worker processes.
+        Default: the number of CPUs
+    :type processes: integer
+    :param threshold: Inventories with fewer hosts are filtered serially.
+        Default: PARALLEL_THRESHOLD
+    :type threshold: integer
+    :param kwargs: Extra arguments of the filter function.
+
+    :return nr: The result of nr.filter() for the matching hosts.
+    """
+    inventory = getattr(nr, "inventory", nr)
+    processes = processes or os.cpu_count() or 1
+    if not inventory.hosts or len(inventory.hosts) < threshold or processes < 2:
+        return nr.filter(filter_func=filter_func, **kwargs)
+    predicate = functools.partial(filter_func, **kwargs) if kwargs else filter_func
+    try:
+        pickle.dumps(predicate)
+    except (pickle.PicklingError, AttributeError, TypeError) as e:
+        raise ValueError(f"The filter function must be picklable: {e}") from e
+    hosts = list(inventory.hosts.values())
+    projections = [HostProjection(host) for host in hosts]
+    step = -(-len(hosts) // (processes * SHARDS_PER_PROCESS))
+    starts = range(0, len(hosts), step)
+    stops = [min(start + step, len(hosts)) for start in starts]
+    with ProcessPoolExecutor(
+        processes, initializer=_start_worker, initargs=(projections, predicate)
+    ) as pool:
+        shards = pool.map(_evaluate_shard, starts, stops)
+        matched = {hosts[i].name for shard in shards for i in shard}
+    # Let the inventory build its own filtered result, in inventory order
+    return nr.filter(filter_func=lambda host: host.name in matched)
@@ -0,0 +1,471 @@
+"""
+Cost based ordering of filter clauses.
+
+nornir evaluates the clauses of an F expression in the order they were
+written, and AND and OR only short-circuit on the first operand. When the
+first clause of an AND is cheap and rejects most hosts, the rest of the
+clauses only see the hosts which are left, so the order matters.
+
+Statistics holds the value frequencies of every attribute of the hosts,
+collected at load time, from which a Planner estimates how many hosts every
+clause matches. The cost of every clause is measured once, against a sample
+of the hosts. The planner rewrites an expression so the operands of an AND are
+evaluated cheapest and most selective first (the lowest cost per rejected
+host), and the operands of an OR cheapest and least selective first (the
+lowest cost per matched host). F objects with several rules are split into
+one clause per rule, as F(a=1, b=2) is F(a=1) & F(b=2). The plan matches
+exactly the same hosts, in the same order. As the clauses are reordered,
+they must not depend on each other, i.e. a filter_func mustn't rely on an
+earlier clause to have removed the hosts it can't handle.
+
+explain() shows the plan of a filter, with the estimated and actual number
+of hosts matched by every clause.
+"""
+
+# Import modules
+from collections import OrderedDict, namedtuple
+from functools import reduce
+from time import perf_counter
+from nornir.core.filter import AND, F, NOT_F, OR
+from nornir_perf.batch import freeze
+from nornir_perf.bitmap import Complement
+from nornir_perf.cache import canonical
+from nornir_perf.index import host_attributes, verify_rule
+from nornir_perf.inventory import InventoryWrapper
+from nornir_perf.query import SAMPLE_SIZE
+
+# Attributes with more distinct values than this are assumed to be uniformly
+# distributed, rather than evaluating a rule against every value
+MAX_DISTINCT = 1024
+
+# Fraction of hosts assumed to match a clause without statistics
+DEFAULT_SELECTIVITY = 1 / 3
+
+# Number of measured clause costs kept, the least recently used are measured
+# again when needed
+COST_CACHE_SIZE = 1024
+
+
+# A clause of a plan, as shown by explain()
+ExplainRow = namedtuple(
+    "ExplainRow", ["depth", "clause", "cost", "examined", "estimated", "actual"]
+)
+
+
+class Statistics:
+    def __init__(self, hosts):
+        """
+        The value frequencies of every attribute of a set of hosts, including
+        the data they inherit from their groups and the defaults.
+
+        :param hosts: The hosts to collect the statistics of.
+        :type hosts: nornir.core.inventory.Hosts
+        """
+        self.size = len(hosts)
+        # The hosts the cost of clauses is measured against
+        self.sample = []
+        # attribute -> {frozen value -> [value, number of hosts]}
+        self.frequencies = {}
+        for host in hosts.values():
+            if len(self.sample) < SAMPLE_SIZE:
+                self.sample.append(host)
+            self._count(host_attributes(host), 1)
+        # (key, frozen target) -> estimated number of hosts
+        self._estimates = {}
+
+    def _count(self, attributes, delta):
+        """
+        Add the values of a host to the frequencies, or take them out.
+
+        :param attributes: The attributes of the host.
+        :type attributes: dict
+        :param delta: 1 to add the values, -1 to take them out.
+        :type delta: integer
+        """
+        for attr, value in attributes.items():
+            values = self.frequencies.setdefault(attr, {})
+            key = freeze(value)
+            if key is None:
+                key = ("unhashable", repr(value))
+            try:
+                values[key][1] += delta
+            except KeyError:
+                values[key] = [value, delta]
+            if not values[key][1]:
+                del values[key]
+
+    def update_hosts(self, hosts, previous, current):
+        """
+        Update the frequencies after hosts were added, removed or changed,
+        for the hosts which changed only.
+
+        :param hosts: The hosts, after the changes.
+        :type hosts: nornir.core.inventory.Hosts
+        :param previous: Host name -> the attributes the host had before the
+            change, for every host removed or changed.
+        :type previous: dict
+        :param current: Host name -> the attributes of the host, for every
+            host added or changed.
+        :type current: dict
+        """
+        for attributes in previous.values():
+            self._count(attributes, -1)
+        for attributes in current.values():
+            self._count(attributes, 1)
+        self.size = len(hosts)
+        # Removed hosts are replaced in the sample by the first other hosts
+        sample = [h for h in self.sample if hosts.get(h.name) is h]
+        if len(sample) < min(SAMPLE_SIZE, self.size):
+            sampled = {h.name for h in sample}
+            for name, host in hosts.items():
+                if len(sample) >= SAMPLE_SIZE:
+                    break
+                if name not in sampled:
+                    sample.append(host)
+        self.sample = sample
+        self._estimates.clear()
+
+    def cardinality(self, attr):
+        """
+        Count the distinct values of an attribute.
+
+        :param attr: The attribute.
+        :type attr: string
+
+        :return count: The number of distinct values.
+        """
+        return len(self.frequencies.get(attr, ()))
+
+    def missing(self, attr):
+        """
+        Count the hosts which don't have an attribute.
+
+        :param attr: The attribute.
+        :type attr: string
+
+        :return count: The number of hosts.
+        """
+        values = self.frequencies.get(attr, {}).values()
+        return self.size - sum(count for _, count in values)
+
+    def estimate(self, key, target):
+        """
+        Estimate the number of hosts matching a single F rule.
+
+        :param key: The F keyword, i.e. site_code__eq.
+        :type key: string
+        :param target: The value passed to the F filter.
+
+        :return count: The estimated number of hosts.
+        """
+        frozen = freeze(target)
+        if frozen is not None and (key, frozen) in self._estimates:
+            return self._estimates[key, frozen]
+        rule = key.split("__")
+        values = self.frequencies.get(rule[0])
+        if values is None or len(rule) > 2:
+            estimate = self.size * DEFAULT_SELECTIVITY
+        elif len(values) > MAX_DISTINCT:
+            # Equality matches one value, anything else a default fraction
+            equality = len(rule) == 1 or rule[1] == "eq"
+            estimate = (
+                self.size / len(values) if equality else self.size * DEFAULT_SELECTIVITY
+            )
+        else:
+            # A missing attribute is {} to operators, and None to equality
+            operator = rule[1] if len(rule) == 2 else "eq"
+            missing = {} if len(rule) == 2 else None
+            estimate = sum(
+                count
+                for value, count in values.values()
+                if verify_rule(value, operator, target)
+            )
+            if verify_rule(missing, operator, target):
+                estimate += self.missing(rule[0])
+        if frozen is not None:
+            self._estimates[key, frozen] = estimate
+        return estimate
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}({self.size} hosts, "
+            f"{len(self.frequencies)} attributes)"
+        )
+
+
+class Planner:
+    def __init__(self, statistics):
+        """
+        Order the clauses of filters by their estimated cost and selectivity.
+
+        :param statistics: The statistics of the hosts being filtered.
+        :type statistics: nornir_perf.planner.Statistics
+        """
+        self.statistics = statistics
+        # Canonical key of a clause -> measured cost, in least recently used
+        # order, as tooling may build a new filter for every call
+        self._costs = OrderedDict()
+
+    def selectivity(self, node):
+        """
+        Estimate the fraction of hosts a filter matches, assuming its
+        clauses are independent.
+
+        :param node: An F object, an AND/OR of them, or a filter function.
+
+        :return fraction: A number between 0 and 1.
+        """
+        size = self.statistics.size
+        if isinstance(node, AND):
+            return self.selectivity(node.op1) * self.selectivity(node.op2)
+        if isinstance(node, OR):
+            first, second = self.selectivity(node.op1), self.selectivity(node.op2)
+            return 1 - (1 - first) * (1 - second)
+        if type(node) in (F, NOT_F):
+            fraction = 1.0
+            for key, target in node.filters.items():
+                matched = self.statistics.estimate(key, target) / size if size else 0
+                fraction *= 1 - matched if type(node) is NOT_F else matched
+            return fraction
+        if isinstance(node, Complement):
+            return 1 - self.selectivity(node.filter_obj)
+        return DEFAULT_SELECTIVITY
+
+    def cost(self, node):
+        """
+        Estimate the cost of evaluating a filter against a single host,
+        ignoring short-circuiting. The cost of every clause is measured once,
+        against a sample of the hosts, as an inherited lookup or a regex can
+        cost more than an F rule on data of the host itself. The costs of the
+        last COST_CACHE_SIZE clauses used are kept.
+
+        :param node: An F object, an AND/OR of them, or a filter function.
+
+        :return cost: The average number of seconds per host.
+        """
+        if isinstance(node, (AND, OR)):
+            return self.cost(node.op1) + self.cost(node.op2)
+        key = canonical(node)
+        if key in self._costs:
+            self._costs.move_to_end(key)
+            return self._costs[key]
+        sample = self.statistics.sample
+        start = perf_counter()
+        try:
+            for host in sample:
+                node(host)
+        except Exception:
+            # Let the filter itself raise when it's evaluated, last
+            cost = float("inf")
+        else:
+            cost = (perf_counter() - start) / len(sample) if sample else 0.0
+        if key is not None:
+            self._costs[key] = cost
+            if len(self._costs) > COST_CACHE_SIZE:
+                self._costs.popitem(last=False)
+        return cost
+
+    def _clauses(self, node, operator):
+        """
+        List the clauses of a chain of the same operator, i.e. a & b & c,
+        splitting F objects with several rules into one clause per rule.
+
+        :param node: The root of the chain.
+        :param operator: AND or OR.
+
+        :return clauses: A list of filters.
+        """
+        if isinstance(node, operator):
+            return self._clauses(node.op1, operator) + self._clauses(node.op2, operator)
+        # F(a=1, b=2) is F(a=1) & F(b=2), and ~F(a=1, b=2) is ~F(a=1) & ~F(b=2)
+        if operator is AND and type(node) in (F, NOT_F) and len(node.filters) > 1:
+            return [type(node)(**{k: v}) for k, v in node.filters.items()]
+        return [node]
+
+    def plan(self, node):
+        """
+        Rewrite a filter so its clauses are evaluated in the cheapest order.
+
+        :param node: An F object, an AND/OR of them, or a filter function.
+
+        :return node: The rewritten filter, matching the same hosts.
+        """
+        if isinstance(node, AND) or (
+            type(node) in (F, NOT_F) and len(node.filters) > 1
+        ):
+            operator = AND
+        elif isinstance(node, OR):
+            operator = OR
+        else:
+            return node
+        clauses = [self.plan(c) for c in self._clauses(node, operator)]
+        ranks = {}
+        for i, c in enumerate(clauses):
+            cost, fraction = self.cost(c), self.selectivity(c)
+            # The cost per host rejected by an AND, or matched by an OR
+            useful = 1 - fraction if operator is AND else fraction
+            ranks[i] = cost / useful if useful > 0 else float("inf")
+        order = sorted(range(len(clauses)), key=ranks.__getitem__)
+        return reduce(operator, [clauses[i] for i in order])
+
+    def explain(self, node, hosts):
+        """
+        Plan a filter, and evaluate the plan against hosts clause by clause.
+
+        :param node: An F object, an AND/OR of them, or a filter function.
+        :param hosts: The hosts to evaluate the plan against.
+        :type hosts: nornir.core.inventory.Hosts
+
+        :return plan: A Plan, with a row per clause.
+        """
+        planned = self.plan(node)
+        rows = []
+        self._explain(planned, list(hosts.values()), len(hosts), 0, rows)
+        return Plan(planned, rows)
+
+    def _explain(self, node, hosts, estimated, depth, rows):
+        """
+        Recursively evaluate a plan, recording a row per clause.
+
+        :param node: The clause to evaluate.
+        :param hosts: The hosts the clause is evaluated against.
+        :type hosts: list
+        :param estimated: The estimated number of hosts the clause is
+            evaluated against.
+        :type estimated: float
+        :param depth: The depth of the clause in the plan.
+        :type depth: integer
+        :param rows: The rows recorded so far.
+        :type rows: list
+
+        :return result: A tuple of the matching hosts, in inventory order,
+        and the estimated number of matching hosts.
+        """
+        # The row of the clause goes before the rows of its operands
+        position = len(rows)
+        rows.append(None)
+        outcome = estimated * self.selectivity(node)
+        if isinstance(node, AND):
+            # Every clause only sees the hosts matched by the previous ones
+            matched, scope = hosts, estimated
+            for clause in self._clauses(node, AND):
+                matched, scope = self._explain(clause, matched, scope, depth + 1, rows)
+        elif isinstance(node, OR):
+            # Every clause only sees the hosts not matched by the previous ones
+            remaining, scope, names = hosts, estimated, set()
+            for clause in self._clauses(node, OR):
+                passed, found = self._explain(clause, remaining, scope, depth + 1, rows)
+                names.update(h.name for h in passed)
+                remaining = [h for h in remaining if h.name not in names]
+                scope -= found
+            matched = [h for h in hosts if h.name in names]
+        else:
+            matched = [h for h in hosts if node(h)]
+        rows[position] = ExplainRow(
+            depth, node, self.cost(node), len(hosts), outcome, len(matched)
+        )
+        return matched, outcome
+
+
+class Plan:
+    def __init__(self, filter_obj, rows):
+        """
+        The plan of a filter, as evaluated by explain().
+
+        :param filter_obj: The planned filter.
+        :param rows: A row per clause of the plan, in evaluation order.
+        :type rows: list
+        """
+        self.filter = filter_obj
+        self.rows = rows
+
+    def __str__(self):
+        lines = [
+            f"{'Clause':<60} {'us/host':>8} {'Examined':>9} {'Estimated':>10} "
+            f"{'Actual':>7}"
+        ]
+        for row in self.rows:
+            # Operators are shown by name, their clauses are indented below
+            if isinstance(row.clause, (AND, OR)):
+                label = type(row.clause).__name__
+            else:
+                label = str(row.clause)
+            label = ("  " * row.depth + label)[:60]
+            lines.append(
+                f"{label:<60} {row.cost * 1e6:>8.2f} {row.examined:>9} "
+                f"{row.estimated:>10.1f} {row.actual:>7}"
+            )
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.filter})"
+
+
+class PlannedInventory(InventoryWrapper):
+    __slots__ = ("statistics", "planner")
+
+    def __init__(self, inventory):
+        """
+        A nornir Inventory which collects the statistics of its hosts, and
+        plans every filter before it's evaluated by the wrapped inventory.
+
+        The statistics aren't updated when hosts change, as they only affect
+        the order of the clauses, never the result. Call analyze() to
+        collect them again, or update_hosts() with the hosts which changed.
+
+        :param inventory: The inventory to plan the filters of.
+        :type inventory: nornir.core.inventory.Inventory
+        """
+        super().__init__(inventory)
+        self.analyze()
+
+    def analyze(self):
+        """
+        Collect the statistics of the hosts.
+        """
+        self.statistics = Statistics(self.hosts)
+        self.planner = Planner(self.statistics)
+
+    def update_hosts(self, previous, current, groups=()):
+        """
+        Update the statistics after hosts or groups were added, removed or
+        changed, and the wrapped inventory, if it keeps indexes of its own.
+
+        :param previous: Host name -> the attributes the host had before the
+            change, for every host removed or changed.
+        :type previous: dict
+        :param current: Host name -> the attributes of the host, for every
+            host added or changed.
+        :type current: dict
+        :param groups: The names of the groups added, removed or whose
+            parent groups changed.
+        :type groups: iterable
+        """
+        self.statistics.update_hosts(self.hosts, previous, current)
+        update = getattr(self.inventory, "update_hosts", None)
+        if update is not None:
+            update(previous, current, groups)
+
+    def filter(self, filter_obj=None, filter_func=None, **kwargs):
+        """
+        Filter the inventory, see nornir.core.inventory.Inventory.filter.
+
+        :return inventory: The result of the wrapped inventory, for the
+        planned filter.
+        """
+        filter_obj = filter_obj or filter_func
+        if filter_obj is not None and not kwargs:
+            filter_obj = self.planner.plan(filter_obj)
+        return self.inventory.filter(filter_obj, **kwargs)
+
+    def explain(self, filter_obj):
+        """
+        Show the plan of a filter, with the estimated and actual number of
+        hosts matched by every clause.
+
+        :param filter_obj: An F object, an AND/OR of them, or a filter
+            function.
+
+        :return plan: A Plan, printable as a table.
+        """
+        return self.planner.explain(filter_obj, self.hosts)
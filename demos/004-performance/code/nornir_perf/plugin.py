@@ -0,0 +1,359 @@
+"""
+PerfInventory - a drop-in replacement for the nornir SimpleInventory plugin.
+
+It reads the same hosts.yaml, groups.yaml and defaults.yaml files, but
+caches the parsed result in a binary snapshot, so repeated runs against an
+unchanged inventory don't pay for YAML parsing again. Cold starts parse the
+files with the fastest parser backend available, see nornir_perf.loader.
+"""
+
+# Import modules
+import os
+from nornir.core.inventory import Defaults, Group, Groups, Host, Hosts, Inventory
+from nornir.core.inventory import ParentGroups
+from nornir.plugins.inventory.simple import _get_defaults, _get_inventory_element
+from nornir_perf.cache import CACHE_SIZE, CachedInventory
+from nornir_perf.columnar import columnar_hosts
+from nornir_perf.flat import FlatGroup, FlatHost, flat_defaults
+from nornir_perf.inventory import IndexedInventory
+from nornir_perf.loader import iter_entries, load_yaml
+from nornir_perf.planner import PlannedInventory
+from nornir_perf.snapshot import (
+    default_snapshot_file,
+    inventory_fingerprint,
+    read_snapshot,
+    write_snapshot,
+)
+from nornir_perf.vector import VectorInventory
+
+
+def read_yaml(path, encoding="utf-8", parser="auto"):
+    """
+    Parse a YAML inventory file, to the same data as SimpleInventory does.
+
+    :param path: The path of the YAML file.
+    :type path: string
+    :param encoding: The encoding of the YAML file.
+    :type encoding: string
+    :param parser: The parser backend: auto, fast, libyaml or ruamel.
+        Default: auto
+    :type parser: string
+
+    :return data: The parsed YAML data, or an empty dict for an empty file.
+    """
+    return load_yaml(path, encoding, parser)
+
+
+def build_inventory(
+    hosts_dict,
+    groups_dict=None,
+    defaults_dict=None,
+    flatten=False,
+    columnar=False,
+    filter_func=None,
+):
+    """
+    Build a nornir Inventory from already parsed inventory data.
+
+    This mirrors SimpleInventory.load(), so the resulting hosts and groups
+    are identical to the ones nornir would build itself.
+
+    :param hosts_dict: The parsed contents of the hosts file, or an iterable
+        of (name, host data) tuples, i.e. from iter_entries().
+    :type hosts_dict: dict
+    :param groups_dict: The parsed contents of the groups file.
+    :type groups_dict: dict
+    :param defaults_dict: The parsed contents of the defaults file.
+    :type defaults_dict: dict
+    :param flatten: Whether to build FlatHost, FlatGroup and FlatDefaults,
+        which resolve inherited data into a lookup table per host.
+        Default: False
+    :type flatten: boolean
+    :param columnar: Whether to store the hosts in a ColumnStore, as
+        ColumnHost row proxies, to cut the memory used by large inventories.
+        Default: False
+    :type columnar: boolean
+    :param filter_func: A filter the hosts must match to be kept, i.e. an F
+        object. Every host is built and evaluated as soon as it is read, and
+        the hosts which don't match are thrown away straight away.
+        Default: every host is kept
+    :type filter_func: callable
+
+    :return inventory: An initialised nornir Inventory.
+    """
+    if flatten and columnar:
+        raise ValueError("Flattened hosts can't be columnar")
+    defaults = _get_defaults(defaults_dict) if defaults_dict else Defaults()
+    host_type, group_type = Host, Group
+    if flatten:
+        defaults = flat_defaults(defaults)
+        host_type, group_type = FlatHost, FlatGroup
+    # Build groups, with their parent groups still as names
+    groups = Groups()
+    for n, g in (groups_dict or {}).items():
+        groups[n] = _get_inventory_element(group_type, g, n, defaults)
+    # Swap the parent group names for the actual group objects
+    for g in groups.values():
+        g.groups = ParentGroups([groups[p] for p in g.groups])
+    items = hosts_dict.items() if isinstance(hosts_dict, dict) else hosts_dict
+    if columnar:
+        if filter_func is not None:
+            # Column rows can't be removed, so evaluate plain hosts first
+            items = [
+                (n, h)
+                for n, h in items
+                if filter_func(_build_host(Host, n, h, groups, defaults))
+            ]
+        hosts = Hosts(columnar_hosts(dict(items), groups, defaults))
+        return Inventory(hosts=hosts, groups=groups, defaults=defaults)
+    hosts = Hosts()
+    for n, h in items:
+        host = _build_host(host_type, n, h, groups, defaults)
+        if filter_func is None or filter_func(host):
+            hosts[n] = host
+    return Inventory(hosts=hosts, groups=groups, defaults=defaults)
+
+
+def _build_host(host_type, name, data, groups, defaults):
+    """
+    Build a host of parsed inventory data, like SimpleInventory does.
+
+    :param host_type: The class of the host, i.e. FlatHost.
+    :type host_type: type
+    :param name: The host name.
+    :type name: string
+    :param data: The parsed host data.
+    :type data: dict
+    :param groups: The groups the host may belong to.
+    :type groups: nornir.core.inventory.Groups
+    :param defaults: The defaults of the inventory.
+    :type defaults: nornir.core.inventory.Defaults
+
+    :return host: The host, with its parent groups.
+    """
+    host = _get_inventory_element(host_type, data, name, defaults)
+    host.groups = ParentGroups([groups[p] for p in host.groups])
+    return host
+
+
+class PerfInventory:
+    def __init__(
+        self,
+        host_file="hosts.yaml",
+        group_file="groups.yaml",
+        defaults_file="defaults.yaml",
+        encoding="utf-8",
+        snapshot=True,
+        snapshot_file=None,
+        index=False,
+        flatten=False,
+        columnar=False,
+        vectorize=False,
+        plan=False,
+        cache=False,
+        cache_size=CACHE_SIZE,
+        stream=False,
+        filter=None,
+        parser="auto",
+    ):
+        """
+        Inventory plugin which loads the nornir YAML inventory files, using a
+        binary snapshot of the parsed files whenever it is still valid.
+
+        :param host_file: The path of the hosts inventory file.
+        :type host_file: string
+        :param group_file: The path of the groups inventory file. It is
+            skipped if it doesn't exist.
+        :type group_file: string
+        :param defaults_file: The path of the defaults inventory file. It is
+            skipped if it doesn't exist.
+        :type defaults_file: string
+        :param encoding: The encoding of the inventory files.
+        :type encoding: string
+        :param snapshot: Whether to read and write the snapshot cache.
+            Default: True
+        :type snapshot: boolean
+        :param snapshot_file: The path of the snapshot file.
+            Default: <host_file>.nrsnap
+        :type snapshot_file: string
+        :param index: Whether to build an attribute index at load time, so
+            F, ~F and keyword filters are answered without scanning hosts.
+            Default: False
+        :type index: boolean
+        :param flatten: Whether to resolve the data and attributes every host
+            inherits from its groups and defaults into a lookup table, so hot
+            loops reading inherited keys don't walk the groups of every host.
+            The tables are rebuilt whenever group or defaults data changes.
+            Default: False
+        :type flatten: boolean
+        :param columnar: Whether to keep the attributes and data of every host
+            in columns of interned values, with the hosts as thin row proxies,
+            to cut the memory used by very large inventories. It can't be
+            combined with flatten.
+            Default: False
+        :type columnar: boolean
+        :param vectorize: Whether to encode every attribute of the hosts as
+            NumPy columns at load time, so F, ~F and keyword filters are
+            evaluated as vectorized masks. It needs numpy, and can't be
+            combined with index.
+            Default: False
+        :type vectorize: boolean
+        :param plan: Whether to collect the value frequencies of every
+            attribute at load time, and use them to evaluate the clauses of
+            every filter cheapest and most selective first.
+            Default: False
+        :type plan: boolean
+        :param cache: Whether to memoize the results of filters, so repeated
+            filters are a lookup. The cache is thrown away whenever hosts or
+            groups are added, replaced or removed, or group or defaults data
+            changes.
+            Default: False
+        :type cache: boolean
+        :param cache_size: The number of filter results to keep.
+            Default: CACHE_SIZE
+        :type cache_size: integer
+        :param stream: Whether to parse the hosts file one host at a time,
+            building every host as soon as it is parsed, instead of parsing
+            the whole file first. It cuts the peak memory used by huge
+            inventories, and skips the snapshot.
+            Default: False
+        :type stream: boolean
+        :param filter: A filter the hosts must match to be kept, i.e. an F
+            object or a function of a host. Hosts which don't match are
+            thrown away as soon as they are built.
+            Default: every host is kept
+        :type filter: callable
+        :param parser: The YAML parser backend: fast, for the autogenerated
+            motherstarter files, libyaml, which needs PyYAML, or ruamel, as
+            SimpleInventory. auto picks the fastest one which can parse every
+            file, and any backend falls back to the next one if it can't. The
+            hosts file is always parsed with ruamel when streamed.
+            Default: auto
+        :type parser: string
+        """
+        if index and vectorize:
+            raise ValueError("The index and the vectorized engine are exclusive")
+        self.host_file = os.path.expanduser(host_file)
+        self.group_file = os.path.expanduser(group_file)
+        self.defaults_file = os.path.expanduser(defaults_file)
+        self.encoding = encoding
+        self.snapshot = snapshot
+        self.snapshot_file = snapshot_file or default_snapshot_file(self.host_file)
+        self.index = index
+        self.flatten = flatten
+        self.columnar = columnar
+        self.vectorize = vectorize
+        self.plan = plan
+        self.cache = cache
+        self.cache_size = cache_size
+        self.stream = stream
+        self.filter = filter
+        self.parser = parser
+
+    def parse_groups(self):
+        """
+        Parse the groups and defaults files from YAML.
+
+        :return data: A dict with the parsed groups and defaults.
+        """
+        data = {}
+        for key, path in (
+            ("groups", self.group_file),
+            ("defaults", self.defaults_file),
+        ):
+            data[key] = (
+                read_yaml(path, self.encoding, self.parser)
+                if os.path.exists(path)
+                else {}
+            )
+        return data
+
+    def parse(self):
+        """
+        Parse all inventory files from YAML.
+
+        :return data: A dict with the parsed hosts, groups and defaults.
+        """
+        data = {"hosts": self.parse_hosts()}
+        data.update(self.parse_groups())
+        return data
+
+    def parse_hosts(self):
+        """
+        Parse the hosts file from YAML.
+
+        :return hosts: The parsed hosts.
+        """
+        return read_yaml(self.host_file, self.encoding, self.parser)
+
+    def iter_hosts(self):
+        """
+        Parse the hosts file one host at a time.
+
+        :return hosts: A generator of (name, host data) tuples.
+        """
+        return iter_entries(self.host_file, self.encoding)
+
+    def inventory_files(self):
+        """
+        List the inventory files, which the snapshot is keyed by.
+
+        :return paths: A tuple of the paths of the inventory files.
+        """
+        return (self.host_file, self.group_file, self.defaults_file)
+
+    def load_data(self):
+        """
+        Load the parsed inventory data, from the snapshot when it is still
+        valid, otherwise from YAML (refreshing the snapshot).
+
+        :return data: A dict with the parsed hosts, groups and defaults.
+        """
+        if not self.snapshot:
+            return self.parse()
+        fingerprint = inventory_fingerprint(*self.inventory_files())
+        data = read_snapshot(self.snapshot_file, fingerprint)
+        if data is None:
+            # Cold start or stale snapshot, so parse and rebuild the snapshot
+            data = self.parse()
+            write_snapshot(self.snapshot_file, fingerprint, data)
+        return data
+
+    def load(self):
+        """
+        Load the inventory, as required by the nornir inventory plugin API.
+
+        :return inventory: An initialised nornir Inventory.
+        """
+        if self.stream:
+            # Groups are needed to build the hosts, so they're parsed first
+            data = self.parse_groups()
+            hosts = self.iter_hosts()
+        else:
+            data = self.load_data()
+            hosts = data["hosts"]
+        inventory = build_inventory(
+            hosts,
+            data["groups"],
+            data["defaults"],
+            flatten=self.flatten,
+            columnar=self.columnar,
+            filter_func=self.filter,
+        )
+        if self.index:
+            inventory = IndexedInventory(
+                hosts=inventory.hosts,
+                groups=inventory.groups,
+                defaults=inventory.defaults,
+            )
+        if self.vectorize:
+            inventory = VectorInventory(
+                hosts=inventory.hosts,
+                groups=inventory.groups,
+                defaults=inventory.defaults,
+            )
+        if self.plan:
+            inventory = PlannedInventory(inventory)
+        if self.cache:
+            inventory = CachedInventory(inventory, self.cache_size)
+        return inventory
@@ -0,0 +1,309 @@
+"""
+Filter profiling.
+
+nr.filter() just returns, so a slow filter in a pipeline gives no clue of
+why it's slow. Within a FilterProfile block, every filter() call on any
+inventory (stock nornir ones included) is recorded: the expression, the
+access path which answered it, the number of hosts evaluated, the number of
+hosts matched, the wall time and, optionally, the memory allocated.
+
+The access path is "scan" when nornir evaluated every host, "index" when an
+index answered the filter without evaluating any host, "index+scan" when an
+index narrowed down the hosts the rest of the filter was evaluated against,
+and "cache" when a CachedInventory returned a memoized result. Filters of
+wrapping inventories, i.e. a PlannedInventory, are recorded once, with the
+access path of the inventory they wrap.
+
+The filter methods are only instrumented within the block, so filters cost
+nothing extra outside of it.
+"""
+
+# Import modules
+import time
+import tracemalloc
+from collections import namedtuple
+from functools import wraps
+from nornir.core.inventory import Inventory
+from nornir_perf.bitmap import BitmapEngine, count_bits
+from nornir_perf.inventory import InventoryWrapper
+from nornir_perf.vector import VectorEngine
+
+# A filter() call, as recorded by a FilterProfile
+FilterRecord = namedtuple(
+    "FilterRecord",
+    ["expression", "inventory", "path", "examined", "matched", "seconds", "allocated"],
+)
+
+# The engines whose scans are counted as hosts examined
+ENGINES = (BitmapEngine, VectorEngine)
+
+# The FilterProfile blocks currently open
+_profiles = []
+# The filter() calls in progress, innermost last
+_calls = []
+# The original methods, while they are instrumented
+_originals = {}
+
+
+class _Call:
+    __slots__ = ("path", "examined")
+
+    def __init__(self):
+        """
+        A filter() call in progress.
+        """
+        # The access path of the inventory it was passed to, if any
+        self.path = None
+        self.examined = 0
+
+
+def describe(filter_obj=None, filter_func=None, **kwargs):
+    """
+    Describe the arguments of a filter() call.
+
+    :param filter_obj: The F object or filter function, if any.
+    :param filter_func: The filter function, if any.
+    :param kwargs: The keyword filters, or the arguments of the filter
+        function.
+
+    :return description: A string.
+    """
+    filter_obj = filter_obj or filter_func
+    parts = []
+    if filter_obj is not None:
+        parts.append(getattr(filter_obj, "__name__", None) or str(filter_obj))
+    parts += [f"{k}={v!r}" for k, v in kwargs.items()]
+    return ", ".join(parts)
+
+
+class _Measurement:
+    __slots__ = ("traced", "start", "before", "seconds", "allocated")
+
+    def __init__(self, allocations):
+        """
+        Measure the wall time of a block and, if tracemalloc is tracing, the
+        memory it allocates.
+
+        :param allocations: Whether to measure the memory allocated.
+        :type allocations: boolean
+        """
+        self.traced = allocations and tracemalloc.is_tracing()
+        self.start = self.before = 0
+        self.seconds = 0.0
+        self.allocated = None
+
+    def __enter__(self):
+        if self.traced:
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            self.before = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds = time.perf_counter() - self.start
+        if self.traced and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            # The peak since the block started, when it can be reset
+            allocated = peak if hasattr(tracemalloc, "reset_peak") else current
+            self.allocated = allocated - self.before
+
+
+def _access_path(call, method, inventory):
+    """
+    Find the access path of a filter() call which nothing else answered.
+
+    :param call: The call.
+    :type call: nornir_perf.profile._Call
+    :param method: The original filter method.
+    :type method: callable
+    :param inventory: The inventory it was called on.
+    :type inventory: nornir.core.inventory.Inventory
+    """
+    if method is _originals[Inventory]:
+        call.path = "scan"
+        call.examined = len(inventory.hosts)
+    elif isinstance(inventory, InventoryWrapper):
+        # A wrapper which didn't pass the filter on, i.e. a cache hit
+        call.path = "cache"
+    else:
+        call.path = "index+scan" if call.examined else "index"
+
+
+def _profiled_filter(method):
+    """
+    Wrap the filter method of an inventory class, so its calls are recorded.
+
+    :param method: The filter method.
+    :type method: callable
+
+    :return method: The wrapped method.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        call = _Call()
+        _calls.append(call)
+        outermost = len(_calls) == 1
+        try:
+            with _Measurement(outermost) as measurement:
+                result = method(self, *args, **kwargs)
+        finally:
+            _calls.pop()
+        if call.path is None:
+            # Nothing else answered the filter, so it was this inventory
+            _access_path(call, method, self)
+        if not outermost:
+            # Let the inventory which wraps this one record the call
+            caller = _calls[-1]
+            caller.path = call.path
+            caller.examined += call.examined
+            return result
+        record = FilterRecord(
+            describe(*args, **kwargs),
+            type(self).__name__,
+            call.path,
+            call.examined,
+            len(result.hosts),
+            measurement.seconds,
+            measurement.allocated,
+        )
+        for profile in _profiles:
+            profile.records.append(record)
+        return result
+
+    return wrapper
+
+
+def _profiled_scan(method):
+    """
+    Wrap the scan method of an engine, so the hosts it evaluates are counted.
+
+    :param method: The scan method.
+    :type method: callable
+
+    :return method: The wrapped method.
+    """
+
+    @wraps(method)
+    def wrapper(self, predicate, scope):
+        if _calls:
+            # A bitmap for the BitmapEngine, a NumPy mask for the VectorEngine
+            examined = count_bits(scope) if isinstance(scope, int) else int(scope.sum())
+            _calls[-1].examined += examined
+        return method(self, predicate, scope)
+
+    return wrapper
+
+
+def _inventory_classes(cls=Inventory):
+    """
+    List an inventory class and all of its subclasses which define their own
+    filter method.
+
+    :param cls: The base class.
+    :type cls: type
+
+    :return classes: A list of classes.
+    """
+    classes = [cls] if "filter" in vars(cls) else []
+    for subclass in cls.__subclasses__():
+        classes += _inventory_classes(subclass)
+    return classes
+
+
+def _instrument():
+    """
+    Wrap the filter methods of every inventory class, and the scan methods of
+    the engines.
+    """
+    for cls in _inventory_classes():
+        _originals[cls] = vars(cls)["filter"]
+    for cls in ENGINES:
+        _originals[cls] = vars(cls)["scan"]
+    for cls, method in _originals.items():
+        if cls in ENGINES:
+            setattr(cls, "scan", _profiled_scan(method))
+        else:
+            setattr(cls, "filter", _profiled_filter(method))
+
+
+def _restore():
+    """
+    Put the original filter and scan methods back.
+    """
+    for cls, method in _originals.items():
+        setattr(cls, "scan" if cls in ENGINES else "filter", method)
+    _originals.clear()
+
+
+class FilterProfile:
+    def __init__(self, allocations=False):
+        """
+        Record every filter() call made within a with block:
+
+            with FilterProfile() as profile:
+                odd_devices = nr.filter(filter_func=odd_device_naming_convention)
+                apac = odd_devices.filter(F(region__eq="apac"))
+            print(profile)
+
+        :param allocations: Whether to trace the memory allocated by every
+            call with tracemalloc, which slows everything down.
+            Default: False
+        :type allocations: boolean
+        """
+        self.allocations = allocations
+        self.records = []
+        self._tracing = False
+
+    def __enter__(self):
+        if not _profiles:
+            _instrument()
+        _profiles.append(self)
+        if self.allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+        _profiles.remove(self)
+        if not _profiles:
+            _restore()
+        return False
+
+    def report(self):
+        """
+        Get the recorded calls, as plain data.
+
+        :return records: A list of dicts, one per filter() call, in order.
+        """
+        return [record._asdict() for record in self.records]
+
+    @property
+    def seconds(self):
+        """
+        The total wall time of the recorded calls.
+        """
+        return sum(record.seconds for record in self.records)
+
+    def __str__(self):
+        lines = [
+            f"{'Expression':<50} {'Inventory':<18} {'Path':<10} {'Examined':>9} "
+            f"{'Matched':>8} {'ms':>9} {'KiB':>9}"
+        ]
+        for record in self.records:
+            allocated = (
+                "-" if record.allocated is None else f"{record.allocated / 1024:.1f}"
+            )
+            lines.append(
+                f"{record.expression[:50]:<50} {record.inventory[:18]:<18} "
+                f"{record.path:<10} {record.examined:>9} {record.matched:>8} "
+                f"{record.seconds * 1000:>9.3f} {allocated:>9}"
+            )
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self.records)} calls)"
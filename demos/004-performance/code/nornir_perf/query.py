@@ -0,0 +1,221 @@
+"""
+Lazy filter queries.
+
+Chaining filters on a nornir inventory evaluates every filter straight away,
+and builds an intermediate inventory per filter. A Query only records the
+chained filter calls. When its results are first used, the filters are fused
+into a single AND: clauses the index can answer are resolved as bitmaps
+first, and everything else is fused into one predicate, evaluated in a
+single pass over the remaining candidates.
+
+The fused predicate orders its clauses cheapest and most selective first.
+It times every clause against the first hosts it sees, then evaluates the
+rest of the hosts in order of cost per rejected host, stopping at the first
+clause which rejects a host. As the clauses are reordered, they must not
+depend on each other, i.e. a filter_func mustn't rely on an earlier filter
+to have removed the hosts it can't handle.
+"""
+
+# Import modules
+from functools import partial, reduce
+from time import perf_counter
+from nornir.core.filter import AND, F, F_BASE
+from nornir.core.inventory import Host
+from nornir_perf.index import RULE_OPERATORS
+
+# Number of hosts the fused predicate times its clauses against, before
+# settling on their order
+SAMPLE_SIZE = 64
+
+
+def match_keywords(host, **kwargs):
+    """
+    Keyword filter, as evaluated by nornir's Inventory.filter.
+
+    :param host: The host you want to filter on
+
+    :return bool: True if the host has all the given values
+    """
+    return all(host.get(k) == v for k, v in kwargs.items())
+
+
+def clause(filter_obj=None, filter_func=None, **kwargs):
+    """
+    Turn the arguments of a filter() call into a single filter.
+
+    :param filter_obj: The F object or filter function, if any.
+    :param filter_func: The filter function, if any.
+    :param kwargs: The keyword filters, or the arguments of the filter
+        function.
+
+    :return filter: An F object, or a function of a host returning a boolean.
+    """
+    filter_obj = filter_obj or filter_func
+    if filter_obj is not None:
+        return partial(filter_obj, **kwargs) if kwargs else filter_obj
+    # Keyword filters are the same as an F filter, unless a key names a host
+    # method or an F operator, so the index can answer them
+    for key in kwargs:
+        if (
+            "__" in key
+            or key in RULE_OPERATORS
+            or callable(getattr(Host, key, None))
+            or hasattr(Host, f"__{key}__")
+        ):
+            return partial(match_keywords, **kwargs)
+    return F(**kwargs)
+
+
+class FusedPredicate:
+    __slots__ = ("clauses", "sample_size", "costs", "rejected", "seen")
+
+    def __init__(self, clauses, sample_size=SAMPLE_SIZE):
+        """
+        A single predicate which matches the hosts matching every clause.
+
+        :param clauses: The filters to fuse, in their initial order.
+        :type clauses: list
+        :param sample_size: The number of hosts to time the clauses against,
+            before reordering them.
+        :type sample_size: integer
+        """
+        self.clauses = list(clauses)
+        self.sample_size = sample_size
+        # Time spent in, and number of hosts rejected by, each clause
+        self.costs = [0.0] * len(self.clauses)
+        self.rejected = [0] * len(self.clauses)
+        self.seen = 0
+
+    def _sample(self, host):
+        """
+        Evaluate every clause against a host, recording their cost and
+        whether they rejected the host.
+
+        :param host: The host you want to filter on
+
+        :return bool: True if it matches, False if it doesn't match
+        """
+        matched = True
+        for i, predicate in enumerate(self.clauses):
+            start = perf_counter()
+            passed = predicate(host)
+            self.costs[i] += perf_counter() - start
+            if not passed:
+                self.rejected[i] += 1
+                matched = False
+        self.seen += 1
+        if self.seen == self.sample_size:
+            self.reorder()
+        return matched
+
+    def reorder(self):
+        """
+        Sort the clauses by cost per rejected host, so cheap clauses which
+        reject many hosts run first. Clauses which rejected no hosts so far
+        run last, in their current order.
+        """
+        ranks = [
+            cost / rejected if rejected else float("inf")
+            for cost, rejected in zip(self.costs, self.rejected)
+        ]
+        order = sorted(range(len(self.clauses)), key=ranks.__getitem__)
+        self.clauses = [self.clauses[i] for i in order]
+        self.costs = [self.costs[i] for i in order]
+        self.rejected = [self.rejected[i] for i in order]
+
+    def __call__(self, host):
+        if self.seen < self.sample_size:
+            return self._sample(host)
+        for predicate in self.clauses:
+            if not predicate(host):
+                return False
+        return True
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.clauses})"
+
+
+class Query:
+    __slots__ = ("source", "clauses", "_result")
+
+    def __init__(self, source, clauses=()):
+        """
+        A lazy chain of filters over a nornir object or inventory. Filtering
+        a Query returns a new Query, and nothing is evaluated until the
+        results are used.
+
+        :param source: The object to filter, i.e. an initialised Nornir, an
+            Inventory, an IndexedInventory or an InventoryView.
+        :param clauses: The filters recorded so far.
+        :type clauses: tuple
+        """
+        self.source = source
+        self.clauses = tuple(clauses)
+        self._result = None
+
+    def filter(self, filter_obj=None, filter_func=None, **kwargs):
+        """
+        Record a filter, see nornir.core.inventory.Inventory.filter.
+
+        :return query: A new Query, with the filter added.
+        """
+        added = clause(filter_obj, filter_func, **kwargs)
+        return Query(self.source, self.clauses + (added,))
+
+    def fuse(self):
+        """
+        Fuse the recorded filters into a single filter.
+
+        :return filter: An AND of the clauses the index can answer and a
+        FusedPredicate of the rest, or None if there is nothing to filter.
+        """
+        inventory = getattr(self.source, "inventory", self.source)
+        engine = getattr(inventory, "engine", None)
+        indexed, scanned = [], []
+        for c in self.clauses:
+            if engine is not None and engine.indexed(c):
+                indexed.append(c)
+            else:
+                scanned.append(c)
+        # Until the fused predicate has timed them, assume F filters are
+        # cheaper than filter functions
+        scanned.sort(key=lambda c: not isinstance(c, F_BASE))
+        if len(scanned) > 1:
+            scanned = [FusedPredicate(scanned)]
+        nodes = indexed + scanned
+        return reduce(AND, nodes) if nodes else None
+
+    def run(self):
+        """
+        Evaluate the query, in a single filter() call on the source.
+
+        :return result: The filtered source, i.e. a Nornir object for a
+        Nornir source, and an inventory for an inventory source.
+        """
+        if self._result is None:
+            self._result = self.source.filter(self.fuse())
+        return self._result
+
+    @property
+    def inventory(self):
+        """
+        The filtered inventory.
+        """
+        result = self.run()
+        return getattr(result, "inventory", result)
+
+    @property
+    def hosts(self):
+        """
+        The filtered hosts.
+        """
+        return self.inventory.hosts
+
+    def __iter__(self):
+        return iter(self.hosts)
+
+    def __len__(self):
+        return len(self.hosts)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({list(self.clauses)})"
@@ -0,0 +1,462 @@
+"""
+InventoryWatcher - hot reloading of the inventory files of a nornir object.
+
+Long running tooling would have to load the whole inventory again to pick
+up an edit of hosts.yaml, and rebuild every index and throw away every
+cached filter result along with it. An InventoryWatcher polls the
+modification time of the inventory files instead, parses only the files
+which changed, and diffs them against the data it last loaded, host by
+host and group by group. Only the hosts and groups which were added,
+removed or changed are built, and they're applied to the inventory in
+place, so the Host and Group objects of everything else are untouched.
+
+The indexes of the inventory are then updated for the hosts which changed
+only: the postings of an AttributeIndex, the GroupIndex memberships, the
+statistics of the planner, and the cached results of the filters on the
+attributes which changed. A VectorIndex is rebuilt, as NumPy columns can't
+grow or shrink in place.
+"""
+
+# Import modules
+import os
+import threading
+from collections import namedtuple
+from nornir.core.inventory import Defaults, Group, Host, ParentGroups
+from nornir.core.plugins.inventory import InventoryPluginRegister
+from nornir.plugins.inventory.simple import _get_defaults, _get_inventory_element
+from nornir_perf.columnar import ColumnHost, ColumnStore, column_host
+from nornir_perf.flat import FlatGroup, FlatHost, flat_defaults
+from nornir_perf.index import host_attributes
+from nornir_perf.plugin import PerfInventory, _build_host
+from nornir_perf.snapshot import inventory_fingerprint, write_snapshot
+
+# Number of seconds between two polls of the inventory files
+POLL_INTERVAL = 2.0
+
+# The attributes copied from a rebuilt host, group or defaults, in place. They
+# are read as they're set, as nornir resolves the inherited ones on access
+HOST_ATTRIBUTES = (
+    "hostname",
+    "port",
+    "username",
+    "password",
+    "platform",
+    "groups",
+    "data",
+    "connection_options",
+)
+
+# The changes applied by a reload, as sets of host and group names
+Changes = namedtuple(
+    "Changes",
+    [
+        "added_hosts",
+        "removed_hosts",
+        "updated_hosts",
+        "added_groups",
+        "removed_groups",
+        "updated_groups",
+        "defaults",
+    ],
+)
+
+
+def diff(old, new):
+    """
+    Compare two dicts of parsed hosts or groups.
+
+    :param old: Name -> parsed data, as last loaded.
+    :type old: dict
+    :param new: Name -> parsed data, as parsed now.
+    :type new: dict
+
+    :return names: A tuple of the sets of added, removed and changed names.
+    """
+    added = new.keys() - old.keys()
+    removed = old.keys() - new.keys()
+    updated = {n for n in new.keys() & old.keys() if new[n] != old[n]}
+    return added, removed, updated
+
+
+def ancestors(name, groups_dict):
+    """
+    Find the names of a group and every group it inherits from, in parsed
+    groups data.
+
+    :param name: The group name.
+    :type name: string
+    :param groups_dict: The parsed groups.
+    :type groups_dict: dict
+
+    :return names: A set of group names.
+    """
+    names, pending = set(), [name]
+    while pending:
+        name = pending.pop()
+        if name not in names:
+            names.add(name)
+            pending.extend((groups_dict.get(name) or {}).get("groups") or ())
+    return names
+
+
+class InventoryWatcher:
+    def __init__(self, nr, plugin=None, interval=POLL_INTERVAL):
+        """
+        Watch the inventory files of a nornir object, and apply their
+        changes to its inventory in place. Call poll() to check the files
+        once, or start() to poll them from a background thread.
+
+        Poll from the thread running the tasks, or hold the lock while
+        filtering, so a reload isn't applied halfway through a filter.
+        Views filtered before a reload keep their hosts, less the removed
+        ones, as removing hosts bumps the generation of the AttributeIndex.
+
+        :param nr: The nornir object, whose inventory was loaded by
+            PerfInventory or one of its subclasses.
+        :type nr: nornir.core.Nornir
+        :param plugin: The inventory plugin which loaded the inventory.
+            Default: a new one, with the options of the nornir config
+        :type plugin: nornir_perf.plugin.PerfInventory
+        :param interval: The number of seconds between two polls of start().
+            Default: POLL_INTERVAL
+        :type interval: float
+        """
+        if plugin is None:
+            config = nr.config.inventory
+            plugin = InventoryPluginRegister.get_plugin(config.plugin)(
+                **(config.options or {})
+            )
+        if not isinstance(plugin, PerfInventory):
+            raise TypeError(f"{type(plugin).__name__} isn't a PerfInventory plugin")
+        self.nr = nr
+        self.plugin = plugin
+        self.interval = interval
+        # Held while a reload is applied
+        self.lock = threading.RLock()
+        # The last exception raised by the background thread
+        self.error = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._stamps = self.stamps()
+        # The parsed data the inventory was built from, which is assumed to
+        # be the data the files hold now
+        self.data = plugin.parse() if plugin.stream else plugin.load_data()
+
+    def stamps(self):
+        """
+        Stamp the inventory files, to tell when they change.
+
+        :return stamps: A dict of path to (mtime, size), or None for files
+        which don't exist.
+        """
+        stamps = {}
+        for path in self.plugin.inventory_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stamps[path] = None
+            else:
+                stamps[path] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def poll(self):
+        """
+        Check the inventory files once, and apply their changes if any file
+        changed since the last poll.
+
+        :return changes: The Changes applied, or None if no file changed.
+        """
+        stamps = self.stamps()
+        if stamps == self._stamps:
+            return None
+        changed = {
+            p
+            for p in stamps.keys() | self._stamps.keys()
+            if stamps.get(p) != self._stamps.get(p)
+        }
+        plugin = self.plugin
+        data = dict(self.data)
+        # A new or removed shard changes the hosts as well
+        if changed - {plugin.group_file, plugin.defaults_file}:
+            data["hosts"] = plugin.parse_hosts()
+        if changed & {plugin.group_file, plugin.defaults_file}:
+            data.update(plugin.parse_groups())
+        changes = self.apply(data)
+        self.data = data
+        self._stamps = stamps
+        if plugin.snapshot and not plugin.stream:
+            fingerprint = inventory_fingerprint(*plugin.inventory_files())
+            write_snapshot(plugin.snapshot_file, fingerprint, data)
+        return changes
+
+    def _validate(self, data, hosts, groups):
+        """
+        Check that every host and group of the parsed data, which may have
+        changed, only belongs to groups which exist.
+
+        :param data: The parsed hosts, groups and defaults.
+        :type data: dict
+        :param hosts: The names of the hosts to check.
+        :type hosts: iterable
+        :param groups: The names of the groups to check.
+        :type groups: iterable
+        """
+        for kind, names, parsed in (
+            ("Host", hosts, data["hosts"]),
+            ("Group", groups, data["groups"]),
+        ):
+            for name in names:
+                for parent in (parsed[name] or {}).get("groups") or ():
+                    if parent not in data["groups"]:
+                        raise ValueError(
+                            f"{kind} {name!r} belongs to the unknown group {parent!r}"
+                        )
+
+    def apply(self, data):
+        """
+        Apply the differences between newly parsed inventory data and the
+        data the inventory was built from, in place.
+
+        :param data: The parsed hosts, groups and defaults.
+        :type data: dict
+
+        :return changes: The Changes applied.
+        """
+        old = self.data
+        added_hosts, removed_hosts, updated_hosts = diff(old["hosts"], data["hosts"])
+        added_groups, removed_groups, updated_groups = diff(
+            old["groups"], data["groups"]
+        )
+        defaults = old["defaults"] != data["defaults"]
+        changed_groups = added_groups | removed_groups | updated_groups
+        # Check the new data before changing anything. Removing a group must
+        # leave no host or group belonging to it
+        if removed_groups:
+            self._validate(data, data["hosts"], data["groups"])
+        else:
+            self._validate(data, added_hosts | updated_hosts, changed_groups)
+        inherited = self._inherited(data, changed_groups, defaults)
+        with self.lock:
+            inventory = self.nr.inventory
+            hosts = inventory.hosts
+            affected = (removed_hosts | updated_hosts | inherited) & hosts.keys()
+            previous = {name: host_attributes(hosts[name]) for name in affected}
+            if defaults:
+                self._apply_defaults(inventory, data["defaults"])
+            self._apply_groups(inventory, data["groups"], added_groups, updated_groups)
+            rebuilt = added_hosts | updated_hosts
+            self._apply_hosts(
+                inventory, data["hosts"], removed_hosts, rebuilt, inherited
+            )
+            for name in removed_groups:
+                del inventory.groups[name]
+            current = {
+                name: host_attributes(hosts[name])
+                for name in rebuilt | inherited
+                if name in hosts
+            }
+            update = getattr(inventory, "update_hosts", None)
+            if update is not None:
+                update(previous, current, changed_groups)
+        return Changes(
+            added_hosts,
+            removed_hosts,
+            updated_hosts,
+            added_groups,
+            removed_groups,
+            updated_groups,
+            defaults,
+        )
+
+    def _inherited(self, data, changed_groups, defaults):
+        """
+        Find the hosts which may inherit something else after a reload.
+
+        :param data: The parsed hosts, groups and defaults.
+        :type data: dict
+        :param changed_groups: The names of the groups added, removed or
+            changed.
+        :type changed_groups: set
+        :param defaults: Whether the defaults changed.
+        :type defaults: boolean
+
+        :return names: A set of host names.
+        """
+        if defaults:
+            return set(data["hosts"])
+        if not changed_groups:
+            return set()
+        # Group name -> whether it inherits from a changed group
+        inheriting = {
+            name: bool(ancestors(name, data["groups"]) & changed_groups)
+            for name in data["groups"]
+        }
+        return {
+            name
+            for name, host in data["hosts"].items()
+            if any(inheriting[g] for g in (host or {}).get("groups") or ())
+        }
+
+    def _apply_hosts(self, inventory, hosts_dict, removed, rebuilt, inherited):
+        """
+        Remove the removed hosts, and build the added and changed ones, in
+        place. With a load filter, hosts which inherit something else are
+        filtered again.
+
+        :param inventory: The inventory to change.
+        :type inventory: nornir.core.inventory.Inventory
+        :param hosts_dict: The parsed hosts.
+        :type hosts_dict: dict
+        :param removed: The names of the removed hosts.
+        :type removed: set
+        :param rebuilt: The names of the added and changed hosts.
+        :type rebuilt: set
+        :param inherited: The names of the hosts which may inherit something
+            else.
+        :type inherited: set
+        """
+        hosts = inventory.hosts
+        for name in removed & hosts.keys():
+            del hosts[name]
+        if rebuilt:
+            # In file order, so added hosts are in the same order as a load
+            for name in [n for n in hosts_dict if n in rebuilt]:
+                self._apply_host(inventory, name, hosts_dict[name])
+        if self.plugin.filter is None:
+            return
+        # Inherited data may make hosts match the filter, or not
+        for name in inherited - rebuilt:
+            host = hosts.get(name)
+            if host is None:
+                self._apply_host(inventory, name, hosts_dict[name])
+            elif not self.plugin.filter(host):
+                del hosts[name]
+
+    def _apply_defaults(self, inventory, defaults_dict):
+        """
+        Replace the defaults data of the inventory in place, as every host
+        and group holds the defaults object.
+
+        :param inventory: The inventory to change.
+        :type inventory: nornir.core.inventory.Inventory
+        :param defaults_dict: The parsed defaults.
+        :type defaults_dict: dict
+        """
+        defaults = _get_defaults(defaults_dict) if defaults_dict else Defaults()
+        if self.plugin.flatten:
+            defaults = flat_defaults(defaults)
+        for attr in HOST_ATTRIBUTES:
+            if attr != "groups":
+                setattr(
+                    inventory.defaults, attr, object.__getattribute__(defaults, attr)
+                )
+
+    def _apply_groups(self, inventory, groups_dict, added, updated):
+        """
+        Add new groups, and replace the data of changed groups in place. The
+        removed groups are only deleted once no host belongs to them.
+
+        :param inventory: The inventory to change.
+        :type inventory: nornir.core.inventory.Inventory
+        :param groups_dict: The parsed groups.
+        :type groups_dict: dict
+        :param added: The names of the new groups.
+        :type added: set
+        :param updated: The names of the changed groups.
+        :type updated: set
+        """
+        group_type = FlatGroup if self.plugin.flatten else Group
+        groups = inventory.groups
+        # Build groups, with their parent groups still as names
+        built = {
+            name: _get_inventory_element(
+                group_type, groups_dict[name], name, inventory.defaults
+            )
+            for name in added | updated
+        }
+        for name in added:
+            groups[name] = built[name]
+        for name in updated:
+            for attr in HOST_ATTRIBUTES:
+                if attr != "groups":
+                    setattr(
+                        groups[name], attr, object.__getattribute__(built[name], attr)
+                    )
+        # Swap the parent group names for the actual group objects
+        for name, group in built.items():
+            groups[name].groups = ParentGroups([groups[p] for p in group.groups])
+
+    def _apply_host(self, inventory, name, host_dict):
+        """
+        Add a new host, or replace the data of a host in place, or remove it
+        if it doesn't match the filter of the plugin anymore.
+
+        :param inventory: The inventory to change.
+        :type inventory: nornir.core.inventory.Inventory
+        :param name: The host name.
+        :type name: string
+        :param host_dict: The parsed host data.
+        :type host_dict: dict
+        """
+        hosts = inventory.hosts
+        host_type = FlatHost if self.plugin.flatten else Host
+        host = _build_host(
+            host_type, name, host_dict, inventory.groups, inventory.defaults
+        )
+        existing = hosts.get(name)
+        if self.plugin.filter is not None and not self.plugin.filter(host):
+            if existing is not None:
+                del hosts[name]
+        elif existing is not None:
+            for attr in HOST_ATTRIBUTES:
+                setattr(existing, attr, object.__getattribute__(host, attr))
+        elif self.plugin.columnar:
+            # New rows are added to the store of the other hosts
+            store = next(
+                (h._store for h in hosts.values() if isinstance(h, ColumnHost)),
+                None,
+            )
+            if store is None:
+                store = ColumnStore(inventory.defaults)
+            hosts[name] = column_host(store, name, host_dict, inventory.groups)
+        else:
+            hosts[name] = host
+
+    def start(self):
+        """
+        Poll the inventory files from a background thread, every interval.
+        An exception raised by a poll is kept in error, and the poll is
+        tried again, i.e. for a file which was saved halfway.
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="InventoryWatcher", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+                self.error = None
+            except Exception as e:
+                self.error = e
+
+    def stop(self):
+        """
+        Stop polling the inventory files from the background thread.
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
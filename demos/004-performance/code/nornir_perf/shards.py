@@ -0,0 +1,206 @@
+"""
+ShardedInventory - an inventory plugin reading the hosts from several files.
+
+An inventory split into host shards, i.e. one file per site, is given as a
+directory or a glob instead of a single hosts file. Every shard is parsed
+in a pool of worker processes, so the load time scales with the number of
+cores, and the parsed shards are merged into one inventory, in the order
+of their sorted paths. A host defined in more than one shard is refused,
+as a duplicate key of a single hosts file is.
+"""
+
+# Import modules
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from nornir_perf.loader import iter_entries
+from nornir_perf.plugin import PerfInventory, read_yaml
+from nornir_perf.snapshot import default_snapshot_file
+
+# The extensions of the shards of a directory
+SHARD_EXTENSIONS = (".yaml", ".yml")
+
+
+def shard_files(source):
+    """
+    List the host shards of a directory or a glob.
+
+    :param source: A directory, whose .yaml and .yml files are the shards, a
+        glob matching the shards, i.e. "inventory/hosts_*.yaml", or a single
+        hosts file.
+    :type source: string
+
+    :return paths: The sorted paths of the shards.
+    """
+    if os.path.isdir(source):
+        paths = [
+            os.path.join(source, name)
+            for name in os.listdir(source)
+            if name.endswith(SHARD_EXTENSIONS)
+        ]
+    elif glob.has_magic(source):
+        paths = glob.glob(source)
+    else:
+        paths = [source]
+    return sorted(p for p in paths if os.path.isfile(p))
+
+
+def _parse_shard(path, encoding, parser):
+    """
+    Parse a host shard, in a worker process.
+
+    :param path: The path of the shard.
+    :type path: string
+    :param encoding: The encoding of the shard.
+    :type encoding: string
+    :param parser: The YAML parser backend.
+    :type parser: string
+
+    :return hosts: The parsed hosts of the shard.
+    """
+    hosts = read_yaml(path, encoding, parser)
+    if not isinstance(hosts, dict):
+        raise ValueError(f"{path}: expected a mapping of hosts")
+    return hosts
+
+
+def merge_shards(shards):
+    """
+    Merge the hosts of several shards, refusing hosts defined more than once.
+
+    :param shards: An iterable of (path, hosts) tuples, where hosts is a dict
+        or an iterable of (name, host data) tuples.
+    :type shards: iterable
+
+    :return hosts: A generator of (name, host data) tuples, in shard order.
+    """
+    # Host name -> the shard defining it
+    seen = {}
+    for path, hosts in shards:
+        for name, data in hosts.items() if isinstance(hosts, dict) else hosts:
+            if name in seen:
+                raise ValueError(
+                    f"Duplicate host {name!r}, defined in {seen[name]} and {path}"
+                )
+            seen[name] = path
+            yield name, data
+
+
+def parse_shards(paths, encoding="utf-8", parser="auto", processes=None):
+    """
+    Parse host shards across a process pool, and merge them.
+
+    :param paths: The paths of the shards.
+    :type paths: list
+    :param encoding: The encoding of the shards.
+    :type encoding: string
+    :param parser: The YAML parser backend.
+        Default: auto
+    :type parser: string
+    :param processes: The number of worker processes. The shards are parsed
+        serially if it is 1, or if there is only one shard.
+        Default: the number of CPUs
+    :type processes: integer
+
+    :return hosts: A dict of host name to host data, in shard order.
+    """
+    processes = min(processes or os.cpu_count() or 1, len(paths))
+    if processes < 2:
+        parsed = (_parse_shard(path, encoding, parser) for path in paths)
+        return dict(merge_shards(zip(paths, parsed)))
+    with ProcessPoolExecutor(processes) as pool:
+        parsed = pool.map(
+            _parse_shard, paths, [encoding] * len(paths), [parser] * len(paths)
+        )
+        return dict(merge_shards(zip(paths, parsed)))
+
+
+class ShardedInventory(PerfInventory):
+    def __init__(
+        self,
+        host_file="hosts",
+        group_file="groups.yaml",
+        defaults_file="defaults.yaml",
+        snapshot_file=None,
+        processes=None,
+        **kwargs,
+    ):
+        """
+        Inventory plugin which loads the hosts from several host shards, i.e.
+        one file per site, parsed in parallel. Every other option is the same
+        as PerfInventory, i.e. the snapshot, index or cache.
+
+        :param host_file: A directory, whose .yaml and .yml files are the host
+            shards, or a glob matching them, i.e. "inventory/hosts_*.yaml".
+        :type host_file: string
+        :param group_file: The path of the groups inventory file. It is
+            skipped if it doesn't exist.
+        :type group_file: string
+        :param defaults_file: The path of the defaults inventory file. It is
+            skipped if it doesn't exist.
+        :type defaults_file: string
+        :param snapshot_file: The path of the snapshot file. It is keyed by
+            every shard, so adding, changing or removing one rebuilds it.
+            Default: <directory of the shards>.nrsnap
+        :type snapshot_file: string
+        :param processes: The number of worker processes parsing the shards.
+            Default: the number of CPUs
+        :type processes: integer
+        """
+        host_file = os.path.expanduser(host_file)
+        if snapshot_file is None:
+            directory = host_file
+            if not os.path.isdir(host_file):
+                directory = os.path.dirname(host_file)
+            snapshot_file = default_snapshot_file(os.path.abspath(directory))
+        super().__init__(
+            host_file=host_file,
+            group_file=group_file,
+            defaults_file=defaults_file,
+            snapshot_file=snapshot_file,
+            **kwargs,
+        )
+        self.processes = processes
+
+    def inventory_files(self):
+        """
+        List the inventory files, which the snapshot is keyed by.
+
+        :return paths: A tuple of the paths of the shards, groups and
+        defaults files.
+        """
+        return tuple(self.shards()) + (self.group_file, self.defaults_file)
+
+    def shards(self):
+        """
+        List the host shards, leaving out the groups and defaults files, in
+        case they're in the same directory.
+
+        :return paths: The sorted paths of the shards.
+        """
+        others = {os.path.abspath(p) for p in (self.group_file, self.defaults_file)}
+        return [
+            p for p in shard_files(self.host_file) if os.path.abspath(p) not in others
+        ]
+
+    def parse_hosts(self):
+        """
+        Parse the host shards in parallel.
+
+        :return hosts: The parsed hosts of every shard.
+        """
+        paths = self.shards()
+        if not paths:
+            raise ValueError(f"No host shards found in {self.host_file}")
+        return parse_shards(paths, self.encoding, self.parser, self.processes)
+
+    def iter_hosts(self):
+        """
+        Parse the host shards one host at a time, one shard after the other.
+
+        :return hosts: A generator of (name, host data) tuples.
+        """
+        paths = self.shards()
+        if not paths:
+            raise ValueError(f"No host shards found in {self.host_file}")
+        return merge_shards((p, iter_entries(p, self.encoding)) for p in paths)
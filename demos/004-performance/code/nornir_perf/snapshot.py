@@ -0,0 +1,122 @@
+"""
+Binary snapshot cache for nornir inventory files.
+
+A snapshot stores the already parsed contents of the hosts, groups and
+defaults files, keyed by the modification time and content hash of each
+source file. Loading a valid snapshot skips YAML parsing entirely.
+"""
+
+# Import modules
+import hashlib
+import os
+import pickle  # nosec B403 - snapshots are local cache files we write ourselves
+import sys
+
+
+# Bump this whenever the layout of the snapshot changes, so that snapshots
+# written by an older version are detected as stale and rebuilt
+SNAPSHOT_FORMAT = 1
+
+# Suffix appended to the host file name to derive the default snapshot path
+SNAPSHOT_SUFFIX = ".nrsnap"
+
+
+def file_fingerprint(path):
+    """
+    Build the fingerprint of a single inventory file.
+
+    :param path: The path of the inventory file.
+    :type path: string
+
+    :return fingerprint: A tuple of (path, mtime_ns, size, sha256). The last
+    three items are None when the file does not exist.
+    """
+    # Missing files (i.e. an optional defaults file) still get a fingerprint,
+    # so that creating the file later invalidates the snapshot
+    if not os.path.exists(path):
+        return (path, None, None, None)
+    stat = os.stat(path)
+    # Hash the file contents in blocks, to keep memory flat on huge files
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return (path, stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+
+
+def inventory_fingerprint(*paths):
+    """
+    Build the combined fingerprint for all inventory files.
+
+    :param paths: The paths of the inventory files making up the inventory.
+    :type paths: string
+
+    :return fingerprint: A tuple used as the snapshot key.
+    """
+    # The python version is part of the key, as pickle protocols differ
+    return (SNAPSHOT_FORMAT, sys.version_info[:2]) + tuple(
+        file_fingerprint(os.path.abspath(p)) for p in paths
+    )
+
+
+def default_snapshot_file(host_file):
+    """
+    Return the default snapshot path, which lives next to the host file.
+
+    :param host_file: The path of the hosts inventory file.
+    :type host_file: string
+
+    :return snapshot_file: The path of the snapshot file.
+    """
+    return f"{host_file}{SNAPSHOT_SUFFIX}"
+
+
+def read_snapshot(snapshot_file, fingerprint):
+    """
+    Read a snapshot, if it exists and matches the fingerprint.
+
+    :param snapshot_file: The path of the snapshot file.
+    :type snapshot_file: string
+    :param fingerprint: The current fingerprint of the inventory files.
+    :type fingerprint: tuple
+
+    :return data: The cached inventory data, or None if the snapshot is
+    missing, unreadable or stale.
+    """
+    try:
+        with open(snapshot_file, "rb") as f:
+            # The key is pickled separately in front of the data, so a stale
+            # snapshot is rejected without unpickling the whole inventory
+            key = pickle.load(f)  # nosec B301
+            if key != fingerprint:
+                return None
+            return pickle.load(f)  # nosec B301
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return None
+
+
+def write_snapshot(snapshot_file, fingerprint, data):
+    """
+    Write a snapshot of the inventory data to disk.
+
+    The snapshot is written to a temporary file first and then moved into
+    place, so a concurrent reader never sees a half written snapshot.
+
+    :param snapshot_file: The path of the snapshot file.
+    :type snapshot_file: string
+    :param fingerprint: The fingerprint of the inventory files.
+    :type fingerprint: tuple
+    :param data: The parsed inventory data to cache.
+    :type data: dict
+    """
+    tmp_file = f"{snapshot_file}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file, "wb") as f:
+            pickle.dump(fingerprint, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, snapshot_file)
+    except OSError:
+        # A read-only inventory directory shouldn't stop nornir from loading,
+        # it only means the next run is a cold start as well
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
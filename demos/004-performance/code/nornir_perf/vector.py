@@ -0,0 +1,511 @@
+"""
+Vectorized evaluation of nornir filters, with NumPy.
+
+The VectorIndex stores every attribute of the hosts as a column of integer
+codes, one per host, pointing into the distinct values of the attribute.
+Integer attributes, i.e. sla, are also kept as an array of the values. An F
+rule is evaluated once per distinct value (with nornir's own code, so the
+semantics are exactly nornir's), which gives a lookup table of matching
+codes, and a single gather of that table by the codes gives the mask of
+matching hosts. AND, OR and NOT are then element-wise operations on masks.
+
+NumPy is optional: the rest of nornir_perf works without it, and only
+building a VectorIndex needs it.
+"""
+
+# Import modules
+import operator
+from nornir.core.filter import AND, F, NOT_F, OR
+from nornir.core.inventory import Host, Inventory
+from nornir_perf.index import (
+    INTEGER_TYPES,
+    RANGE_OPERATORS,
+    RULE_OPERATORS,
+    SAFE_TYPES,
+    host_attributes,
+    is_hashable,
+    is_lookup_key,
+    verify_rule,
+)
+from nornir_perf.inventory import VersionedHosts
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# The code of hosts which don't have an attribute
+MISSING_CODE = -1
+
+# Range operators, evaluated on the arrays of integer attributes
+COMPARISONS = {
+    "ge": operator.ge,
+    "gt": operator.gt,
+    "le": operator.le,
+    "lt": operator.lt,
+}
+
+# The integers an int64 array can hold
+INT64_MIN, INT64_MAX = -(2**63), 2**63 - 1
+
+
+class VectorIndex:
+    def __init__(self, hosts):
+        """
+        Encode every attribute of a set of hosts as NumPy columns.
+
+        :param hosts: The hosts to index.
+        :type hosts: nornir.core.inventory.Hosts
+        """
+        if numpy is None:
+            raise ImportError("The vectorized engine needs numpy: pip install numpy")
+        self.names = list(hosts)
+        self.size = len(self.names)
+        # attribute -> distinct values, by code
+        self.values = {}
+        # attribute -> {value type: codes of the values of that type}
+        self.types = {}
+        # attribute -> {(type, value): code}, for the hashable values
+        self._keys = {}
+        codes = {}
+        for i, host in enumerate(hosts.values()):
+            for attr, value in host_attributes(host).items():
+                column = codes.get(attr)
+                if column is None:
+                    column = codes[attr] = [MISSING_CODE] * self.size
+                    self.values[attr], self.types[attr], self._keys[attr] = [], {}, {}
+                column[i] = self._encode(attr, value)
+        # attribute -> array of the code of every host
+        self.codes = {a: numpy.array(c, dtype=numpy.int32) for a, c in codes.items()}
+        # attribute -> array of the value of every host, for integer attributes
+        self.numbers = {}
+        for attr, types in self.types.items():
+            if set(types) == {int}:
+                self._build_column(attr)
+
+    def _encode(self, attr, value):
+        """
+        Find the code of a value of an attribute, adding the value to the
+        distinct values of the attribute if it's new.
+
+        :param attr: The attribute name.
+        :type attr: string
+        :param value: The value of a host.
+
+        :return code: The code of the value.
+        """
+        key = (type(value), value) if is_hashable(value) else None
+        code = self._keys[attr].get(key) if key is not None else None
+        if code is None:
+            code = len(self.values[attr])
+            self.values[attr].append(value)
+            self.types[attr].setdefault(type(value), []).append(code)
+            if key is not None:
+                self._keys[attr][key] = code
+        return code
+
+    def _build_column(self, attr):
+        """
+        Build the array of the value of every host, for an attribute whose
+        values are all integers. Values an int64 can't hold leave the
+        attribute without one, so its range filters are evaluated per value.
+
+        :param attr: The attribute name.
+        :type attr: string
+        """
+        try:
+            values = numpy.array(self.values[attr] + [0], dtype=numpy.int64)
+        except OverflowError:
+            return
+        # Missing hosts have the code -1, so they pick the trailing 0
+        self.numbers[attr] = values[self.codes[attr]]
+
+    def indexed(self, attr):
+        """
+        Check whether filters on an attribute can be answered by the index.
+
+        :param attr: The attribute name.
+        :type attr: string
+
+        :return bool: True if the index can answer filters on the attribute.
+        """
+        return attr in self.codes or not (hasattr(Host, attr) or attr in RULE_OPERATORS)
+
+    def rule_indexed(self, key):
+        """
+        Check whether an F keyword argument can be answered by the index.
+
+        :param key: The F keyword, i.e. site_code__eq or site_code.
+        :type key: string
+
+        :return bool: True if the index can answer the rule.
+        """
+        rule = key.split("__")
+        if len(rule) == 2 or (len(rule) == 1 and rule[0] not in RULE_OPERATORS):
+            return self.indexed(rule[0])
+        return False
+
+    def _mask(self, attr, matching, missing):
+        """
+        Build the mask of the hosts holding any of the matching values.
+
+        :param attr: The attribute name.
+        :type attr: string
+        :param matching: The codes of the matching values.
+        :type matching: list
+        :param missing: Whether hosts without the attribute match.
+        :type missing: bool
+
+        :return mask: A boolean array, one element per host.
+        """
+        codes = self.codes.get(attr)
+        if codes is None:
+            return numpy.full(self.size, missing, dtype=bool)
+        # The last element of the table is picked by the missing code, -1
+        table = numpy.zeros(len(self.values[attr]) + 1, dtype=bool)
+        table[matching] = True
+        table[MISSING_CODE] = missing
+        return table[codes]
+
+    def _matching(self, attr, predicate, targets=(), usable=None):
+        """
+        Find the codes of the values of an attribute matching a predicate.
+
+        :param attr: The attribute name.
+        :type attr: string
+        :param predicate: A function of the value, returning a boolean.
+        :type predicate: callable
+        :param targets: Values to find by hash lookup instead.
+        :type targets: list
+        :param usable: A function of a value type, returning True when hash
+            lookups are valid for values of that type.
+        :type usable: callable
+
+        :return codes: A list of codes.
+        """
+        values, keys = self.values.get(attr, ()), self._keys.get(attr, {})
+        matching = []
+        for typ, codes in self.types.get(attr, {}).items():
+            if usable is not None and usable(typ):
+                matching.extend(
+                    keys[k] for k in ((typ, t) for t in targets) if k in keys
+                )
+            else:
+                matching.extend(c for c in codes if predicate(values[c]))
+        return matching
+
+    def lookup(self, attr, operator, target):
+        """
+        Find the hosts matching a single F rule, i.e. F(attr__operator=target).
+
+        :param attr: The attribute name.
+        :type attr: string
+        :param operator: The F operator, i.e. eq, ge, any, contains.
+        :type operator: string
+        :param target: The value passed to the F filter.
+
+        :return mask: A boolean array, or None if the index can't answer the
+        rule.
+        """
+        if not self.indexed(attr):
+            return None
+
+        def predicate(value):
+            return verify_rule(value, operator, target)
+
+        # F resolves a missing attribute to an empty dict before comparing
+        missing = predicate({})
+        if (
+            operator in RANGE_OPERATORS
+            and attr in self.numbers
+            and isinstance(target, INTEGER_TYPES)
+            and INT64_MIN <= target <= INT64_MAX
+        ):
+            mask = COMPARISONS[operator](self.numbers[attr], int(target))
+            present = self.codes[attr] != MISSING_CODE
+            if missing:
+                return mask | ~present
+            return mask & present
+        if operator == "eq" and is_lookup_key(target):
+            # Values of the target type (or a supertype) compare normally,
+            # the rest are evaluated, as their __eq__ may be NotImplemented
+            def usable(typ):
+                return typ in SAFE_TYPES and issubclass(type(target), typ)
+
+            matching = self._matching(attr, predicate, [target], usable)
+        elif (
+            operator == "any"
+            and isinstance(target, (list, tuple, set))
+            and all(is_lookup_key(t) for t in target)
+        ):
+            # Scalar values match when equal to any target, list values are
+            # evaluated as they are checked for membership instead
+            def usable(typ):
+                return typ in SAFE_TYPES
+
+            matching = self._matching(attr, predicate, list(target), usable)
+        else:
+            matching = self._matching(attr, predicate)
+        return self._mask(attr, matching, missing)
+
+    def lookup_equal(self, attr, target):
+        """
+        Find the hosts matching a keyword filter, i.e. nr.filter(attr=target).
+
+        :param attr: The attribute name.
+        :type attr: string
+        :param target: The value to compare with.
+
+        :return mask: A boolean array, or None if the index can't answer the
+        filter.
+        """
+        if not self.indexed(attr) or not is_lookup_key(target):
+            return None
+
+        def usable(typ):
+            return typ in SAFE_TYPES
+
+        matching = self._matching(attr, lambda v: v == target, [target], usable)
+        # Keyword filters resolve a missing attribute to None
+        return self._mask(attr, matching, target is None)
+
+    def lookup_rule(self, key, target):
+        """
+        Find the hosts matching a single F keyword argument.
+
+        :param key: The F keyword, i.e. site_code__eq or site_code.
+        :type key: string
+        :param target: The value passed to the F filter.
+
+        :return mask: A boolean array, or None if the index can't answer the
+        rule.
+        """
+        rule = key.split("__")
+        if len(rule) == 2:
+            return self.lookup(rule[0], rule[1], target)
+        # A bare F(attr=value) compares with ==, like a keyword filter
+        if len(rule) == 1 and rule[0] not in RULE_OPERATORS:
+            return self.lookup_equal(rule[0], target)
+        return None
+
+
+class VectorEngine:
+    def __init__(self, index, hosts):
+        """
+        Evaluate nornir filters as element-wise operations on NumPy masks
+        over a VectorIndex.
+
+        :param index: The index of the inventory.
+        :type index: nornir_perf.vector.VectorIndex
+        :param hosts: The hosts of the inventory, used to evaluate anything
+            the index can't answer, i.e. a filter_func.
+        :type hosts: nornir.core.inventory.Hosts
+        """
+        self.index = index
+        # Host objects by position, for the filters which have to be evaluated
+        self.hosts = [hosts[name] for name in index.names]
+
+    def scan(self, predicate, scope):
+        """
+        Evaluate a predicate against every host in scope.
+
+        :param predicate: A function of a host, returning a boolean.
+        :type predicate: callable
+        :param scope: The mask of hosts to evaluate.
+        :type scope: numpy.ndarray
+
+        :return mask: The mask of hosts matching the predicate.
+        """
+        hosts = self.hosts
+        mask = numpy.zeros(self.index.size, dtype=bool)
+        mask[[i for i in numpy.flatnonzero(scope) if predicate(hosts[i])]] = True
+        return mask
+
+    def indexed(self, node):
+        """
+        Check whether a filter can be answered without evaluating any host.
+
+        :param node: An F object, an AND/OR of them, or a filter function.
+
+        :return bool: True if the index answers the whole filter.
+        """
+        if isinstance(node, (AND, OR)):
+            return self.indexed(node.op1) and self.indexed(node.op2)
+        if type(node) in (F, NOT_F):
+            return all(self.index.rule_indexed(k) for k in node.filters)
+        return False
+
+    def _rule(self, key, target, scope):
+        """
+        Resolve a single F keyword argument, i.e. site_code__eq="mel".
+
+        :param key: The F keyword.
+        :type key: string
+        :param target: The value passed to the F filter.
+        :param scope: The mask of hosts in scope.
+        :type scope: numpy.ndarray
+
+        :return mask: The mask of hosts in scope matching the rule.
+        """
+        mask = self.index.lookup_rule(key, target)
+        if mask is not None:
+            return mask & scope
+        rule = key.split("__")
+        return self.scan(lambda host: F._verify_rules(host, rule, target), scope)
+
+    def _evaluate(self, node, scope):
+        """
+        Recursively evaluate a filter within a scope.
+
+        :param node: An F object, an AND/OR of them, or a filter function.
+        :param scope: The mask of hosts in scope.
+        :type scope: numpy.ndarray
+
+        :return mask: The mask of hosts in scope matching the filter.
+        """
+        if isinstance(node, AND):
+            # Evaluate the indexed side first, so the other side only has to
+            # look at the hosts which are still candidates
+            first, second = node.op1, node.op2
+            if not self.indexed(first) and self.indexed(second):
+                first, second = second, first
+            return self._evaluate(second, self._evaluate(first, scope))
+        if isinstance(node, OR):
+            # Hosts already matched by the first side aren't evaluated again
+            first = self._evaluate(node.op1, scope)
+            return first | self._evaluate(node.op2, scope & ~first)
+        if type(node) is F:
+            for key, target in node.filters.items():
+                scope = self._rule(key, target, scope)
+            return scope
+        if type(node) is NOT_F:
+            # Hosts matching any of the rules are removed from the scope
+            remaining = scope
+            for key, target in node.filters.items():
+                remaining = remaining & ~self._rule(key, target, remaining)
+            return remaining
+        # Anything else (i.e. a filter_func) has to be evaluated host by host
+        return self.scan(node, scope)
+
+    def evaluate(self, filter_obj=None, kwargs=None, scope=None):
+        """
+        Evaluate a filter, as passed to Inventory.filter(), to a mask.
+
+        :param filter_obj: The F object or filter function, if any.
+        :param kwargs: The keyword filters, if any.
+        :type kwargs: dict
+        :param scope: The mask of hosts to filter. Default: every host
+        :type scope: numpy.ndarray
+
+        :return mask: The mask of matching hosts.
+        """
+        kwargs = kwargs or {}
+        if scope is None:
+            scope = numpy.ones(self.index.size, dtype=bool)
+        if filter_obj is not None and kwargs:
+            # A filter function with extra arguments, as Inventory.filter does
+            return self.scan(lambda host: filter_obj(host, **kwargs), scope)
+        if filter_obj is not None:
+            return self._evaluate(filter_obj, scope)
+        # Keyword filters match hosts which have all the given values
+        for key, target in kwargs.items():
+            mask = self.index.lookup_equal(key, target)
+            if mask is None:
+                scope = self.scan(lambda host: host.get(key) == target, scope)
+            else:
+                scope = scope & mask
+        return scope
+
+
+class VectorInventory(Inventory):
+    __slots__ = ("engine", "selection", "indexed")
+
+    def __init__(self, hosts, groups=None, defaults=None, engine=None, selection=None):
+        """
+        A nornir Inventory which evaluates filters as NumPy masks over a
+        VectorIndex. Anything the index can't answer (i.e. a filter_func) is
+        still evaluated host by host, but only against the hosts which are
+        still candidates.
+
+        Filtering returns a new VectorInventory, sharing the index. The index
+        isn't updated when hosts change, so call update_hosts() after adding
+        or removing hosts, or changing their data.
+
+        :param hosts: The hosts of the inventory.
+        :type hosts: nornir.core.inventory.Hosts
+        :param groups: The groups of the inventory.
+        :type groups: nornir.core.inventory.Groups
+        :param defaults: The defaults of the inventory.
+        :type defaults: nornir.core.inventory.Defaults
+        :param engine: An existing engine to share, i.e. with the inventory
+            this one was filtered from. Default: a new index over the hosts.
+        :type engine: nornir_perf.vector.VectorEngine
+        :param selection: The mask of the hosts of the engine held by this
+            inventory. Default: every host
+        :type selection: numpy.ndarray
+        """
+        super().__init__(hosts=hosts, groups=groups, defaults=defaults)
+        # Adding, replacing or removing a host bumps the version, so a filter
+        # can tell the selection is out of date without looking at every host
+        if not isinstance(self.hosts, VersionedHosts):
+            self.hosts = VersionedHosts(self.hosts)
+        if engine is None:
+            engine = VectorEngine(VectorIndex(self.hosts), self.hosts)
+        self.engine = engine
+        if selection is None:
+            selection = numpy.ones(engine.index.size, dtype=bool)
+        self.selection = selection
+        # The version of the hosts the selection is up to date with
+        self.indexed = self.hosts.version
+
+    def _current(self):
+        """
+        Check whether the hosts are still the hosts of the engine the
+        selection was built for, i.e. no host was added, removed or replaced
+        by another Host object since, even if the number of hosts is the same.
+
+        :return bool: True if the selection still matches the hosts.
+        """
+        return getattr(self.hosts, "version", None) == self.indexed
+
+    def update_hosts(self, previous, current, groups=()):
+        """
+        Rebuild the VectorIndex after hosts or groups were added, removed or
+        changed. NumPy columns can't grow or shrink in place, so the whole
+        index is built again.
+
+        :param previous: Host name -> the attributes the host had before the
+            change, for every host removed or changed.
+        :type previous: dict
+        :param current: Host name -> the attributes of the host, for every
+            host added or changed.
+        :type current: dict
+        :param groups: The names of the groups added, removed or whose
+            parent groups changed.
+        :type groups: iterable
+        """
+        if not isinstance(self.hosts, VersionedHosts):
+            self.hosts = VersionedHosts(self.hosts)
+        self.engine = VectorEngine(VectorIndex(self.hosts), self.hosts)
+        self.selection = numpy.ones(self.engine.index.size, dtype=bool)
+        self.indexed = self.hosts.version
+
+    def filter(self, filter_obj=None, filter_func=None, **kwargs):
+        """
+        Filter the inventory, see nornir.core.inventory.Inventory.filter.
+
+        :return inventory: A VectorInventory of the matching hosts, or a
+        plain Inventory if hosts were added, removed or replaced since it was
+        built.
+        """
+        if not self._current():
+            return super().filter(filter_obj, filter_func, **kwargs)
+        mask = self.engine.evaluate(filter_obj or filter_func, kwargs, self.selection)
+        names, hosts = self.engine.index.names, self.engine.hosts
+        return VectorInventory(
+            hosts=VersionedHosts({names[i]: hosts[i] for i in numpy.flatnonzero(mask)}),
+            groups=self.groups,
+            defaults=self.defaults,
+            engine=self.engine,
+            selection=mask,
+        )
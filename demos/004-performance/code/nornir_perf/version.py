@@ -0,0 +1,179 @@
+"""
+Version aware filtering of the os_version of the hosts.
+
+Nornir compares os_version as a string, so "older than 16.6.4" can't be
+expressed. version_key() parses a version string once (the result is
+cached) into a key which compares the way the versions do, and the
+VersionIndex keeps the distinct keys of each platform sorted, so a
+VersionFilter range query is a bisect per platform.
+
+Supported formats, from the demo inventory:
+    - IOS 16.6.4 and PAN-OS 10.0.3 (9.1.3-h1 for hotfixes)
+    - NX-OS 9.3(6) (7.0(3)I7(8) for older trains)
+    - Junos 18.4R2-S5
+    - EOS 4.23.2F
+"""
+
+# Import modules
+import re
+from array import array
+from functools import lru_cache
+from nornir_perf.bitmap import IndexedFilter, bitmap_from_ids
+from nornir_perf.index import RANGE_OPERATORS, RangeIndex
+
+# Runs of digits or letters, anything else (".", "(", ")", "-") separates them
+VERSION_TOKEN = re.compile(r"\d+|[A-Za-z]+")
+
+# VersionFilter operators
+VERSION_OPERATORS = ("eq",) + RANGE_OPERATORS
+
+
+@lru_cache(maxsize=4096)
+def version_key(version):
+    """
+    Parse a version string into a comparable key.
+
+    Numbers compare as numbers, so 16.10.1 is newer than 16.6.4, and letters
+    compare alphabetically. A version which extends another is newer, i.e.
+    18.4R2-S5 is newer than 18.4R2, and letters sort before numbers, i.e.
+    4.23.2F is older than 4.23.2.1F.
+
+    :param version: The version, i.e. 18.4R2-S5.
+    :type version: string
+
+    :return key: A tuple of (1, number) and (0, letters) tokens, or None if
+    the version isn't a string or holds no tokens.
+    """
+    if not isinstance(version, str):
+        return None
+    key = tuple(
+        (1, int(token)) if token.isdigit() else (0, token.upper())
+        for token in VERSION_TOKEN.findall(version)
+    )
+    return key or None
+
+
+def compare_version(key, operator, target):
+    """
+    Evaluate a VersionFilter rule against the version key of a host.
+
+    :param key: The version key of the host, or None if it hasn't got one.
+    :param operator: One of VERSION_OPERATORS.
+    :type operator: string
+    :param target: The version key to compare with.
+    :type target: tuple
+
+    :return bool: True if the version matches the rule.
+    """
+    if key is None or target is None:
+        return False
+    if operator == "eq":
+        return key == target
+    if operator == "ge":
+        return key >= target
+    if operator == "gt":
+        return key > target
+    if operator == "le":
+        return key <= target
+    if operator == "lt":
+        return key < target
+    raise ValueError(f"Unsupported version operator: {operator}")
+
+
+class VersionIndex:
+    def __init__(self, engine, attr="os_version"):
+        """
+        Index the parsed versions of every host of an inventory, sorted per
+        platform.
+
+        :param engine: The engine of the inventory, see
+            BitmapEngine.auxiliary.
+        :type engine: nornir_perf.bitmap.BitmapEngine
+        :param attr: The attribute holding the versions.
+        :type attr: string
+        """
+        self.size = engine.index.size
+        # (platform, version key) -> array of host ids
+        self.postings = {}
+        for i, host in enumerate(engine.hosts):
+            key = version_key(host.get(attr))
+            if key is not None:
+                posting = self.postings.setdefault((host.platform, key), array("l"))
+                posting.append(i)
+        # platform -> RangeIndex of its distinct version keys
+        keys = {}
+        for platform, key in self.postings:
+            keys.setdefault(platform, []).append(key)
+        self.platforms = {p: RangeIndex(k) for p, k in keys.items()}
+
+    def lookup(self, operator, targets):
+        """
+        Find the hosts matching a VersionFilter rule.
+
+        :param operator: One of VERSION_OPERATORS.
+        :type operator: string
+        :param targets: A dict of platform to the version key to compare
+            with, or None as the key for every platform.
+        :type targets: dict
+
+        :return bitmap: The bitmap of matching hosts.
+        """
+        ids = []
+        for platform, index in self.platforms.items():
+            target = targets.get(platform, targets.get(None))
+            if target is None:
+                continue
+            if operator == "eq":
+                keys = [target] if (platform, target) in self.postings else []
+            else:
+                keys = index.select(operator, target)
+            ids.extend(i for key in keys for i in self.postings[(platform, key)])
+        return bitmap_from_ids(ids, self.size)
+
+
+class VersionFilter(IndexedFilter):
+    def __init__(self, **kwargs):
+        """
+        Filter hosts on a version attribute, comparing versions rather than
+        strings. The hosts must match every rule.
+
+        The target of a rule is either a version, compared with the version
+        of every host, or a dict of platform to version, i.e. a certified
+        baseline, compared with the version of the hosts of each platform.
+        Hosts of other platforms, or without a version, never match.
+
+        Examples:
+            - VersionFilter(os_version__lt="16.6.4")
+            - VersionFilter(os_version__lt={"ios": "16.6.4", "junos": "18.4R2-S5"})
+
+        Operators: eq (the default), ge, gt, le and lt.
+
+        :param kwargs: The rules, as attribute__operator=target.
+        """
+        self.filters = kwargs
+        self.rules = []
+        for key, target in kwargs.items():
+            attr, _, operator = key.partition("__")
+            operator = operator or "eq"
+            if operator not in VERSION_OPERATORS:
+                raise ValueError(f"Unsupported version operator: {operator}")
+            if isinstance(target, dict):
+                targets = {p: version_key(v) for p, v in target.items()}
+            else:
+                targets = {None: version_key(target)}
+            self.rules.append((attr, operator, targets))
+
+    def __call__(self, host):
+        for attr, operator, targets in self.rules:
+            target = targets.get(host.platform, targets.get(None))
+            if not compare_version(version_key(host.get(attr)), operator, target):
+                return False
+        return True
+
+    def select(self, engine, scope):
+        for attr, operator, targets in self.rules:
+            scope &= engine.auxiliary(VersionIndex, attr).lookup(operator, targets)
+        return scope
+
+    def __repr__(self):
+        return f"<VersionFilter ({self.filters})>"
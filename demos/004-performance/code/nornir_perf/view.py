@@ -0,0 +1,246 @@
+"""
+Zero-copy filtered inventories.
+
+Filtering an IndexedInventory returns an InventoryView, which only holds a
+reference to the base inventory and the bitmap of selected host ids. Its
+hosts are a read-only HostsView, so chaining filters allocates no Hosts
+dicts and copies no host objects.
+"""
+
+# Import modules
+from collections.abc import ItemsView, Mapping, ValuesView
+from nornir.core.inventory import Inventory
+from nornir_perf.bitmap import bitmap_from_ids, count_bits, ids_from_bitmap
+
+
+def _version(base):
+    """
+    Find the version of the hosts of a base inventory, which changes whenever
+    a host is added, replaced or removed.
+
+    :param base: The indexed inventory.
+    :type base: nornir_perf.inventory.IndexedInventory
+
+    :return version: The version, or None if the hosts aren't versioned.
+    """
+    return getattr(base.hosts, "version", None)
+
+
+class HostsItemsView(ItemsView):
+    def __iter__(self):
+        # The names come from the view itself, so skip the membership check
+        hosts = self._mapping._base.hosts
+        return ((name, hosts[name]) for name in self._mapping)
+
+
+class HostsValuesView(ValuesView):
+    def __iter__(self):
+        hosts = self._mapping._base.hosts
+        return (hosts[name] for name in self._mapping)
+
+
+class HostsView(Mapping):
+    __slots__ = ("_base", "selection", "_by_id", "_version", "_ids", "_names")
+
+    def __init__(self, base, selection, names=None, version=None):
+        """
+        A read-only mapping of host name to host, over the hosts of a base
+        inventory which are set in a selection bitmap.
+
+        :param base: The indexed inventory the hosts belong to.
+        :type base: nornir_perf.inventory.IndexedInventory
+        :param selection: The bitmap of selected host ids.
+        :type selection: integer
+        :param names: The host names by id, which the selection was built
+            against. Default: the names of the index of the base inventory
+        :type names: list
+        :param version: The version of the hosts of the base inventory when
+            the selection was built. Default: their current version
+        :type version: integer
+        """
+        self._base = base
+        self.selection = selection
+        # Kept, as the index may be rebuilt and give the hosts other ids
+        self._by_id = base.index.names if names is None else names
+        self._version = _version(base) if version is None else version
+        # Decoded lazily, as many views are only filtered again
+        self._ids = None
+        # (version of the hosts of the base, set of the selected names)
+        self._names = None
+
+    def ids(self):
+        """
+        List the selected host ids, in inventory order.
+
+        :return ids: A list of host ids.
+        """
+        if self._ids is None:
+            self._ids = ids_from_bitmap(self.selection)
+        return self._ids
+
+    def __iter__(self):
+        names, hosts = self._by_id, self._base.hosts
+        # Skip hosts removed from the base inventory since it was indexed
+        return (names[i] for i in self.ids() if names[i] in hosts)
+
+    def __len__(self):
+        if _version(self._base) != self._version:
+            # Hosts may have been removed from the base since, which the
+            # iteration skips
+            return len(self._selected())
+        if self._ids is None:
+            return count_bits(self.selection)
+        return len(self._ids)
+
+    def _selected(self):
+        """
+        Build the set of the selected host names still in the base inventory.
+
+        :return names: A set of host names.
+        """
+        version = _version(self._base)
+        if self._names is None or self._names[0] != version:
+            self._names = (version, set(self))
+        return self._names[1]
+
+    def __contains__(self, name):
+        return name in self._selected()
+
+    def __getitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        return self._base.hosts[name]
+
+    def items(self):
+        return HostsItemsView(self)
+
+    def values(self):
+        return HostsValuesView(self)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self)} hosts)"
+
+
+class InventoryView(Inventory):
+    __slots__ = (
+        "base",
+        "selection",
+        "_engine",
+        "_generation",
+        "_names",
+        "_version",
+        "_hosts",
+    )
+
+    def __init__(self, base, selection):
+        """
+        A filtered nornir Inventory, which holds a reference to its base
+        inventory and a bitmap of selected host ids, instead of its own
+        copy of the hosts.
+
+        The ids are the ones of the index when the view was filtered. If the
+        base inventory is reindexed, or hosts are removed through
+        update_hosts(), afterwards, the view keeps its hosts, and filtering
+        it maps them to the current ids.
+
+        :param base: The indexed inventory the view was filtered from.
+        :type base: nornir_perf.inventory.IndexedInventory
+        :param selection: The bitmap of selected host ids.
+        :type selection: integer
+        """
+        self.base = base
+        self.selection = selection
+        # The engine, generation of ids, host names by id and version of the
+        # hosts the selection was built against
+        self._engine = base.engine
+        self._generation = base.index.generation
+        self._names = base.index.names
+        self._version = _version(base)
+        self.groups = base.groups
+        self.defaults = base.defaults
+        self._hosts = None
+
+    @property
+    def hosts(self):
+        """
+        The selected hosts, as a read-only mapping of host name to host.
+        """
+        if self._hosts is None:
+            self._hosts = HostsView(
+                self.base, self.selection, self._names, self._version
+            )
+        return self._hosts
+
+    @property
+    def engine(self):
+        """
+        The BitmapEngine of the base inventory.
+        """
+        return self.base.engine
+
+    @property
+    def index(self):
+        """
+        The AttributeIndex of the base inventory.
+        """
+        return self.base.index
+
+    def stale(self):
+        """
+        Check whether the base inventory was reindexed, or its hosts
+        renumbered by update_hosts(), since the view was filtered, so its
+        selection holds ids which aren't the current ones.
+
+        :return bool: True if the selection is out of date.
+        """
+        engine = self.base.engine
+        return engine is not self._engine or engine.index.generation != self._generation
+
+    def scope(self):
+        """
+        The bitmap of the hosts held by this view.
+
+        :return bitmap: The selection bitmap, mapped to the ids of the
+        current index if the base inventory was reindexed, or None if some
+        hosts aren't in the current index.
+        """
+        if not self.stale():
+            return self.selection
+        if self.base.scope() is None:
+            return None
+        ids = self.base.index.ids
+        try:
+            return bitmap_from_ids((ids[n] for n in self.hosts), self.index.size)
+        except KeyError:
+            return None
+
+    def filter(self, filter_obj=None, filter_func=None, **kwargs):
+        """
+        Filter the view, see nornir.core.inventory.Inventory.filter.
+
+        :return inventory: A new InventoryView over the same base inventory,
+        or a plain Inventory if the index of the base inventory is out of
+        date.
+        """
+        scope = self.scope()
+        if scope is None:
+            # The index is out of date, so let nornir evaluate every host
+            return super().filter(filter_obj, filter_func, **kwargs)
+        bitmap = self.base.engine.evaluate(filter_obj or filter_func, kwargs, scope)
+        return InventoryView(self.base, bitmap)
+
+    def children_of_group(self, group):
+        """
+        Find the selected hosts which belong to a group, from the GroupIndex
+        of the base inventory.
+
+        :param group: The group, or its name.
+        :type group: string or nornir.core.inventory.Group
+
+        :return hosts: A set of hosts.
+        """
+        hosts = self.hosts
+        return {h for h in self.base.children_of_group(group) if h.name in hosts}
+
+    def __len__(self):
+        return len(self.hosts)